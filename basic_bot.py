@@ -8,13 +8,15 @@
 4. 執行點擊操作
 """
 
+import argparse
 import sys
 import time
 from pathlib import Path
+from typing import Optional
 
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from capture import ScreenCapture
+from capture import ScreenCapture, ADBScreenCapture, ADBStreamCapture, ThreadedCapture, ReplayCapture, ChangeDetector
 from vision import TemplateMatcher
 from automation import ADBController
 from config import get_config
@@ -24,21 +26,22 @@ from loguru import logger
 class BasicBot:
     """基礎自動化機器人"""
     
-    def __init__(self):
-        """初始化"""
+    def __init__(self, replay: Optional[str] = None, replay_mode: str = 'realtime'):
+        """
+        初始化
+        
+        Args:
+            replay: 回放來源（記錄目錄、圖片目錄或影片檔）。設定時不使用螢幕與 ADB，
+                點擊只記錄在日誌中
+            replay_mode: 回放模式 'realtime' / 'fast' / 'step'
+        """
         logger.info("初始化機器人...")
+        self.replay = replay
+        self.replay_mode = replay_mode
         
         # 載入配置
         self.config = get_config()
         
-        # 初始化螢幕擷取
-        region = self.config.get('capture.region')
-        self.capturer = ScreenCapture(
-            region=region,
-            resize=tuple(self.config.get('capture.resize', [640, 360])),
-            fps_limit=self.config.get('capture.fps', 30)
-        )
-        
         # 初始化 ADB
         adb_config = self.config.get('automation.adb', {})
         self.adb = ADBController(
@@ -46,22 +49,93 @@ class BasicBot:
             port=adb_config.get('port', 5555)
         )
         
+        # 畫面變化偵測（擷取與模板匹配共用）
+        self.change_detector = ChangeDetector() if self.config.get('capture.change_detection', False) else None
+        
+        # 初始化螢幕擷取
+        self.capturer = self._create_capturer()
+        
         # 初始化模板匹配
-        self.matcher = TemplateMatcher(threshold=0.75)
+        matching_config = self.config.get('vision.template_matching') or {}
+        self.matcher = TemplateMatcher(
+            threshold=0.75,
+            change_detector=self.change_detector,
+            learn_regions=matching_config.get('learn_regions', False),
+            region_margin=matching_config.get('region_margin', 16),
+            region_miss_limit=matching_config.get('region_miss_limit', 10),
+            pyramid_levels=matching_config.get('pyramid_levels', 0),
+            scale_range=matching_config.get('scale_range'),
+            scale_step=matching_config.get('scale_step', 0.05),
+            scale_miss_limit=matching_config.get('scale_miss_limit', 50),
+            result_cache_size=matching_config.get('result_cache_size', 256),
+            keep_response_maps=matching_config.get('keep_response_maps', 0),
+            cache_by_content=matching_config.get('result_cache_by_content', False)
+        )
         
-        # 連接 ADB
-        if not self.adb.connect():
+        # 連接 ADB（回放模式不需要）
+        if replay is None and not self.adb.connect():
             raise ConnectionError("無法連接 ADB")
         
         logger.success("✅ 機器人初始化完成")
     
-    def find_and_click(self, template_name: str, timeout: float = 5.0) -> bool:
+    def _create_capturer(self):
+        """依配置建立擷取器（mss / adb / adb_stream 後端，可選背景執行緒）"""
+        backend = self.config.get('capture.backend', 'mss')
+        resize = tuple(self.config.get('capture.resize', [640, 360]))
+        
+        if self.replay is not None:
+            capturer = ReplayCapture(
+                self.replay,
+                mode=self.replay_mode,
+                resize=resize,
+                zero_copy=self.config.get('capture.zero_copy', False),
+                change_detector=self.change_detector
+            )
+        elif backend == 'adb_stream':
+            # 串流本身就在背景執行緒解碼
+            capturer = ADBStreamCapture(self.adb, resize=resize, change_detector=self.change_detector)
+        else:
+            capturer = self._create_grab_capturer(backend, resize)
+        
+        # 具名子區域（只關心部分畫面的檢查只擷取並匹配該區域）
+        for name, rect in (self.config.get('capture.rois') or {}).items():
+            capturer.add_roi(name, rect)
+        
+        return capturer
+    
+    def _create_grab_capturer(self, backend: str, resize):
+        """建立 mss / adb 擷取器（可選背景執行緒）"""
+        capture_kwargs = {
+            'resize': resize,
+            'fps_limit': self.config.get('capture.fps', 30),
+            'zero_copy': self.config.get('capture.zero_copy', False),
+            'change_detector': self.change_detector,
+        }
+        
+        if backend == 'adb':
+            factory = lambda: ADBScreenCapture(self.adb, **capture_kwargs)
+        else:
+            region = self.config.get('capture.region')
+            factory = lambda: ScreenCapture(region=region, **capture_kwargs)
+        
+        if self.config.get('capture.threaded', False):
+            return ThreadedCapture(factory)
+        return factory()
+    
+    def _capture(self, roi: Optional[str] = None):
+        """擷取完整影格，或只擷取具名子區域"""
+        if roi is None:
+            return self.capturer.capture_packet()
+        return self.capturer.capture_rois([roi])[roi]
+    
+    def find_and_click(self, template_name: str, timeout: float = 5.0, roi: Optional[str] = None) -> bool:
         """
         尋找模板並點擊
         
         Args:
             template_name: 模板名稱
             timeout: 超時時間（秒）
+            roi: 只在此具名子區域（capture.rois）內尋找，None 表示整個畫面
             
         Returns:
             是否成功
@@ -71,8 +145,8 @@ class BasicBot:
         start_time = time.time()
         
         while time.time() - start_time < timeout:
-            # 擷取螢幕
-            frame = self.capturer.capture()
+            # 擷取螢幕（子區域的匹配結果已換算為影格座標）
+            frame = self._capture(roi)
             
             # 尋找模板
             match = self.matcher.match(frame, template_name)
@@ -83,7 +157,10 @@ class BasicBot:
                 
                 # 點擊（需要將截圖座標轉換為實際螢幕座標）
                 # 這裡假設沒有縮放，實際使用時需要調整
-                self.adb.tap(x, y)
+                if self.replay is None:
+                    self.adb.tap(x, y)
+                else:
+                    logger.info(f"[回放] 略過點擊 ({x}, {y})")
                 
                 return True
             
@@ -92,13 +169,14 @@ class BasicBot:
         logger.warning(f"⚠️  未找到 {template_name}（超時）")
         return False
     
-    def wait_for_template(self, template_name: str, timeout: float = 10.0) -> bool:
+    def wait_for_template(self, template_name: str, timeout: float = 10.0, roi: Optional[str] = None) -> bool:
         """
         等待模板出現
         
         Args:
             template_name: 模板名稱
             timeout: 超時時間（秒）
+            roi: 只在此具名子區域（capture.rois）內尋找，None 表示整個畫面
             
         Returns:
             是否找到
@@ -108,7 +186,7 @@ class BasicBot:
         start_time = time.time()
         
         while time.time() - start_time < timeout:
-            frame = self.capturer.capture()
+            frame = self._capture(roi)
             match = self.matcher.match(frame, template_name)
             
             if match:
@@ -178,19 +256,25 @@ class BasicBot:
         """清理資源"""
         logger.info("清理資源...")
         self.capturer.close()
-        self.adb.disconnect()
+        if self.replay is None:
+            self.adb.disconnect()
         logger.success("✅ 清理完成")
 
 
 def main():
     """主程式"""
+    parser = argparse.ArgumentParser(description="基礎自動化腳本")
+    parser.add_argument("--replay", help="以記錄目錄、圖片目錄或影片檔取代螢幕與 ADB")
+    parser.add_argument("--mode", choices=["realtime", "fast", "step"], default="realtime", help="回放模式")
+    args = parser.parse_args()
+    
     logger.info("=" * 60)
     logger.info("🤖 基礎自動化腳本")
     logger.info("=" * 60)
     
     try:
         # 建立機器人
-        bot = BasicBot()
+        bot = BasicBot(replay=args.replay, replay_mode=args.mode)
         
         # 執行循環
         bot.run_simple_loop()
@@ -4,6 +4,7 @@
 展示如何整合螢幕擷取、模板匹配和 ADB 控制。
 """
 
+import argparse
 import sys
 import time
 import cv2
@@ -13,14 +14,34 @@ from pathlib import Path
 # 添加 src 到路徑
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from capture import ScreenCapture
-from vision import TemplateMatcher
+from capture import ScreenCapture, ReplayCapture, SessionRecorder
+from vision import TemplateMatcher, ScreenStateIndex, is_template_pack_stale
 from automation import ADBController
 from config import get_config
+from profiling import tracer
 from loguru import logger
 
 
-def main():
+def parse_args():
+    """解析命令列參數"""
+    parser = argparse.ArgumentParser(description="運氣突擊隊 AI Bot - 系統示範")
+    parser.add_argument(
+        "--replay",
+        help="回放記錄目錄、圖片目錄或影片檔，取代螢幕擷取（不需要螢幕或模擬器）"
+    )
+    parser.add_argument(
+        "--mode", choices=["realtime", "fast", "step"], default="realtime",
+        help="回放模式：realtime 依原始速度、fast 盡快播放、step 按 'n' 前進一幀"
+    )
+    parser.add_argument("--loop", action="store_true", help="回放結束後從頭開始")
+    parser.add_argument(
+        "--headless", action="store_true",
+        help="不開啟視窗，每幀對所有模板做匹配並在結束時輸出吞吐量（適合效能比較）"
+    )
+    return parser.parse_args()
+
+
+def main(args):
     """主程式"""
     logger.info("=" * 60)
     logger.info("🎮 運氣突擊隊 AI Bot - 系統示範")
@@ -34,6 +55,12 @@ def main():
         logger.error(f"❌ 無法載入配置檔案: {e}")
         return
     
+    trace_file = None
+    if config.get('profiling.enabled', False):
+        tracer.enable()
+        trace_file = config.get('profiling.trace_file', 'logs/trace.json')
+        logger.info("⏱️ 已啟用效能計時")
+    
     # 初始化螢幕擷取
     logger.info("\n初始化螢幕擷取...")
     region = config.get('capture.region')
@@ -45,11 +72,21 @@ def main():
     
     fps = config.get('capture.fps', 30)
     
-    capturer = ScreenCapture(
-        region=region,
-        resize=resize,
-        fps_limit=fps
-    )
+    if args.replay:
+        capturer = ReplayCapture(
+            args.replay,
+            mode=args.mode,
+            loop=args.loop,
+            resize=resize,
+            zero_copy=config.get('capture.zero_copy', False)
+        )
+    else:
+        capturer = ScreenCapture(
+            region=region,
+            resize=resize,
+            fps_limit=fps,
+            zero_copy=config.get('capture.zero_copy', False)
+        )
     
     # 初始化 ADB 控制器（可選）
     logger.info("\n初始化 ADB 控制器...")
@@ -60,7 +97,9 @@ def main():
     )
     
     use_adb = False
-    if adb.connect():
+    if args.replay:
+        logger.info("回放模式，不連接 ADB")
+    elif adb.connect():
         logger.success("✅ ADB 連接成功，將使用 ADB 控制")
         use_adb = True
     else:
@@ -68,11 +107,33 @@ def main():
     
     # 初始化模板匹配器（可選）
     logger.info("\n初始化模板匹配器...")
-    matcher = TemplateMatcher(threshold=0.8)
+    matching_config = config.get('vision.template_matching') or {}
+    matcher = TemplateMatcher(
+        threshold=0.8,
+        learn_regions=matching_config.get('learn_regions', False),
+        region_margin=matching_config.get('region_margin', 16),
+        region_miss_limit=matching_config.get('region_miss_limit', 10),
+        pyramid_levels=matching_config.get('pyramid_levels', 0),
+        scale_range=matching_config.get('scale_range'),
+        scale_step=matching_config.get('scale_step', 0.05),
+        scale_miss_limit=matching_config.get('scale_miss_limit', 50),
+        result_cache_size=matching_config.get('result_cache_size', 256),
+        keep_response_maps=matching_config.get('keep_response_maps', 0),
+        cache_by_content=matching_config.get('result_cache_by_content', False)
+    )
     
-    # 嘗試載入模板
+    # 嘗試載入模板（優先使用預先編譯的模板包）
     templates_dir = Path("data/templates")
-    if templates_dir.exists():
+    template_pack = matching_config.get('template_pack')
+    use_pack = bool(template_pack) and Path(template_pack).exists()
+    if use_pack and is_template_pack_stale(template_pack, str(templates_dir)):
+        logger.warning(f"⚠️  模板包 {template_pack} 與 {templates_dir} 不一致，改從目錄載入"
+                       "（請執行 python tool_build_template_pack.py 重新編譯）")
+        use_pack = False
+    if use_pack:
+        count = matcher.load_template_pack(template_pack)
+        logger.info(f"載入了 {count} 個模板")
+    elif templates_dir.exists():
         count = matcher.load_templates_from_dir(str(templates_dir))
         logger.info(f"載入了 {count} 個模板")
     else:
@@ -80,25 +141,60 @@ def main():
         logger.info("建立模板目錄...")
         templates_dir.mkdir(parents=True, exist_ok=True)
     
+    # 畫面狀態索引（可選）：先辨識畫面，只匹配該畫面相關的模板
+    state_config = config.get('vision.screen_state') or {}
+    state_index_path = state_config.get('index')
+    if state_index_path and Path(state_index_path).exists():
+        matcher.state_index = ScreenStateIndex.load(state_index_path)
+        if state_config.get('max_distance') is not None:
+            matcher.state_index.max_distance = state_config['max_distance']
+        logger.info(f"載入畫面狀態索引: {matcher.state_index.states}")
+    
     logger.info("\n" + "=" * 60)
     logger.info("系統初始化完成！")
     logger.info("=" * 60)
     logger.info("\n操作說明:")
     logger.info("  按 'q' - 退出")
     logger.info("  按 's' - 截圖")
+    logger.info("  按 'r' - 開始/停止記錄影格（data/sessions，可離線重現）")
     logger.info("  按 'c' - 測試點擊（需要 ADB）")
     logger.info("  按 't' - 測試模板匹配（需要已載入模板）")
+    if args.replay and args.mode == 'step':
+        logger.info("  按 'n' - 回放下一幀")
     logger.info("\n開始運行...\n")
     
     frame_count = 0
     screenshot_count = 0
+    match_count = 0
+    match_time = 0.0
+    recorder = None
+    start_time = time.perf_counter()
     
     try:
         while True:
-            # 擷取螢幕
-            frame = capturer.capture()
+            # 擷取螢幕（影格封包會快取灰階等衍生影像，供模板匹配共用）
+            try:
+                packet = capturer.capture_packet()
+            except EOFError:
+                logger.info("回放結束")
+                break
             frame_count += 1
             
+            # 記錄影格（背景寫入不阻塞擷取）
+            if recorder is not None:
+                recorder.write(packet)
+            
+            if args.headless:
+                # 無視窗模式：每幀匹配目前畫面相關的模板（未載入狀態索引時匹配所有模板）
+                match_start = time.perf_counter()
+                _, results = matcher.match_screen(packet)
+                match_count += sum(1 for match in results.values() if match)
+                match_time += time.perf_counter() - match_start
+                continue
+            
+            # 疊加文字用的顯示影像（不修改封包，模板匹配仍使用原始畫面）
+            frame = packet.bgr.copy()
+            
             # 顯示 FPS
             fps_current = capturer.get_fps()
             cv2.putText(
@@ -139,6 +235,19 @@ def main():
                 cv2.imwrite(filename, frame)
                 logger.success(f"✅ 截圖已儲存: {filename}")
             
+            elif key == ord('r'):
+                if recorder is None:
+                    session_dir = Path("data/sessions") / time.strftime("session_%Y%m%d_%H%M%S")
+                    recorder = SessionRecorder(str(session_dir))
+                    logger.success(f"✅ 開始記錄: {session_dir}")
+                else:
+                    recorder.close()
+                    recorder = None
+                    logger.success("✅ 停止記錄")
+            
+            elif key == ord('n') and args.replay:
+                capturer.step()
+            
             elif key == ord('c'):
                 if use_adb:
                     # 測試點擊螢幕中心
@@ -154,9 +263,11 @@ def main():
                 # 測試模板匹配
                 template_names = matcher.get_template_names()
                 if template_names:
-                    logger.info(f"正在測試所有模板 ({len(template_names)} 個)...")
-                    for template_name in template_names:
-                        match = matcher.match(frame, template_name)
+                    logger.info(f"正在測試模板 ({len(template_names)} 個)...")
+                    state, results = matcher.match_screen(packet)
+                    if matcher.state_index is not None:
+                        logger.info(f"畫面狀態: {state or '未知'}，匹配 {len(results)} 個模板")
+                    for template_name, match in results.items():
                         if match:
                             x, y, conf = match
                             logger.success(
@@ -165,7 +276,7 @@ def main():
                             )
                             
                             # 在畫面上畫出來給使用者看
-                            h, w = matcher.templates[template_name]['shape']
+                            h, w = matcher.template_shape(template_name)
                             # 從中心點轉換回左上角
                             top_left_x = x - w // 2
                             top_left_y = y - h // 2
@@ -183,17 +294,44 @@ def main():
     
     finally:
         # 清理資源
+        elapsed = time.perf_counter() - start_time
+        timing = capturer.get_timing_stats()
         capturer.close()
+        matcher.close()
+        if recorder is not None:
+            recorder.close()
         if use_adb:
             adb.disconnect()
-        cv2.destroyAllWindows()
+        if not args.headless:
+            cv2.destroyAllWindows()
         
         logger.info("\n" + "=" * 60)
         logger.info("系統統計:")
         logger.info(f"  總幀數: {frame_count}")
         logger.info(f"  截圖數: {screenshot_count}")
+        logger.info(f"  吞吐量: {frame_count / elapsed if elapsed > 0 else 0:.1f} fps")
+        if args.headless and frame_count:
+            logger.info(
+                f"  模板匹配: {match_count} 次命中，"
+                f"平均 {match_time / frame_count * 1000:.2f} ms/幀"
+            )
+        if timing:
+            interval, grab = timing['interval'], timing['capture']
+            logger.info(
+                f"  影格間隔: p50={interval['p50_ms']:.1f}ms "
+                f"p95={interval['p95_ms']:.1f}ms p99={interval['p99_ms']:.1f}ms"
+            )
+            logger.info(
+                f"  擷取耗時: p50={grab['p50_ms']:.1f}ms "
+                f"p95={grab['p95_ms']:.1f}ms p99={grab['p99_ms']:.1f}ms"
+            )
+            logger.info(f"  跳過影格: {timing['skipped_frames']}")
+        if trace_file:
+            logger.info("各階段耗時 (ms):\n" + tracer.report())
+            count = tracer.dump_chrome_trace(trace_file)
+            logger.info(f"  Chrome trace: {trace_file} ({count} 個事件)")
         logger.info("=" * 60)
 
 
 if __name__ == "__main__":
-    main()
+    main(parse_args())
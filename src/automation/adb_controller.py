@@ -5,13 +5,27 @@ ADB 控制器模組
 """
 
 import subprocess
+import struct
+import threading
 import time
 import os
 import sys
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Callable
 from loguru import logger
+import numpy as np
 import yaml
 
+from profiling import tracer
+
+
+# screencap 原始輸出的像素格式代碼 -> 影像格式（皆為每像素 4 位元組）
+SCREENCAP_FORMATS = {
+    1: 'RGBA',  # RGBA_8888
+    2: 'RGBA',  # RGBX_8888
+    5: 'BGRA',  # BGRA_8888
+}
+
+
 class ADBController:
     """ADB 控制器類別"""
     
@@ -47,6 +61,7 @@ class ADBController:
 
         logger.info(f"初始化 ADB 控制器: {self.device} (使用 ADB: {self.adb_path})")
     
+    @tracer.traced('adb.cmd')
     def _run_cmd(self, cmd: str, timeout: int = 10) -> Tuple[bool, str]:
         """
         執行 Shell 指令並處理編碼
@@ -329,6 +344,129 @@ class ADBController:
             logger.error(f"截圖失敗: {e}")
             return False
     
+    @tracer.traced('adb.screencap')
+    def screencap_raw(
+        self,
+        alloc: Optional[Callable[[int], np.ndarray]] = None,
+        timeout: float = 10.0
+    ) -> Optional[Tuple[np.ndarray, str]]:
+        """
+        以 exec-out 串流 screencap 原始輸出，直接讀入 numpy 緩衝區
+        
+        不經過 PNG 編碼/解碼，也不需要在設備上建立暫存檔。
+        
+        Args:
+            alloc: 緩衝區配置函式 alloc(nbytes) -> 一維 uint8 陣列，
+                可用來重複使用緩衝區（None 表示每次配置新的緩衝區）
+            timeout: 逾時時間（秒）
+            
+        Returns:
+            ((height, width, 4) 影像, 'RGBA' 或 'BGRA') 或 None
+        """
+        if not self.connected:
+            if not self.connect():
+                return None
+        
+        cmd = f'"{self.adb_path}" -s {self.device} exec-out screencap'
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                shell=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except Exception as e:
+            logger.error(f"截圖失敗: {e}")
+            return None
+        
+        # 逾時則終止程序，讓阻塞中的讀取結束
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        try:
+            header = proc.stdout.read(12)
+            if len(header) < 12:
+                logger.error("截圖失敗: screencap 輸出不完整")
+                return None
+            
+            width, height, pixel_format = struct.unpack('<3I', header)
+            image_format = SCREENCAP_FORMATS.get(pixel_format)
+            if image_format is None:
+                logger.error(f"截圖失敗: 不支援的像素格式 {pixel_format}")
+                return None
+            
+            # Android 9 以後的標頭多 4 位元組 (colorspace)，預留空間後依實際長度判斷
+            nbytes = width * height * 4
+            buffer = alloc(nbytes + 4) if alloc is not None else np.empty(nbytes + 4, dtype=np.uint8)
+            view = memoryview(buffer)
+            received = 0
+            while received < len(view):
+                n = proc.stdout.readinto(view[received:])
+                if not n:
+                    break
+                received += n
+            
+            if received == nbytes + 4:
+                offset = 4
+            elif received == nbytes:
+                offset = 0
+            else:
+                logger.error(f"截圖失敗: 資料長度不符 ({received} != {nbytes})")
+                return None
+            
+            image = buffer[offset:offset + nbytes].reshape(height, width, 4)
+            return image, image_format
+            
+        except Exception as e:
+            logger.error(f"截圖失敗: {e}")
+            return None
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+            proc.wait()
+    
+    def open_screenrecord(
+        self,
+        bit_rate: int = 8_000_000,
+        size: Optional[Tuple[int, int]] = None
+    ) -> Optional[subprocess.Popen]:
+        """
+        開啟 screenrecord H.264 串流（Annex B 格式，由 stdout 讀取）
+        
+        注意：screenrecord 單次最長錄製 3 分鐘，結束後需重新開啟。
+        
+        Args:
+            bit_rate: 位元率 (bps)
+            size: 輸出大小 (width, height)，None 表示設備解析度
+            
+        Returns:
+            subprocess.Popen 或 None
+        """
+        if not self.connected:
+            if not self.connect():
+                return None
+        
+        cmd = (
+            f'"{self.adb_path}" -s {self.device} exec-out screenrecord '
+            f'--output-format=h264 --bit-rate {bit_rate}'
+        )
+        if size:
+            cmd += f' --size {size[0]}x{size[1]}'
+        cmd += ' -'
+        
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                shell=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0
+            )
+            logger.debug(f"screenrecord 串流已開啟: {self.device}")
+            return proc
+        except Exception as e:
+            logger.error(f"開啟 screenrecord 失敗: {e}")
+            return None
+    
     def pull_file(self, device_path: str, local_path: str) -> bool:
         """
         從設備拉取檔案
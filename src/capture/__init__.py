@@ -1,5 +1,34 @@
 """capture package - 螢幕擷取模組"""
 
+from .base_capture import BaseCapture
 from .screen_capture import ScreenCapture
+from .adb_capture import ADBScreenCapture
+from .frame_packet import FramePacket
+from .frame_ring import FrameRing
+from .change_detector import ChangeDetector
+from .frame_scheduler import FrameScheduler
+from .threaded_capture import ThreadedCapture
+from .adb_stream import ADBStreamCapture
+from .session_recorder import SessionRecorder, SessionReader
+from .replay_capture import ReplayCapture
+from .multi_instance import MultiInstanceCapture, InstanceCapture
+from .frame_bus import FrameBusPublisher, FrameBusSubscriber
 
-__all__ = ['ScreenCapture']
+__all__ = [
+    'BaseCapture',
+    'ScreenCapture',
+    'ADBScreenCapture',
+    'FramePacket',
+    'FrameRing',
+    'ChangeDetector',
+    'FrameScheduler',
+    'ThreadedCapture',
+    'ADBStreamCapture',
+    'SessionRecorder',
+    'SessionReader',
+    'ReplayCapture',
+    'MultiInstanceCapture',
+    'InstanceCapture',
+    'FrameBusPublisher',
+    'FrameBusSubscriber',
+]
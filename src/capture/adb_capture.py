@@ -0,0 +1,85 @@
+"""
+ADB 擷取模組
+
+透過 ADB exec-out screencap 直接取得模擬器的原始畫面，
+不需要模擬器視窗可見，也可以同時擷取多個模擬器。
+"""
+
+from typing import Tuple, Optional, Dict, Any
+
+import numpy as np
+
+from .base_capture import BaseCapture
+from .change_detector import ChangeDetector
+
+
+class ADBScreenCapture(BaseCapture):
+    """ADB 原始畫面擷取類別"""
+
+    def __init__(
+        self,
+        adb: Any,
+        region: Optional[Dict[str, int]] = None,
+        resize: Optional[Tuple[int, int]] = None,
+        fps_limit: int = 30,
+        zero_copy: bool = False,
+        change_detector: Optional[ChangeDetector] = None,
+        timeout: float = 10.0
+    ):
+        """
+        初始化 ADB 擷取器
+
+        Args:
+            adb: ADBController（需提供 screencap_raw()）
+            region: 擷取區域（設備座標）{"left": x, "top": y, "width": w, "height": h}，
+                None 表示整個畫面
+            resize: 調整大小 (width, height)，None 表示不調整
+            fps_limit: FPS 限制
+            zero_copy: 零複製模式，原始畫面讀入重複使用的緩衝區
+            change_detector: 畫面變化偵測器
+            timeout: 單次截圖逾時時間（秒）
+        """
+        super().__init__(
+            resize=resize,
+            fps_limit=fps_limit,
+            zero_copy=zero_copy,
+            change_detector=change_detector
+        )
+        self.adb = adb
+        self.region = region
+        self.timeout = timeout
+
+        print(f"✅ ADB 擷取器初始化完成")
+        print(f"   設備: {getattr(adb, 'device', adb)}")
+        print(f"   區域: {self.region or '整個畫面'}")
+        print(f"   調整大小: {self.resize}")
+        print(f"   FPS 限制: {self.fps_limit}")
+
+    def _grab(self, pool: Optional[Dict[str, np.ndarray]]) -> Tuple[np.ndarray, str]:
+        """
+        以 screencap 原始輸出擷取一幀
+
+        Returns:
+            (RGBA 或 BGRA 影像, 影像格式)
+        """
+        result = self.adb.screencap_raw(
+            alloc=lambda nbytes: self._pooled_buffer(pool, 'raw', (nbytes,)),
+            timeout=self.timeout
+        )
+        if result is None:
+            raise RuntimeError("ADB 截圖失敗")
+
+        image, image_format = result
+        if self.region:
+            left, top = self.region['left'], self.region['top']
+            image = image[
+                top:top + self.region['height'],
+                left:left + self.region['width']
+            ]
+        return image, image_format
+
+    def __repr__(self) -> str:
+        return (
+            f"ADBScreenCapture(device={getattr(self.adb, 'device', self.adb)}, "
+            f"region={self.region}, resize={self.resize}, fps={self.fps_limit})"
+        )
@@ -0,0 +1,228 @@
+"""
+ADB 串流擷取模組
+
+保持一條 screenrecord H.264 串流開啟，在背景執行緒上逐步解碼，
+並以與 ThreadedCapture 相同的最新影格 API 提供解碼後的畫面。
+需要 PyAV (pip install av)。
+"""
+
+import time
+from collections import deque
+from typing import Tuple, Optional, Dict, Any
+
+import numpy as np
+
+from .base_capture import BaseCapture
+from .change_detector import ChangeDetector
+from .threaded_capture import ThreadedCapture
+
+try:
+    import av
+except ImportError:  # 選用相依套件
+    av = None
+
+
+class H264StreamSource(BaseCapture):
+    """screenrecord H.264 串流解碼來源（在 ThreadedCapture 的生產者執行緒上執行）"""
+
+    def __init__(
+        self,
+        adb: Any,
+        resize: Optional[Tuple[int, int]] = None,
+        change_detector: Optional[ChangeDetector] = None,
+        bit_rate: int = 8_000_000,
+        record_size: Optional[Tuple[int, int]] = None,
+        max_reconnects: Optional[int] = None,
+        reconnect_delay: float = 0.5,
+        read_size: int = 65536
+    ):
+        """
+        初始化串流解碼來源
+
+        Args:
+            adb: ADBController（需提供 open_screenrecord()）
+            resize: 調整大小 (width, height)，None 表示不調整
+            change_detector: 畫面變化偵測器
+            bit_rate: screenrecord 位元率 (bps)
+            record_size: screenrecord 輸出大小 (width, height)，None 表示設備解析度
+            max_reconnects: 最多重新連線次數，None 表示不限制
+            reconnect_delay: 串流中斷後重新連線前的等待時間（秒）
+            read_size: 每次從串流讀取的最大位元組數
+        """
+        if av is None:
+            raise ImportError("ADB 串流擷取需要 PyAV，請執行: pip install av")
+
+        # 影格速率由設備決定，不另外限制
+        super().__init__(resize=resize, fps_limit=None, change_detector=change_detector)
+        self.adb = adb
+        self.bit_rate = bit_rate
+        self.record_size = record_size
+        self.max_reconnects = max_reconnects
+        self.reconnect_delay = reconnect_delay
+        self.read_size = read_size
+
+        self._proc = None
+        self._codec = None
+        self._flushed = False
+        self._pending: deque = deque()
+        self._closed = False
+
+        # 統計
+        self.decoded_frames = 0
+        self.dropped_frames = 0
+        self.decode_errors = 0
+        self.reconnects = 0
+        self.decode_latencies: deque = deque(maxlen=300)
+
+        self._open()
+
+    def _open(self):
+        """開啟 screenrecord 串流與新的解碼器"""
+        self._proc = self.adb.open_screenrecord(bit_rate=self.bit_rate, size=self.record_size)
+        if self._proc is None:
+            raise RuntimeError("無法開啟 screenrecord 串流")
+
+        self._codec = av.CodecContext.create('h264', 'r')
+        self._flushed = False
+        # 不等待後續影格，解出一幀就立即輸出
+        self._codec.options = {'flags': 'low_delay'}
+
+    def _reconnect(self):
+        """串流中斷（screenrecord 時間上限或斷線）後重新連線"""
+        self._stop_process()
+        if self._closed:
+            raise EOFError("串流已關閉")
+        if self.max_reconnects is not None and self.reconnects >= self.max_reconnects:
+            raise EOFError(f"screenrecord 串流已結束（已重新連線 {self.reconnects} 次）")
+
+        self.reconnects += 1
+        time.sleep(self.reconnect_delay)
+        self._open()
+
+    def _decode(self, data: Optional[bytes], read_time: float):
+        """解碼一段串流資料，結果放入待處理佇列（data 為 None 時清空解碼器）"""
+        try:
+            if data is not None:
+                packets = self._codec.parse(data)
+            else:
+                # 清空 parser 保留的最後一個封包，再以 None 清空解碼器
+                packets = list(self._codec.parse(None)) + [None]
+            for packet in packets:
+                for frame in self._codec.decode(packet):
+                    self._pending.append(frame.to_ndarray(format='bgr24'))
+                    self.decoded_frames += 1
+                    self.decode_latencies.append(time.perf_counter() - read_time)
+        except av.error.FFmpegError:
+            # 損毀的封包只影響該幀，繼續解碼後續資料
+            self.decode_errors += 1
+            self.dropped_frames += 1
+
+    def _grab(self, pool: Optional[Dict[str, np.ndarray]]) -> Tuple[np.ndarray, str]:
+        """
+        讀取串流直到解出至少一幀，只回傳最新的一幀
+
+        Returns:
+            (BGR 影像, 'BGR')
+        """
+        while not self._pending:
+            proc = self._proc
+            if self._closed or proc is None:
+                raise EOFError("串流已關閉")
+
+            data = proc.stdout.read(self.read_size)
+            if data:
+                self._decode(data, time.perf_counter())
+            else:
+                # 串流結束：先取出解碼器中剩餘的影格再重新連線
+                if not self._flushed:
+                    self._flushed = True
+                    self._decode(None, time.perf_counter())
+                if not self._pending:
+                    self._reconnect()
+
+        # 解碼落後時丟棄較舊的影格，只保留最新畫面
+        frame = self._pending.pop()
+        self.dropped_frames += len(self._pending)
+        self._pending.clear()
+        return frame, 'BGR'
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        取得串流統計
+
+        Returns:
+            {"decoded_frames", "dropped_frames", "decode_errors", "reconnects",
+             "decode_latency_avg", "decode_latency_max"}（延遲單位為秒）
+        """
+        latencies = list(self.decode_latencies)
+        return {
+            "decoded_frames": self.decoded_frames,
+            "dropped_frames": self.dropped_frames,
+            "decode_errors": self.decode_errors,
+            "reconnects": self.reconnects,
+            "decode_latency_avg": float(np.mean(latencies)) if latencies else 0.0,
+            "decode_latency_max": float(np.max(latencies)) if latencies else 0.0,
+        }
+
+    def _stop_process(self):
+        """終止 screenrecord 程序"""
+        proc = self._proc
+        self._proc = None
+        if proc is not None:
+            proc.kill()
+            proc.stdout.close()
+            proc.wait()
+
+    def close(self):
+        """關閉串流"""
+        self._closed = True
+        self._stop_process()
+
+
+class ADBStreamCapture(ThreadedCapture):
+    """ADB screenrecord 串流擷取類別（最新影格 API 與 ThreadedCapture 相同）"""
+
+    def __init__(
+        self,
+        adb: Any,
+        resize: Optional[Tuple[int, int]] = None,
+        ring_size: int = 4,
+        change_detector: Optional[ChangeDetector] = None,
+        start_timeout: float = 10.0,
+        **stream_kwargs
+    ):
+        """
+        初始化 ADB 串流擷取器
+
+        Args:
+            adb: ADBController
+            resize: 調整大小 (width, height)，None 表示不調整
+            ring_size: 環形緩衝區大小
+            change_detector: 畫面變化偵測器
+            start_timeout: 等待串流開啟的最長時間（秒）
+            **stream_kwargs: 傳給 H264StreamSource 的參數（bit_rate, max_reconnects...）
+        """
+        super().__init__(
+            lambda: H264StreamSource(
+                adb, resize=resize, change_detector=change_detector, **stream_kwargs
+            ),
+            ring_size=ring_size,
+            start_timeout=start_timeout
+        )
+
+    def get_stats(self) -> Dict[str, float]:
+        """取得串流統計（解碼延遲、丟棄影格、重新連線次數）"""
+        source = self._source
+        return source.get_stats() if source is not None else {}
+
+    def close(self, timeout: float = 2.0):
+        """停止串流與背景執行緒"""
+        self._stop_event.set()
+        # 先關閉串流，讓阻塞中的讀取立即結束
+        source = self._source
+        if source is not None:
+            source.close()
+        super().close(timeout)
+
+    def __repr__(self) -> str:
+        return f"ADBStreamCapture(ring={self.ring}, stats={self.get_stats()})"
@@ -0,0 +1,365 @@
+"""
+擷取來源基底模組
+
+提供影格排程、影格封包、變化偵測與記憶體統計等共用邏輯，
+各擷取後端只需實作 _grab()。
+"""
+
+import time
+from typing import Tuple, Optional, Dict, List, Iterable
+
+import numpy as np
+
+from .frame_packet import FramePacket
+from .change_detector import ChangeDetector
+from .frame_scheduler import FrameScheduler
+from profiling import tracer
+
+
+Rect = Tuple[int, int, int, int]
+
+
+class BaseCapture:
+    """擷取來源基底類別"""
+
+    # 後端是否能只擷取畫面的一部分（否則子區域由完整影格裁切）
+    supports_region_grab = False
+
+    def __init__(
+        self,
+        resize: Optional[Tuple[int, int]] = None,
+        fps_limit: Optional[int] = 60,
+        zero_copy: bool = False,
+        change_detector: Optional[ChangeDetector] = None
+    ):
+        """
+        初始化擷取來源
+
+        Args:
+            resize: 調整大小 (width, height)，None 表示不調整
+            fps_limit: FPS 限制（None 或 0 表示不限制）
+            zero_copy: 零複製模式。原始影像、色彩轉換與縮放寫入重複使用的緩衝區。
+                注意：回傳的影像會在下一次 capture 時被覆寫，需保留請自行 copy()
+            change_detector: 畫面變化偵測器，每次擷取後以新影格更新
+        """
+        self.resize = resize
+        self.fps_limit = fps_limit
+        self.zero_copy = zero_copy
+        self.change_detector = change_detector
+
+        # 零複製模式的緩衝區池（只配置一次，之後重複使用）
+        self._pool: Dict[str, np.ndarray] = {}
+
+        # 影格序號與最後一個封包
+        self.seq = 0
+        self._last_packet: Optional[FramePacket] = None
+
+        # 記憶體配置統計（本模組配置的像素緩衝區大小，不含第三方函式庫內部緩衝區）
+        self._retired_alloc_bytes = 0
+
+        # FPS 控制與計時統計（單調時鐘、截止時間排程）
+        self.scheduler = FrameScheduler(fps_limit)
+
+        # 具名子區域 (x, y, w, h)，輸出影格座標
+        self.rois: Dict[str, Rect] = {}
+        self._roi_pools: Dict[str, Dict[str, np.ndarray]] = {}
+        self._roi_plans: Dict[Tuple[str, ...], List[Tuple[Rect, List[str]]]] = {}
+        # 單次區域擷取的固定成本（以像素數估計），用來決定合併擷取或分開擷取
+        self.roi_grab_overhead = 100_000
+
+    def _grab(self, pool: Optional[Dict[str, np.ndarray]]) -> Tuple[np.ndarray, str]:
+        """
+        擷取一幀原始影像（由子類別實作）
+
+        Args:
+            pool: 緩衝區池，後端可將原始影像讀入池中重複使用的緩衝區
+
+        Returns:
+            (原始影像, 影像格式 'BGRA' / 'RGBA' / 'BGR' / 'RGB')
+        """
+        raise NotImplementedError
+
+    @tracer.traced('capture')
+    def capture_packet(self, pool: Optional[Dict[str, np.ndarray]] = None) -> FramePacket:
+        """
+        擷取一幀並返回影格封包
+
+        灰階、RGB 等衍生影像在第一次存取時才由原始影像直接轉換。
+
+        Args:
+            pool: 指定緩衝區池（None 表示零複製模式使用內建池，否則每幀配置）
+
+        Returns:
+            FramePacket
+        """
+        # FPS 限制
+        with tracer.span('capture.wait'):
+            self.scheduler.wait()
+        start = time.perf_counter()
+
+        if pool is None and self.zero_copy:
+            pool = self._pool
+
+        with tracer.span('capture.grab'):
+            source, source_format = self._grab(pool)
+
+        self.seq += 1
+        if self._last_packet is not None:
+            self._retired_alloc_bytes += self._last_packet.alloc_bytes
+        packet = FramePacket(
+            source,
+            seq=self.seq,
+            timestamp=time.monotonic(),
+            source_format=source_format,
+            size=self.resize,
+            pool=pool
+        )
+        self._last_packet = packet
+
+        if self.change_detector is not None:
+            with tracer.span('capture.change_detect'):
+                self.change_detector.update(packet, packet.seq)
+
+        self.scheduler.record_capture(time.perf_counter() - start)
+        return packet
+
+    def add_roi(self, name: str, rect: Rect):
+        """
+        註冊具名子區域
+
+        Args:
+            name: 子區域名稱
+            rect: (x, y, w, h)，輸出影格座標（設定 resize 時為縮放後的座標）
+        """
+        self.rois[name] = self._check_rect(rect)
+        self._roi_plans.clear()
+
+    def remove_roi(self, name: str):
+        """移除具名子區域"""
+        self.rois.pop(name, None)
+        self._roi_pools.pop(name, None)
+        self._roi_plans.clear()
+
+    @staticmethod
+    def _check_rect(rect: Rect) -> Rect:
+        """檢查並正規化子區域"""
+        x, y, w, h = (int(v) for v in rect)
+        if x < 0 or y < 0 or w <= 0 or h <= 0:
+            raise ValueError(f"無效的子區域: {rect}")
+        return (x, y, w, h)
+
+    def _roi_pool(self, name: str) -> Optional[Dict[str, np.ndarray]]:
+        """子區域的輸出緩衝區池（僅零複製模式）"""
+        if not self.zero_copy:
+            return None
+        return self._roi_pools.setdefault(name, {})
+
+    def capture_rois(self, names: Optional[Iterable[str]] = None) -> Dict[str, FramePacket]:
+        """
+        只擷取具名子區域
+
+        後端支援區域擷取時，依成本選擇擷取所有子區域的聯集或分別擷取；
+        否則擷取完整影格後以 view 裁切。
+
+        Args:
+            names: 子區域名稱，None 表示全部
+
+        Returns:
+            {名稱: FramePacket}，各封包的 offset 為子區域在影格中的位置，
+            匹配結果加上 offset 即為影格座標
+        """
+        names = list(self.rois) if names is None else list(names)
+        for name in names:
+            if name not in self.rois:
+                raise KeyError(f"子區域不存在: {name}")
+
+        if not self.supports_region_grab:
+            packet = self.capture_packet()
+            return {
+                name: packet.crop(self.rois[name], roi=name, pool=self._roi_pool(name))
+                for name in names
+            }
+
+        with tracer.span('capture.wait'):
+            self.scheduler.wait()
+        start = time.perf_counter()
+
+        frame_width, frame_height = self.resize or self._source_size()
+        self.seq += 1
+        timestamp = time.monotonic()
+        packets = {}
+        for group, members in self.plan_roi_grabs(names):
+            with tracer.span('capture.grab_rect'):
+                image, source_format = self._grab_rect(group)
+            for name in members:
+                x, y, w, h = self.rois[name]
+                sx, sy, sw, sh = self._to_source_rect(self.rois[name])
+                sx, sy = sx - group[0], sy - group[1]
+                # 設定 resize 時，子區域縮放為輸出影格座標的大小
+                size = None
+                if self.resize is not None:
+                    size = (max(1, min(w, frame_width - x)), max(1, min(h, frame_height - y)))
+                packets[name] = FramePacket(
+                    image[sy:sy + sh, sx:sx + sw],
+                    seq=self.seq,
+                    timestamp=timestamp,
+                    source_format=source_format,
+                    size=size,
+                    pool=self._roi_pool(name),
+                    offset=(x, y),
+                    roi=name
+                )
+
+        self.scheduler.record_capture(time.perf_counter() - start)
+        return packets
+
+    def plan_roi_grabs(self, names: Iterable[str]) -> List[Tuple[Rect, List[str]]]:
+        """
+        決定子區域的擷取方式（結果依名稱組合快取）
+
+        聯集成本 = 聯集面積 + 一次固定成本；分開成本 = 各區域面積總和 + 每區域一次固定成本，
+        取較低者。
+
+        Args:
+            names: 子區域名稱
+
+        Returns:
+            [(原始影像座標的擷取區域, [子區域名稱, ...]), ...]
+        """
+        key = tuple(sorted(names))
+        plan = self._roi_plans.get(key)
+        if plan is not None:
+            return plan
+
+        rects = {name: self._to_source_rect(self.rois[name]) for name in key}
+        if not rects:
+            return []
+
+        left = min(r[0] for r in rects.values())
+        top = min(r[1] for r in rects.values())
+        right = max(r[0] + r[2] for r in rects.values())
+        bottom = max(r[1] + r[3] for r in rects.values())
+        union = (left, top, right - left, bottom - top)
+
+        union_cost = union[2] * union[3] + self.roi_grab_overhead
+        separate_cost = sum(r[2] * r[3] + self.roi_grab_overhead for r in rects.values())
+
+        if separate_cost < union_cost:
+            plan = [(rect, [name]) for name, rect in rects.items()]
+        else:
+            plan = [(union, list(key))]
+        self._roi_plans[key] = plan
+        return plan
+
+    def _source_size(self) -> Tuple[int, int]:
+        """原始影像大小 (width, height)（支援區域擷取的後端實作）"""
+        raise NotImplementedError
+
+    def _roi_scale(self) -> Tuple[float, float]:
+        """原始影像相對於輸出影格的縮放比例"""
+        if self.resize is None:
+            return 1.0, 1.0
+        width, height = self._source_size()
+        return width / self.resize[0], height / self.resize[1]
+
+    def _to_source_rect(self, rect: Rect) -> Rect:
+        """將輸出影格座標的子區域換算為原始影像座標（裁切在畫面範圍內）"""
+        scale_x, scale_y = self._roi_scale()
+        width, height = self._source_size()
+        x, y, w, h = rect
+        left = min(int(round(x * scale_x)), width - 1)
+        top = min(int(round(y * scale_y)), height - 1)
+        right = min(int(round((x + w) * scale_x)), width)
+        bottom = min(int(round((y + h) * scale_y)), height)
+        return (left, top, max(1, right - left), max(1, bottom - top))
+
+    def _grab_rect(self, rect: Rect) -> Tuple[np.ndarray, str]:
+        """
+        擷取原始影像的一部分（支援區域擷取的後端實作）
+
+        Args:
+            rect: (x, y, w, h)，原始影像座標
+
+        Returns:
+            (原始影像, 影像格式)
+        """
+        raise NotImplementedError
+
+    def capture(self) -> np.ndarray:
+        """
+        擷取一幀並返回 numpy array
+
+        Returns:
+            BGR 格式的圖像 (numpy array)
+        """
+        return self.capture_packet().bgr
+
+    def capture_rgb(self) -> np.ndarray:
+        """
+        擷取一幀並返回 RGB 格式（由原始影像單次轉換）
+
+        Returns:
+            RGB 格式的圖像 (numpy array)
+        """
+        return self.capture_packet().rgb
+
+    def get_fps(self) -> int:
+        """取得當前 FPS（最近影格間隔的平均）"""
+        return int(round(self.scheduler.fps))
+
+    def get_timing_stats(self) -> Dict[str, object]:
+        """
+        取得影格間隔與擷取耗時統計
+
+        Returns:
+            FrameScheduler.get_stats() 的結果（含 p50 / p95 / p99）
+        """
+        return self.scheduler.get_stats()
+
+    def get_alloc_stats(self) -> Dict[str, float]:
+        """
+        取得記憶體配置統計
+
+        Returns:
+            {"last_frame_bytes", "total_bytes", "avg_frame_bytes", "frames"}
+        """
+        last = self._last_packet.alloc_bytes if self._last_packet is not None else 0
+        total = self._retired_alloc_bytes + last
+        avg = total / self.seq if self.seq else 0.0
+        return {
+            "last_frame_bytes": last,
+            "total_bytes": total,
+            "avg_frame_bytes": avg,
+            "frames": self.seq,
+        }
+
+    def _pooled_buffer(
+        self,
+        pool: Optional[Dict[str, np.ndarray]],
+        key: str,
+        shape: Tuple[int, ...]
+    ) -> np.ndarray:
+        """
+        取得原始影像緩衝區（有緩衝區池時重複使用）
+
+        配置的大小計入累計記憶體統計。
+        """
+        if pool is not None:
+            buffer = pool.get(key)
+            if buffer is not None and buffer.shape == shape:
+                return buffer
+        buffer = np.empty(shape, dtype=np.uint8)
+        self._retired_alloc_bytes += buffer.nbytes
+        if pool is not None:
+            pool[key] = buffer
+        return buffer
+
+    def close(self):
+        """關閉擷取器"""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
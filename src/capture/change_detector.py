@@ -0,0 +1,184 @@
+"""
+畫面變化偵測模組
+
+為每一幀計算低解析度的區塊指紋，記錄每個區塊最後一次變化的影格序號，
+讓呼叫端可以查詢「自序號 N 之後，整個畫面或某個矩形內是否有變化」。
+"""
+
+from typing import Optional, Tuple, Any
+
+import cv2
+import numpy as np
+
+
+class ChangeDetector:
+    """區塊式畫面變化偵測器"""
+
+    def __init__(
+        self,
+        tile_size: int = 32,
+        cell_size: int = 8,
+        threshold: float = 4.0
+    ):
+        """
+        初始化變化偵測器
+
+        每個區塊 (tile) 由數個縮小取樣的小格 (cell) 組成，
+        任一小格的平均灰階與參考值差異超過閾值即視為該區塊變化。
+
+        Args:
+            tile_size: 區塊大小（像素），查詢矩形的最小解析度
+            cell_size: 小格大小（像素），必須整除 tile_size
+            threshold: 小格平均灰階差異閾值（0-255）
+        """
+        if tile_size % cell_size != 0:
+            raise ValueError(f"cell_size ({cell_size}) 必須整除 tile_size ({tile_size})")
+
+        self.tile_size = tile_size
+        self.cell_size = cell_size
+        self.cells_per_tile = tile_size // cell_size
+        self.threshold = threshold
+
+        self._frame_shape: Optional[Tuple[int, int]] = None
+        self._grid: Tuple[int, int] = (0, 0)  # (列數, 行數)
+        self._reference: Optional[np.ndarray] = None
+        self._small: Optional[np.ndarray] = None
+        self._diff: Optional[np.ndarray] = None
+
+        # 每個區塊最後一次變化的影格序號
+        self.last_change: Optional[np.ndarray] = None
+        # 最近一次 update 中變化的區塊
+        self.changed_tiles: Optional[np.ndarray] = None
+        self.last_seq = 0
+
+        # 統計
+        self.frames = 0
+        self.changed_frames = 0
+
+    def _reset(self, shape: Tuple[int, int], seq: int):
+        """依畫面尺寸重新配置指紋緩衝區"""
+        height, width = shape
+        rows = -(-height // self.tile_size)
+        cols = -(-width // self.tile_size)
+        k = self.cells_per_tile
+
+        self._frame_shape = shape
+        self._grid = (rows, cols)
+        self._reference = np.zeros((rows * k, cols * k), dtype=np.uint8)
+        self._small = np.empty_like(self._reference)
+        self._diff = np.empty_like(self._reference)
+        self.last_change = np.full((rows, cols), seq, dtype=np.int64)
+        self.changed_tiles = np.ones((rows, cols), dtype=bool)
+
+    def update(self, frame: Any, seq: int) -> bool:
+        """
+        以新影格更新指紋
+
+        Args:
+            frame: FramePacket、BGR 影像或灰階影像
+            seq: 影格序號（必須遞增）
+
+        Returns:
+            本幀是否有任何區塊變化
+        """
+        gray = getattr(frame, 'gray', None)
+        if gray is None:
+            gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        self.frames += 1
+        first = self._frame_shape != gray.shape[:2]
+        if first:
+            self._reset(gray.shape[:2], seq)
+
+        rows, cols = self._grid
+        k = self.cells_per_tile
+
+        # 縮小取樣：每個小格為原圖對應區域的平均值
+        cv2.resize(gray, (cols * k, rows * k), dst=self._small, interpolation=cv2.INTER_AREA)
+
+        if first:
+            self._reference[...] = self._small
+            self.last_seq = seq
+            self.changed_frames += 1
+            return True
+
+        # 每個區塊取小格差異的最大值
+        cv2.absdiff(self._small, self._reference, dst=self._diff)
+        tile_diff = self._diff.reshape(rows, k, cols, k).max(axis=(1, 3))
+        changed = tile_diff > self.threshold
+        self.changed_tiles = changed
+        self.last_seq = seq
+
+        if not changed.any():
+            return False
+
+        # 只更新變化區塊的參考值，緩慢漂移仍會累積到超過閾值
+        self.last_change[changed] = seq
+        np.copyto(
+            self._reference.reshape(rows, k, cols, k),
+            self._small.reshape(rows, k, cols, k),
+            where=changed[:, None, :, None]
+        )
+        self.changed_frames += 1
+        return True
+
+    def _tile_range(self, rect: Tuple[int, int, int, int]) -> Tuple[slice, slice]:
+        """將像素矩形 (x, y, w, h) 轉換為區塊範圍"""
+        x, y, w, h = rect
+        height, width = self._frame_shape
+        rows, cols = self._grid
+        # 縮小取樣會把畫面均勻分成 rows x cols 個區塊
+        tile_w = width / cols
+        tile_h = height / rows
+        col0 = max(0, int(x // tile_w))
+        row0 = max(0, int(y // tile_h))
+        col1 = min(cols, int(np.ceil((x + w) / tile_w)))
+        row1 = min(rows, int(np.ceil((y + h) / tile_h)))
+        return slice(row0, max(row1, row0 + 1)), slice(col0, max(col1, col0 + 1))
+
+    def changed_since(
+        self,
+        seq: int,
+        rect: Optional[Tuple[int, int, int, int]] = None
+    ) -> bool:
+        """
+        查詢自序號 seq 之後是否有變化
+
+        Args:
+            seq: 上次處理的影格序號
+            rect: 查詢矩形 (x, y, w, h)，None 表示整個畫面
+
+        Returns:
+            是否有變化（尚未有任何影格時回傳 True）
+        """
+        if self.last_change is None or seq < 0 or seq > self.last_seq:
+            return True
+
+        if rect is None:
+            tiles = self.last_change
+        else:
+            rows, cols = self._tile_range(rect)
+            tiles = self.last_change[rows, cols]
+
+        return bool(tiles.size == 0 or tiles.max() > seq)
+
+    def get_stats(self) -> dict:
+        """
+        取得統計
+
+        Returns:
+            {"frames", "changed_frames", "static_ratio"}
+        """
+        static = 1.0 - self.changed_frames / self.frames if self.frames else 0.0
+        return {
+            "frames": self.frames,
+            "changed_frames": self.changed_frames,
+            "static_ratio": static,
+        }
+
+    def __repr__(self) -> str:
+        rows, cols = self._grid
+        return (
+            f"ChangeDetector(tile={self.tile_size}, grid={cols}x{rows}, "
+            f"threshold={self.threshold})"
+        )
@@ -0,0 +1,364 @@
+"""
+共享記憶體影格匯流排
+
+發布者將影格寫入 multiprocessing.shared_memory 的環形緩衝區，
+其他行程的訂閱者直接映射同一塊記憶體讀取，不需 pickle 也不受 GIL 限制。
+
+每個槽位以 seqlock 保護：寫入前後各將鎖計數加一（寫入中為奇數），
+讀取者確認鎖計數為偶數且槽位序號不變，即可確定讀到的是完整影格。
+
+記憶體配置：
+    標頭   uint64 x 8  [magic, 槽位數, 寬, 高, 通道數, 最新序號, 保留, 保留]
+    槽位   uint64 x 8  [鎖計數, 影格序號, 時間戳記 (float64), 保留...] + BGR 像素
+
+使用方式：
+    # 擷取行程
+    publisher = FrameBusPublisher((545, 970))
+    while True:
+        publisher.publish(capturer.capture_packet())
+
+    # 其他行程
+    subscriber = FrameBusSubscriber(publisher.name)
+    packet = subscriber.capture_packet()
+    result = matcher.match(packet, 'button_start')
+    if not subscriber.valid(packet):
+        ...  # 匹配期間槽位已被覆寫，捨棄結果
+"""
+
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple, Any
+
+import numpy as np
+
+from .frame_packet import FramePacket
+
+
+_MAGIC = 0x53554246  # 'FBUS'
+_HEADER_WORDS = 8
+_SLOT_META_WORDS = 8
+_ALIGN = 64
+
+# 標頭欄位索引
+_H_MAGIC, _H_SLOTS, _H_WIDTH, _H_HEIGHT, _H_CHANNELS, _H_LATEST = range(6)
+# 槽位欄位索引
+_S_LOCK, _S_SEQ, _S_TIMESTAMP = range(3)
+
+
+def _slot_stride(width: int, height: int, channels: int) -> int:
+    """單一槽位的大小（位元組，對齊到 64）"""
+    size = _SLOT_META_WORDS * 8 + width * height * channels
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def _close_shm(shm: shared_memory.SharedMemory):
+    """關閉共享記憶體映射（仍有影格 view 在使用時，映射隨 view 釋放）"""
+    try:
+        shm.close()
+    except BufferError:
+        pass
+
+
+class _FrameBusLayout:
+    """共享記憶體上的標頭與槽位 view"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, width: int, height: int, channels: int):
+        self.shm = shm
+        self.slots = slots
+        self.width = width
+        self.height = height
+        self.channels = channels
+
+        buf = shm.buf
+        self.header = np.ndarray((_HEADER_WORDS,), dtype=np.uint64, buffer=buf)
+        stride = _slot_stride(width, height, channels)
+        base = _ALIGN
+        self.meta = []
+        self.timestamps = []
+        self.pixels = []
+        for index in range(slots):
+            offset = base + index * stride
+            self.meta.append(np.ndarray((_SLOT_META_WORDS,), dtype=np.uint64, buffer=buf, offset=offset))
+            self.timestamps.append(
+                np.ndarray((1,), dtype=np.float64, buffer=buf, offset=offset + _S_TIMESTAMP * 8)
+            )
+            self.pixels.append(np.ndarray(
+                (height, width, channels), dtype=np.uint8, buffer=buf,
+                offset=offset + _SLOT_META_WORDS * 8
+            ))
+
+    @staticmethod
+    def nbytes(slots: int, width: int, height: int, channels: int) -> int:
+        return _ALIGN + slots * _slot_stride(width, height, channels)
+
+    def release(self):
+        """釋放所有 view（關閉共享記憶體前必須釋放）"""
+        self.header = None
+        self.meta = []
+        self.timestamps = []
+        self.pixels = []
+
+
+class FrameBusPublisher:
+    """共享記憶體影格發布者"""
+
+    def __init__(
+        self,
+        size: Tuple[int, int],
+        slots: int = 8,
+        name: Optional[str] = None
+    ):
+        """
+        建立共享記憶體環形緩衝區
+
+        Args:
+            size: 影格大小 (width, height)
+            slots: 槽位數。訂閱者持有的零複製影格在之後 slots - 1 個新影格內不會被覆寫
+            name: 共享記憶體名稱，None 表示自動產生
+        """
+        width, height = size
+        channels = 3  # BGR
+        nbytes = _FrameBusLayout.nbytes(slots, width, height, channels)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=nbytes)
+        self.name = self.shm.name
+        self.layout = _FrameBusLayout(self.shm, slots, width, height, channels)
+
+        header = self.layout.header
+        header[:] = 0
+        header[_H_MAGIC] = _MAGIC
+        header[_H_SLOTS] = slots
+        header[_H_WIDTH] = width
+        header[_H_HEIGHT] = height
+        header[_H_CHANNELS] = channels
+
+        self.seq = 0
+        self.frames_published = 0
+        self._closed = False
+
+        print(f"✅ 影格匯流排已建立: {self.name} ({width}x{height}x{channels}, {slots} 槽位)")
+
+    def publish(
+        self,
+        frame: Any,
+        seq: Optional[int] = None,
+        timestamp: Optional[float] = None
+    ) -> int:
+        """
+        發布一幀
+
+        Args:
+            frame: FramePacket 或 BGR 影像（大小需與匯流排相同）
+            seq: 影格序號（None 表示使用封包序號或自動遞增，必須遞增）
+            timestamp: 擷取時間（None 表示使用封包時間戳記或目前時間）
+
+        Returns:
+            發布的影格序號
+        """
+        layout = self.layout
+        image = getattr(frame, 'bgr', frame)
+        if image.shape != (layout.height, layout.width, layout.channels):
+            raise ValueError(
+                f"影格大小 {image.shape} 與匯流排 "
+                f"{(layout.height, layout.width, layout.channels)} 不符"
+            )
+
+        if seq is None:
+            seq = getattr(frame, 'seq', None) or self.seq + 1
+        if seq <= self.seq:
+            raise ValueError(f"影格序號必須遞增: {seq} <= {self.seq}")
+        if timestamp is None:
+            timestamp = getattr(frame, 'timestamp', None)
+            if timestamp is None:
+                timestamp = time.monotonic()
+
+        slot = seq % layout.slots
+        meta = layout.meta[slot]
+
+        meta[_S_LOCK] += 1  # 奇數：寫入中
+        meta[_S_SEQ] = seq
+        layout.timestamps[slot][0] = timestamp
+        np.copyto(layout.pixels[slot], image)
+        meta[_S_LOCK] += 1  # 偶數：完成
+
+        layout.header[_H_LATEST] = seq
+        self.seq = seq
+        self.frames_published += 1
+        return seq
+
+    def close(self, unlink: bool = True):
+        """
+        關閉匯流排
+
+        Args:
+            unlink: 是否刪除共享記憶體（發布者結束時應刪除）
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.layout.release()
+        _close_shm(self.shm)
+        if unlink:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"FrameBusPublisher(name={self.name}, seq={self.seq})"
+
+
+class FrameBusSubscriber:
+    """共享記憶體影格訂閱者（可在其他行程使用）"""
+
+    def __init__(self, name: str, poll_interval: float = 0.0005):
+        """
+        連接既有的影格匯流排
+
+        Args:
+            name: 發布者的共享記憶體名稱（FrameBusPublisher.name）
+            poll_interval: 等待新影格時的輪詢間隔（秒）
+        """
+        if sys.version_info >= (3, 13):
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # 3.13 以前訂閱者結束時 resource_tracker 會刪除共享記憶體，需取消追蹤
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+        header = np.ndarray((_HEADER_WORDS,), dtype=np.uint64, buffer=self.shm.buf)
+        if int(header[_H_MAGIC]) != _MAGIC:
+            del header
+            self.shm.close()
+            raise ValueError(f"不是影格匯流排: {name}")
+
+        slots, width, height, channels = (
+            int(header[_H_SLOTS]), int(header[_H_WIDTH]),
+            int(header[_H_HEIGHT]), int(header[_H_CHANNELS])
+        )
+        del header
+        self.name = name
+        self.layout = _FrameBusLayout(self.shm, slots, width, height, channels)
+        self.poll_interval = poll_interval
+
+        self._last_seq = 0
+        self.retries = 0  # 讀取時遇到寫入中而重試的次數
+
+    @property
+    def latest_seq(self) -> int:
+        """最新發布的影格序號（尚無影格時為 0）"""
+        return int(self.layout.header[_H_LATEST])
+
+    def _read(self, seq: int, copy: bool) -> Optional[FramePacket]:
+        """讀取指定序號的影格（已被覆寫時回傳 None）"""
+        layout = self.layout
+        slot = seq % layout.slots
+        meta = layout.meta[slot]
+
+        while True:
+            lock = int(meta[_S_LOCK])
+            if lock & 1:
+                # 寫入中
+                self.retries += 1
+                time.sleep(0)
+                continue
+
+            if int(meta[_S_SEQ]) != seq:
+                return None
+            timestamp = float(layout.timestamps[slot][0])
+            image = layout.pixels[slot].copy() if copy else layout.pixels[slot]
+
+            if int(meta[_S_LOCK]) == lock:
+                break
+            self.retries += 1
+
+        if not copy:
+            image = image.view()
+            image.flags.writeable = False
+        return FramePacket(image, seq=seq, timestamp=timestamp, source_format='BGR')
+
+    def latest(self, copy: bool = False) -> Optional[FramePacket]:
+        """
+        取得最新影格（不阻塞）
+
+        Args:
+            copy: 是否複製像素。False 時回傳共享記憶體的唯讀 view，
+                使用完畢後以 valid() 確認期間沒有被覆寫
+
+        Returns:
+            FramePacket，尚無影格時回傳 None
+        """
+        while True:
+            seq = self.latest_seq
+            if seq == 0:
+                return None
+            frame = self._read(seq, copy)
+            if frame is not None:
+                return frame
+
+    def wait_next(
+        self,
+        after_seq: int = 0,
+        timeout: Optional[float] = None,
+        copy: bool = False
+    ) -> Optional[FramePacket]:
+        """
+        等待序號大於 after_seq 的新影格（回傳最新的一幀）
+
+        Returns:
+            FramePacket，逾時回傳 None
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.latest_seq <= after_seq:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+        return self.latest(copy)
+
+    def capture_packet(self, timeout: Optional[float] = 5.0, copy: bool = False) -> FramePacket:
+        """
+        取得尚未經由 capture() / capture_packet() 回傳過的最新影格
+
+        Returns:
+            FramePacket
+        """
+        frame = self.wait_next(self._last_seq, timeout, copy)
+        if frame is None:
+            raise TimeoutError("等待新影格逾時")
+        self._last_seq = frame.seq
+        return frame
+
+    def capture(self, timeout: Optional[float] = 5.0) -> np.ndarray:
+        """取得最新影像（BGR，已複製，與 ScreenCapture.capture 相容）"""
+        return self.capture_packet(timeout, copy=True).bgr
+
+    def valid(self, frame: FramePacket) -> bool:
+        """
+        確認零複製影格沒有被覆寫（處理完畢後呼叫，False 表示結果不可信）
+
+        Args:
+            frame: latest() / wait_next() / capture_packet() 回傳的影格
+
+        Returns:
+            影格內容是否仍然完整
+        """
+        meta = self.layout.meta[frame.seq % self.layout.slots]
+        return int(meta[_S_LOCK]) & 1 == 0 and int(meta[_S_SEQ]) == frame.seq
+
+    def close(self):
+        """中斷連接（不刪除共享記憶體）"""
+        self.layout.release()
+        _close_shm(self.shm)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"FrameBusSubscriber(name={self.name}, latest={self.latest_seq})"
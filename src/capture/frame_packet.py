@@ -0,0 +1,240 @@
+"""
+影格封包模組
+
+封裝一次擷取的原始影像，灰階、RGB、縮放與金字塔等衍生影像
+只在第一次存取時計算一次，並盡量直接由 BGRA 原始影像轉換。
+"""
+
+from typing import Optional, Tuple, Dict, List
+
+import cv2
+import numpy as np
+
+from profiling import tracer
+
+
+# 原始格式 -> (BGR, GRAY, RGB) 轉換代碼，None 表示不需轉換
+_CONVERSIONS = {
+    'BGRA': (cv2.COLOR_BGRA2BGR, cv2.COLOR_BGRA2GRAY, cv2.COLOR_BGRA2RGB),
+    'RGBA': (cv2.COLOR_RGBA2BGR, cv2.COLOR_RGBA2GRAY, cv2.COLOR_RGBA2RGB),
+    'BGR': (None, cv2.COLOR_BGR2GRAY, cv2.COLOR_BGR2RGB),
+    'RGB': (cv2.COLOR_RGB2BGR, cv2.COLOR_RGB2GRAY, None),
+}
+
+
+class FramePacket:
+    """帶有延遲快取衍生影像的影格"""
+
+    def __init__(
+        self,
+        source: np.ndarray,
+        seq: int = 0,
+        timestamp: float = 0.0,
+        source_format: str = 'BGRA',
+        size: Optional[Tuple[int, int]] = None,
+        pool: Optional[Dict[str, np.ndarray]] = None,
+        offset: Tuple[int, int] = (0, 0),
+        roi: Optional[str] = None,
+        stream: Optional[str] = None
+    ):
+        """
+        初始化影格封包
+
+        Args:
+            source: 原始影像（可為唯讀 view）
+            seq: 影格序號
+            timestamp: 擷取時間（time.monotonic()）
+            source_format: 原始影像格式 'BGRA' / 'RGBA' / 'BGR' / 'RGB'
+            size: 輸出大小 (width, height)，None 表示維持原始大小
+            pool: 輸出緩衝區池。提供時衍生影像寫入池中重複使用的緩衝區，
+                下一個使用同一個池的封包會覆寫這些影像
+            offset: 影像左上角在完整畫面中的位置 (x, y)，子區域封包用來換算畫面座標
+            roi: 子區域名稱，None 表示完整畫面
+            stream: 影格來源名稱（例如多實例擷取的實例名稱），
+                區分來自同一次擷取、序號與擷取時間都相同的不同畫面
+        """
+        if source_format not in _CONVERSIONS:
+            raise ValueError(f"不支援的影像格式: {source_format}")
+
+        self.source = source
+        self.seq = seq
+        self.timestamp = timestamp
+        self.source_format = source_format
+        self.size = size
+        self.pool = pool
+        self.offset = offset
+        self.roi = roi
+        self.stream = stream
+
+        # 本封包配置的像素緩衝區大小（位元組）
+        self.alloc_bytes = 0
+
+        self._cache: Dict[object, np.ndarray] = {}
+        self._pyramid: List[np.ndarray] = []
+
+    def _output(self, key: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """取得輸出緩衝區（優先使用緩衝區池）"""
+        if self.pool is not None:
+            buffer = self.pool.get(key)
+            if buffer is not None and buffer.shape == shape:
+                return buffer
+        buffer = np.empty(shape, dtype=np.uint8)
+        self.alloc_bytes += buffer.nbytes
+        if self.pool is not None:
+            self.pool[key] = buffer
+        return buffer
+
+    def _base(self) -> np.ndarray:
+        """原始格式、輸出大小的影像"""
+        if self.size is None or (self.source.shape[1], self.source.shape[0]) == tuple(self.size):
+            return self.source
+        base = self._cache.get('base')
+        if base is None:
+            width, height = self.size
+            shape = (height, width) + self.source.shape[2:]
+            with tracer.span('frame.resize'):
+                base = cv2.resize(self.source, (width, height), dst=self._output('base', shape))
+            self._cache['base'] = base
+        return base
+
+    def _convert(self, key: str, index: int, channels: int) -> np.ndarray:
+        """由原始格式單次轉換為目標格式並快取"""
+        image = self._cache.get(key)
+        if image is not None:
+            return image
+
+        base = self._base()
+        code = _CONVERSIONS[self.source_format][index]
+        if code is None:
+            image = base
+        else:
+            shape = base.shape[:2] if channels == 1 else base.shape[:2] + (channels,)
+            with tracer.span('frame.convert', target=key):
+                image = cv2.cvtColor(base, code, dst=self._output(key, shape))
+        self._cache[key] = image
+        return image
+
+    @property
+    def bgr(self) -> np.ndarray:
+        """BGR 影像"""
+        return self._convert('bgr', 0, 3)
+
+    @property
+    def gray(self) -> np.ndarray:
+        """灰階影像"""
+        return self._convert('gray', 1, 1)
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """RGB 影像"""
+        return self._convert('rgb', 2, 3)
+
+    @property
+    def image(self) -> np.ndarray:
+        """BGR 影像（與 ScreenCapture.capture 的回傳值相同）"""
+        return self.bgr
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """BGR 影像的 shape"""
+        base = self._base()
+        return base.shape[:2] + (3,)
+
+    @property
+    def width(self) -> int:
+        return self._base().shape[1]
+
+    @property
+    def height(self) -> int:
+        return self._base().shape[0]
+
+    def resized(self, size: Tuple[int, int], gray: bool = False) -> np.ndarray:
+        """
+        取得縮放後的影像（每個大小只計算一次）
+
+        Args:
+            size: 目標大小 (width, height)
+            gray: 是否回傳灰階
+
+        Returns:
+            縮放後的影像
+        """
+        key = ('resized', tuple(size), gray)
+        image = self._cache.get(key)
+        if image is None:
+            src = self.gray if gray else self.bgr
+            if (src.shape[1], src.shape[0]) == tuple(size):
+                image = src
+            else:
+                width, height = size
+                shape = (height, width) + src.shape[2:]
+                pool_key = f"resized_{width}x{height}_{'gray' if gray else 'bgr'}"
+                image = cv2.resize(
+                    src, (width, height),
+                    dst=self._output(pool_key, shape),
+                    interpolation=cv2.INTER_AREA
+                )
+            self._cache[key] = image
+        return image
+
+    def crop(
+        self,
+        rect: Tuple[int, int, int, int],
+        roi: Optional[str] = None,
+        pool: Optional[Dict[str, np.ndarray]] = None
+    ) -> 'FramePacket':
+        """
+        取得子區域封包（直接 view 輸出大小的原始影像，不複製像素）
+
+        Args:
+            rect: 子區域 (x, y, w, h)，本封包的影像座標
+            roi: 子區域名稱
+            pool: 子區域衍生影像的緩衝區池
+
+        Returns:
+            FramePacket，offset 為子區域在完整畫面中的位置
+        """
+        x, y, w, h = rect
+        base = self._base()
+        return FramePacket(
+            base[y:y + h, x:x + w],
+            seq=self.seq,
+            timestamp=self.timestamp,
+            source_format=self.source_format,
+            pool=pool,
+            offset=(self.offset[0] + x, self.offset[1] + y),
+            roi=roi,
+            stream=self.stream
+        )
+
+    def pyramid(self, levels: int) -> List[np.ndarray]:
+        """
+        取得灰階影像金字塔（逐層 pyrDown，已計算的層級不重算）
+
+        Args:
+            levels: 層數（包含原始解析度的第 0 層）
+
+        Returns:
+            [第 0 層, 第 1 層, ...]，每層寬高約為前一層的一半
+        """
+        if not self._pyramid:
+            self._pyramid.append(self.gray)
+
+        while len(self._pyramid) < levels:
+            prev = self._pyramid[-1]
+            if min(prev.shape[:2]) < 2:
+                break
+            level = len(self._pyramid)
+            shape = ((prev.shape[0] + 1) // 2, (prev.shape[1] + 1) // 2)
+            self._pyramid.append(
+                cv2.pyrDown(prev, dst=self._output(f"pyramid_{level}", shape))
+            )
+
+        return self._pyramid[:levels]
+
+    def __repr__(self) -> str:
+        roi = f", roi={self.roi}@{self.offset}" if self.roi is not None else ""
+        return (
+            f"FramePacket(seq={self.seq}, size={self.width}x{self.height}, "
+            f"format={self.source_format}, cached={len(self._cache)}{roi})"
+        )
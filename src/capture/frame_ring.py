@@ -0,0 +1,105 @@
+"""
+影格環形緩衝區模組
+
+生產者執行緒寫入帶序號與時間戳記的影格，消費者可以不阻塞地取得最新影格，
+或等待下一個新影格。
+"""
+
+import threading
+from typing import Optional, List
+
+from .frame_packet import FramePacket
+
+
+class FrameRing:
+    """固定大小的最新影格環形緩衝區（執行緒安全）"""
+
+    def __init__(self, size: int = 4):
+        """
+        初始化環形緩衝區
+
+        Args:
+            size: 緩衝區可保留的影格數量
+        """
+        if size < 1:
+            raise ValueError(f"環形緩衝區大小必須 >= 1: {size}")
+
+        self.size = size
+        self._slots: List[Optional[FramePacket]] = [None] * size
+        self._latest: Optional[FramePacket] = None
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def publish(self, frame: FramePacket):
+        """
+        發布新影格並喚醒等待中的消費者
+
+        Args:
+            frame: 新影格（序號必須遞增）
+        """
+        with self._cond:
+            self._slots[frame.seq % self.size] = frame
+            self._latest = frame
+            self._cond.notify_all()
+
+    def latest(self) -> Optional[FramePacket]:
+        """
+        取得最新影格（不阻塞）
+
+        Returns:
+            最新影格，尚無影格時回傳 None
+        """
+        return self._latest
+
+    def get(self, seq: int) -> Optional[FramePacket]:
+        """
+        依序號取得仍留在緩衝區內的影格
+
+        Returns:
+            影格，已被覆寫或不存在時回傳 None
+        """
+        frame = self._slots[seq % self.size]
+        if frame is not None and frame.seq == seq:
+            return frame
+        return None
+
+    def wait_next(
+        self,
+        after_seq: int = 0,
+        timeout: Optional[float] = None
+    ) -> Optional[FramePacket]:
+        """
+        等待序號大於 after_seq 的影格
+
+        Args:
+            after_seq: 已處理過的最後序號
+            timeout: 最長等待時間（秒），None 表示無限等待
+
+        Returns:
+            最新影格，逾時或緩衝區關閉時回傳 None
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._closed or (
+                    self._latest is not None and self._latest.seq > after_seq
+                ),
+                timeout
+            )
+            latest = self._latest
+            if latest is not None and latest.seq > after_seq:
+                return latest
+            return None
+
+    def close(self):
+        """關閉緩衝區並喚醒所有等待中的消費者"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __repr__(self) -> str:
+        latest_seq = self._latest.seq if self._latest else 0
+        return f"FrameRing(size={self.size}, latest_seq={latest_seq})"
@@ -0,0 +1,140 @@
+"""
+影格排程模組
+
+以單調時鐘的截止時間排程擷取，不受系統時間調整影響，也不會累積漂移。
+睡眠超時會自動補償，落後時可跳過錯過的影格，並記錄影格間隔與擷取耗時的直方圖。
+"""
+
+import time
+from typing import Optional, Dict
+
+from profiling import TimingHistogram
+
+
+# 忙碌等待的上限（秒）：負載高時量測到的睡眠超時會變大，不限制的話會整段改為忙碌等待而佔滿一個核心
+_MAX_SPIN_MARGIN = 0.002
+
+class FrameScheduler:
+    """截止時間式影格排程器"""
+
+    def __init__(
+        self,
+        fps: Optional[float] = None,
+        allow_skip: bool = True,
+        spin_time: float = 0.0005,
+        window: int = 1000
+    ):
+        """
+        初始化影格排程器
+
+        Args:
+            fps: 目標 FPS（None 或 0 表示不限制，只記錄統計）
+            allow_skip: 落後超過一個影格時，跳過錯過的影格以維持相位（否則立即連續擷取補上）
+            spin_time: 截止時間前最後這段時間以忙碌等待取代睡眠（秒），提高準確度
+            window: 直方圖保留的樣本數
+        """
+        self.interval = 1.0 / fps if fps else 0.0
+        self.allow_skip = allow_skip
+        self.spin_time = spin_time
+
+        self._deadline: Optional[float] = None
+        self._last_start: Optional[float] = None
+        # 睡眠超時的估計值（指數移動平均），下次睡眠時預先扣除
+        self._oversleep = 0.0
+
+        # 統計
+        self.interval_hist = TimingHistogram(window)
+        self.capture_hist = TimingHistogram(window)
+        self.lateness_hist = TimingHistogram(window)
+        self.skipped_frames = 0
+
+    def wait(self) -> int:
+        """
+        等待到下一個影格的截止時間
+
+        Returns:
+            本次跳過的影格數
+        """
+        now = time.perf_counter()
+        skipped = 0
+
+        if self._deadline is None:
+            self._deadline = now
+        elif self.interval > 0:
+            remaining = self._deadline - now
+            if remaining > 0:
+                self._sleep_until(self._deadline, remaining)
+            elif self.allow_skip and -remaining >= self.interval:
+                # 落後超過一個影格：跳過錯過的截止時間，但維持原本的相位
+                skipped = int(-remaining // self.interval)
+                self._deadline += skipped * self.interval
+                self.skipped_frames += skipped
+
+        start = time.perf_counter()
+        if self.interval > 0:
+            self.lateness_hist.add(max(0.0, start - self._deadline))
+        if self._last_start is not None:
+            self.interval_hist.add(start - self._last_start)
+        self._last_start = start
+
+        # 下一個截止時間由本次截止時間推算，不由實際開始時間推算，避免漂移
+        self._deadline += self.interval
+        if self._deadline < start - self.interval and not self.allow_skip:
+            # 不允許跳過時，嚴重落後就以目前時間重新對齊，避免連續爆發擷取
+            self._deadline = start
+        return skipped
+
+    def _sleep_until(self, deadline: float, remaining: float):
+        """睡眠到截止時間，扣除估計的超時並以短暫忙碌等待收尾"""
+        spin_margin = min(self._oversleep + self.spin_time, _MAX_SPIN_MARGIN)
+        sleep_time = remaining - spin_margin
+        if sleep_time > 0:
+            before = time.perf_counter()
+            time.sleep(sleep_time)
+            overslept = (time.perf_counter() - before) - sleep_time
+            self._oversleep = 0.9 * self._oversleep + 0.1 * max(0.0, overslept)
+
+        while time.perf_counter() < deadline:
+            # 讓出 CPU 給其他執行緒（例如擷取執行緒）
+            time.sleep(0)
+
+    def record_capture(self, duration: float):
+        """
+        記錄一次擷取的耗時
+
+        Args:
+            duration: 耗時（秒）
+        """
+        self.capture_hist.add(duration)
+
+    @property
+    def fps(self) -> float:
+        """以最近影格間隔的平均值計算的實際 FPS"""
+        mean = self.interval_hist.mean()
+        return 1.0 / mean if mean > 0 else 0.0
+
+    def get_stats(self) -> Dict[str, object]:
+        """
+        取得排程統計
+
+        Returns:
+            {"fps", "target_fps", "skipped_frames", "interval", "capture", "lateness"}，
+            後三者為 p50 / p95 / p99 等摘要（毫秒）
+        """
+        return {
+            "fps": self.fps,
+            "target_fps": 1.0 / self.interval if self.interval > 0 else 0.0,
+            "skipped_frames": self.skipped_frames,
+            "interval": self.interval_hist.summary(),
+            "capture": self.capture_hist.summary(),
+            "lateness": self.lateness_hist.summary(),
+        }
+
+    def reset(self):
+        """重設截止時間（例如暫停後恢復）"""
+        self._deadline = None
+        self._last_start = None
+
+    def __repr__(self) -> str:
+        target = 1.0 / self.interval if self.interval > 0 else 0
+        return f"FrameScheduler(target={target:.1f}fps, actual={self.fps:.1f}fps)"
@@ -0,0 +1,222 @@
+"""
+多實例擷取模組
+
+同一台主機並排執行多個模擬器時，每個 tick 只擷取所有視窗區域的聯集一次，
+再以 view（不複製像素）切出各實例的畫面交給各自的消費者。
+擷取成本取決於畫面面積，而不是實例數量。
+"""
+
+from typing import Dict, Optional, Tuple, Any
+
+import numpy as np
+
+from .change_detector import ChangeDetector
+from .frame_packet import FramePacket
+from .screen_capture import ScreenCapture
+from .threaded_capture import ThreadedCapture
+
+
+def union_region(regions: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+    """
+    計算多個擷取區域的聯集外框
+
+    Args:
+        regions: {名稱: {"left", "top", "width", "height"}}
+
+    Returns:
+        {"left", "top", "width", "height"}
+    """
+    if not regions:
+        raise ValueError("至少需要一個實例區域")
+    left = min(r["left"] for r in regions.values())
+    top = min(r["top"] for r in regions.values())
+    right = max(r["left"] + r["width"] for r in regions.values())
+    bottom = max(r["top"] + r["height"] for r in regions.values())
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+class MultiInstanceCapture(ThreadedCapture):
+    """單次擷取、多實例共用的擷取服務"""
+
+    def __init__(
+        self,
+        regions: Dict[str, Dict[str, int]],
+        fps_limit: int = 30,
+        ring_size: int = 4,
+        start_timeout: float = 5.0,
+        source_factory: Optional[Any] = None
+    ):
+        """
+        初始化多實例擷取服務並啟動背景擷取
+
+        Args:
+            regions: 各實例的螢幕區域 {名稱: {"left", "top", "width", "height"}}
+            fps_limit: 擷取 FPS 限制
+            ring_size: 環形緩衝區大小
+            start_timeout: 等待擷取來源初始化的最長時間（秒）
+            source_factory: 建立聯集擷取來源的函式（接收聯集區域），None 表示 ScreenCapture
+        """
+        self.regions = {name: dict(region) for name, region in regions.items()}
+        self.union = union_region(self.regions)
+        self.instances: Dict[str, InstanceCapture] = {}
+
+        union = self.union
+        if source_factory is None:
+            factory = lambda: ScreenCapture(region=union, fps_limit=fps_limit)
+        else:
+            factory = lambda: source_factory(union)
+
+        super().__init__(factory, ring_size=ring_size, start_timeout=start_timeout)
+
+        print(f"✅ 多實例擷取服務啟動: {len(self.regions)} 個實例，聯集區域 {self.union}")
+
+    def instance_rect(self, name: str) -> Tuple[int, int, int, int]:
+        """
+        取得實例在聯集影像中的位置
+
+        Returns:
+            (x, y, w, h)
+        """
+        region = self.regions[name]
+        return (
+            region["left"] - self.union["left"],
+            region["top"] - self.union["top"],
+            region["width"],
+            region["height"],
+        )
+
+    def instance(
+        self,
+        name: str,
+        resize: Optional[Tuple[int, int]] = None,
+        zero_copy: bool = False,
+        change_detector: Optional[ChangeDetector] = None
+    ) -> 'InstanceCapture':
+        """
+        建立實例的消費者（介面與 ScreenCapture 相容）
+
+        Args:
+            name: 實例名稱
+            resize: 實例畫面的輸出大小 (width, height)，None 表示不調整
+            zero_copy: 零複製模式（衍生影像寫入該消費者重複使用的緩衝區）
+            change_detector: 該實例的畫面變化偵測器
+
+        Returns:
+            InstanceCapture
+        """
+        if name not in self.regions:
+            raise KeyError(f"實例不存在: {name}")
+        consumer = InstanceCapture(self, name, resize, zero_copy, change_detector)
+        self.instances[name] = consumer
+        return consumer
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        取得擷取面積統計
+
+        Returns:
+            {"instances", "union_pixels", "instance_pixels", "fps"}
+        """
+        return {
+            "instances": len(self.regions),
+            "union_pixels": self.union["width"] * self.union["height"],
+            "instance_pixels": sum(r["width"] * r["height"] for r in self.regions.values()),
+            "fps": self.get_fps(),
+        }
+
+    def __repr__(self) -> str:
+        return f"MultiInstanceCapture(instances={list(self.regions)}, union={self.union})"
+
+
+class InstanceCapture:
+    """多實例擷取服務中單一實例的消費者"""
+
+    def __init__(
+        self,
+        service: MultiInstanceCapture,
+        name: str,
+        resize: Optional[Tuple[int, int]] = None,
+        zero_copy: bool = False,
+        change_detector: Optional[ChangeDetector] = None
+    ):
+        """
+        初始化實例消費者（由 MultiInstanceCapture.instance() 建立）
+
+        Args:
+            service: 多實例擷取服務
+            name: 實例名稱
+            resize: 輸出大小 (width, height)，None 表示不調整
+            zero_copy: 零複製模式
+            change_detector: 畫面變化偵測器
+        """
+        self.service = service
+        self.name = name
+        self.rect = service.instance_rect(name)
+        self.resize = resize
+        self.zero_copy = zero_copy
+        self.change_detector = change_detector
+
+        self._pool: Optional[Dict[str, np.ndarray]] = {} if zero_copy else None
+        self._last_seq = 0
+
+    def _view(self, frame: FramePacket) -> FramePacket:
+        """以 view 切出實例畫面（座標相對於實例視窗，stream 為實例名稱）"""
+        x, y, w, h = self.rect
+        return FramePacket(
+            frame.source[y:y + h, x:x + w],
+            seq=frame.seq,
+            timestamp=frame.timestamp,
+            source_format=frame.source_format,
+            size=self.resize,
+            pool=self._pool,
+            stream=self.name
+        )
+
+    def capture_packet(self, timeout: Optional[float] = 5.0) -> FramePacket:
+        """
+        取得此實例尚未回傳過的最新影格
+
+        Returns:
+            FramePacket（座標相對於實例視窗）
+        """
+        frame = self.service.wait_next(self._last_seq, timeout)
+        if frame is None:
+            if self.service.error is not None:
+                raise RuntimeError(f"多實例擷取已停止: {self.service.error}") from self.service.error
+            raise TimeoutError("等待新影格逾時")
+
+        self._last_seq = frame.seq
+        packet = self._view(frame)
+        if self.change_detector is not None:
+            self.change_detector.update(packet, packet.seq)
+        return packet
+
+    def capture(self, timeout: Optional[float] = 5.0) -> np.ndarray:
+        """取得最新影像（BGR，與 ScreenCapture.capture 相容）"""
+        return self.capture_packet(timeout).bgr
+
+    def capture_rgb(self, timeout: Optional[float] = 5.0) -> np.ndarray:
+        """取得最新影像（RGB）"""
+        return self.capture_packet(timeout).rgb
+
+    def latest(self) -> Optional[FramePacket]:
+        """取得最新影格（不阻塞、不更新變化偵測器），尚無影格時回傳 None"""
+        frame = self.service.latest()
+        return self._view(frame) if frame is not None else None
+
+    def get_fps(self) -> int:
+        """取得擷取服務的 FPS"""
+        return self.service.get_fps()
+
+    def close(self):
+        """實例消費者不持有擷取資源，由擷取服務統一關閉"""
+        self.service.instances.pop(self.name, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"InstanceCapture(name={self.name}, rect={self.rect}, resize={self.resize})"
@@ -0,0 +1,260 @@
+"""
+回放擷取模組
+
+以 ScreenCapture 相容的介面回放記錄的影格，不需要螢幕或模擬器，
+讓機器人、模板匹配與示範程式能以相同的輸入離線執行與比較效能。
+
+支援的來源：
+    SessionRecorder 的記錄目錄（含 session.json）
+    PNG / JPG 圖片目錄（依檔名排序）
+    影片檔（OpenCV 可讀取的格式）
+"""
+
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Tuple, Optional, Dict, Iterator, Any
+
+import cv2
+import numpy as np
+
+from .base_capture import BaseCapture
+from .change_detector import ChangeDetector
+from .session_recorder import SessionReader
+
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp')
+MODES = ('realtime', 'fast', 'step')
+
+# 預取佇列的結束標記
+_END = object()
+
+
+class ReplayCapture(BaseCapture):
+    """回放擷取類別"""
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = 'realtime',
+        speed: float = 1.0,
+        loop: bool = False,
+        fps: float = 30.0,
+        prefetch: int = 16,
+        resize: Optional[Tuple[int, int]] = None,
+        zero_copy: bool = False,
+        change_detector: Optional[ChangeDetector] = None
+    ):
+        """
+        初始化回放擷取器並開始預取
+
+        Args:
+            path: 記錄目錄、圖片目錄或影片檔
+            mode: 'realtime' 依記錄的時間戳記播放、'fast' 盡快播放、
+                'step' 只在呼叫 step() 後前進（否則重複回傳目前影格）
+            speed: realtime 模式的播放速度倍率
+            loop: 播放結束後從頭開始（否則 capture() 拋出 EOFError）
+            fps: 圖片目錄（沒有時間戳記）的影格率
+            prefetch: 預取佇列長度，由背景執行緒提前讀取與解碼
+            resize: 調整大小 (width, height)，None 表示不調整
+            zero_copy: 零複製模式（衍生影像寫入重複使用的緩衝區）
+            change_detector: 畫面變化偵測器，每次擷取後以新影格更新
+        """
+        if mode not in MODES:
+            raise ValueError(f"不支援的回放模式: {mode}（可用: {', '.join(MODES)}）")
+
+        super().__init__(
+            resize=resize,
+            fps_limit=None,
+            zero_copy=zero_copy,
+            change_detector=change_detector
+        )
+        self.path = Path(path)
+        self.mode = mode
+        self.speed = speed
+        self.loop = loop
+        self.image_fps = fps
+        self.source_type = self._detect_source(self.path)
+
+        # 目前影格
+        self._current: Optional[np.ndarray] = None
+        self._pending_steps = 1
+        self.position = 0  # 已播放的影格數
+        self.loops = 0
+
+        # realtime 模式的時間基準 (牆上時間, 記錄時間, 第幾輪)
+        self._pace_origin: Optional[Tuple[float, float, int]] = None
+
+        # 統計
+        self.stalls = 0  # 預取佇列為空、需要等待讀取的次數
+
+        self._queue: queue.Queue = queue.Queue(maxsize=prefetch)
+        self._stop_event = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(
+            target=self._prefetch, name="ReplayPrefetch", daemon=True
+        )
+        self._thread.start()
+
+        print(f"✅ 回放擷取器初始化完成")
+        print(f"   來源: {self.path} ({self.source_type})")
+        print(f"   模式: {self.mode}（速度 x{self.speed}，循環: {self.loop}）")
+        print(f"   調整大小: {self.resize}")
+
+    @staticmethod
+    def _detect_source(path: Path) -> str:
+        """判斷來源類型 'session' / 'images' / 'video'"""
+        if path.is_dir():
+            if (path / "session.json").exists():
+                return 'session'
+            return 'images'
+        if path.is_file():
+            return 'video'
+        raise FileNotFoundError(f"回放來源不存在: {path}")
+
+    def _frames(self) -> Iterator[Tuple[float, np.ndarray]]:
+        """依來源類型逐幀讀取 (時間戳記, BGR 影像)"""
+        if self.source_type == 'session':
+            for _, timestamp, image in SessionReader(str(self.path)):
+                yield timestamp, image
+
+        elif self.source_type == 'images':
+            files = sorted(
+                p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES
+            )
+            if not files:
+                raise FileNotFoundError(f"目錄中沒有圖片: {self.path}")
+            for index, file in enumerate(files):
+                image = cv2.imread(str(file), cv2.IMREAD_COLOR)
+                if image is None:
+                    print(f"⚠️ 無法讀取圖片，略過: {file}")
+                    continue
+                yield index / self.image_fps, image
+
+        else:
+            video = cv2.VideoCapture(str(self.path))
+            if not video.isOpened():
+                raise IOError(f"無法開啟影片: {self.path}")
+            video_fps = video.get(cv2.CAP_PROP_FPS) or self.image_fps
+            index = 0
+            try:
+                while True:
+                    ok, image = video.read()
+                    if not ok:
+                        break
+                    yield index / video_fps, image
+                    index += 1
+            finally:
+                video.release()
+
+    def _prefetch(self):
+        """預取執行緒：提前讀取與解碼影格"""
+        try:
+            round_index = 0
+            while not self._stop_event.is_set():
+                count = 0
+                for timestamp, image in self._frames():
+                    if not self._put((round_index, timestamp, image)):
+                        return
+                    count += 1
+                if not self.loop or count == 0:
+                    break
+                round_index += 1
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._put(_END)
+
+    def _put(self, item: Any) -> bool:
+        """放入預取佇列（佇列滿時等待，停止時回傳 False）"""
+        while not self._stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _next_frame(self) -> np.ndarray:
+        """從預取佇列取得下一幀，並依 realtime 模式等待播放時間"""
+        try:
+            item = self._queue.get_nowait()
+        except queue.Empty:
+            self.stalls += 1
+            item = self._queue.get()
+
+        if item is _END:
+            # 放回結束標記，之後的呼叫也會結束
+            self._queue.put(_END)
+            if self._error is not None:
+                raise RuntimeError(f"回放讀取失敗: {self._error}") from self._error
+            raise EOFError("回放結束")
+
+        round_index, timestamp, image = item
+        self.loops = round_index
+        if self.mode == 'realtime':
+            self._pace(round_index, timestamp)
+        self.position += 1
+        return image
+
+    def _pace(self, round_index: int, timestamp: float):
+        """依記錄的時間戳記等待（每輪重新設定時間基準）"""
+        now = time.perf_counter()
+        origin = self._pace_origin
+        if origin is None or origin[2] != round_index:
+            self._pace_origin = (now, timestamp, round_index)
+            return
+
+        target = origin[0] + (timestamp - origin[1]) / self.speed
+        if target > now:
+            time.sleep(target - now)
+
+    def _grab(self, pool: Optional[Dict[str, np.ndarray]]) -> Tuple[np.ndarray, str]:
+        """
+        取得下一幀（step 模式只在 step() 後前進）
+
+        Returns:
+            (BGR 影像, 'BGR')
+        """
+        if self.mode != 'step':
+            self._current = self._next_frame()
+        else:
+            while self._pending_steps > 0 or self._current is None:
+                self._current = self._next_frame()
+                self._pending_steps = max(0, self._pending_steps - 1)
+        return self._current, 'BGR'
+
+    def step(self, count: int = 1):
+        """
+        step 模式：下一次擷取前進 count 幀
+
+        Args:
+            count: 前進的影格數
+        """
+        self._pending_steps += count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得回放統計
+
+        Returns:
+            {"position", "loops", "stalls", "prefetched"}
+        """
+        return {
+            "position": self.position,
+            "loops": self.loops,
+            "stalls": self.stalls,
+            "prefetched": self._queue.qsize(),
+        }
+
+    def close(self):
+        """停止預取"""
+        self._stop_event.set()
+        self._thread.join(timeout=2.0)
+
+    def __repr__(self) -> str:
+        return (
+            f"ReplayCapture(path={self.path}, source={self.source_type}, "
+            f"mode={self.mode}, resize={self.resize})"
+        )
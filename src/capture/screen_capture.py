@@ -8,17 +8,23 @@ import cv2
 import mss
 import numpy as np
 from typing import Tuple, Optional, Dict
-import time
 
+from .base_capture import BaseCapture
+from .change_detector import ChangeDetector
 
-class ScreenCapture:
+
+class ScreenCapture(BaseCapture):
     """螢幕擷取類別"""
     
+    supports_region_grab = True
+    
     def __init__(
         self,
         region: Optional[Dict[str, int]] = None,
         resize: Optional[Tuple[int, int]] = None,
-        fps_limit: int = 60
+        fps_limit: int = 60,
+        zero_copy: bool = False,
+        change_detector: Optional[ChangeDetector] = None
     ):
         """
         初始化螢幕擷取器
@@ -27,88 +33,88 @@ class ScreenCapture:
             region: 擷取區域 {"left": x, "top": y, "width": w, "height": h}
             resize: 調整大小 (width, height)，None 表示不調整
             fps_limit: FPS 限制
+            zero_copy: 零複製模式。色彩轉換與縮放寫入重複使用的輸出緩衝區。
+                注意：回傳的影像會在下一次 capture 時被覆寫，需保留請自行 copy()
+            change_detector: 畫面變化偵測器，每次擷取後以新影格更新
         """
+        super().__init__(
+            resize=resize,
+            fps_limit=fps_limit,
+            zero_copy=zero_copy,
+            change_detector=change_detector
+        )
         self.sct = mss.mss()
         self.region = region or self.sct.monitors[1]  # 預設使用主螢幕
-        self.resize = resize
-        self.fps_limit = fps_limit
-        
-        # FPS 控制
-        self.frame_time = 1.0 / fps_limit
-        self.last_capture_time = 0
-        
-        # 統計資訊
-        self.frame_count = 0
-        self.fps = 0
-        self.fps_start_time = time.time()
         
         print(f"✅ 螢幕擷取器初始化完成")
         print(f"   區域: {self.region}")
         print(f"   調整大小: {self.resize}")
         print(f"   FPS 限制: {self.fps_limit}")
+        print(f"   零複製模式: {self.zero_copy}")
     
-    def capture(self) -> np.ndarray:
+    def _grab(self, pool: Optional[Dict[str, np.ndarray]]) -> Tuple[np.ndarray, str]:
         """
-        擷取螢幕並返回 numpy array
+        擷取螢幕
+        
+        mss 每次 grab 都配置新的 raw 緩衝區，因此直接以唯讀 view 包裝，不需複製。
         
         Returns:
-            BGR 格式的圖像 (numpy array)
+            (BGRA view, 'BGRA')
         """
-        # FPS 限制
-        current_time = time.time()
-        time_since_last_capture = current_time - self.last_capture_time
-        if time_since_last_capture < self.frame_time:
-            time.sleep(self.frame_time - time_since_last_capture)
-        
-        # 擷取螢幕
         img = self.sct.grab(self.region)
-        
-        # 轉換為 numpy array (BGRA -> BGR)
-        frame = np.array(img)
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-        
-        # 調整大小
-        if self.resize:
-            frame = cv2.resize(frame, self.resize)
-        
-        # 更新統計
-        self.last_capture_time = time.time()
-        self.frame_count += 1
-        
-        # 計算 FPS
-        if current_time - self.fps_start_time > 1.0:
-            self.fps = self.frame_count
-            self.frame_count = 0
-            self.fps_start_time = current_time
-        
-        return frame
+        return self._bgra_view(img), 'BGRA'
     
-    def capture_rgb(self) -> np.ndarray:
+    def _source_size(self) -> Tuple[int, int]:
+        """擷取區域大小 (width, height)"""
+        return self.region["width"], self.region["height"]
+    
+    def _grab_rect(self, rect: Tuple[int, int, int, int]) -> Tuple[np.ndarray, str]:
         """
-        擷取螢幕並返回 RGB 格式
+        只擷取擷取區域中的一部分
         
+        Args:
+            rect: (x, y, w, h)，相對於擷取區域左上角
+            
         Returns:
-            RGB 格式的圖像 (numpy array)
+            (BGRA view, 'BGRA')
         """
-        frame = self.capture()
-        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        x, y, w, h = rect
+        img = self.sct.grab({
+            "left": self.region["left"] + x,
+            "top": self.region["top"] + y,
+            "width": w,
+            "height": h,
+        })
+        return self._bgra_view(img), 'BGRA'
     
-    def get_fps(self) -> int:
-        """取得當前 FPS"""
-        return self.fps
+    @staticmethod
+    def _bgra_view(img) -> np.ndarray:
+        """
+        將 mss 截圖包裝為唯讀的 BGRA numpy view（不複製像素）
+        
+        Args:
+            img: mss ScreenShot
+            
+        Returns:
+            (height, width, 4) 的唯讀 view
+        """
+        width, height = img.size
+        view = np.frombuffer(img.raw, dtype=np.uint8)
+        # 部分平台每列可能有對齊填充，以實際列寬 reshape 後再裁切
+        row_pixels = view.size // (height * 4)
+        view = view.reshape(height, row_pixels, 4)[:, :width]
+        view.flags.writeable = False
+        return view
     
     def close(self):
         """關閉擷取器"""
         self.sct.close()
     
-    def __enter__(self):
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
-    
     def __repr__(self) -> str:
-        return f"ScreenCapture(region={self.region}, resize={self.resize}, fps={self.fps_limit})"
+        return (
+            f"ScreenCapture(region={self.region}, resize={self.resize}, "
+            f"fps={self.fps_limit}, zero_copy={self.zero_copy})"
+        )
 
 
 if __name__ == "__main__":
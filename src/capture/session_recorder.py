@@ -0,0 +1,391 @@
+"""
+擷取記錄模組
+
+將擷取的影格寫入分段的磁碟記錄，供離線重現與效能比較使用。
+
+格式：
+    session.json       記錄資訊（tile 大小、建立時間、統計）
+    chunk_000000.bin   影格記錄，每個分段以關鍵影格開始，可單獨解碼或刪除
+
+每筆影格記錄為固定長度的標頭加上 zlib 壓縮的內容：
+    關鍵影格  完整 BGR 影像
+    差異影格  相對於最近關鍵影格有變化的 tile 索引與像素
+"""
+
+import json
+import queue
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, Tuple, List
+
+import cv2
+import numpy as np
+
+
+# magic, 種類, 影格序號, 時間戳記, 寬, 高, tile 數, 內容長度
+_HEADER = struct.Struct('<4sBIdHHII')
+_MAGIC = b'FREC'
+KEYFRAME = 0
+DELTA = 1
+
+
+def _tile_grid(width: int, height: int, tile_size: int) -> Tuple[int, int]:
+    """tile 的列數與行數（邊緣不足一個 tile 的部分也算一個 tile）"""
+    return -(-height // tile_size), -(-width // tile_size)
+
+
+def _tiles_view(padded: np.ndarray, tile_size: int) -> np.ndarray:
+    """將補齊到 tile 倍數的影像以 (列, 行, tile, tile, 通道) 的 view 存取"""
+    rows, cols = padded.shape[0] // tile_size, padded.shape[1] // tile_size
+    return padded.reshape(rows, tile_size, cols, tile_size, -1).swapaxes(1, 2)
+
+
+class SessionRecorder:
+    """背景執行緒影格記錄器"""
+
+    def __init__(
+        self,
+        directory: str,
+        tile_size: int = 32,
+        threshold: int = 0,
+        keyframe_interval: int = 150,
+        keyframe_ratio: float = 0.5,
+        chunk_frames: int = 1800,
+        max_bytes: Optional[int] = 2 * 1024 ** 3,
+        queue_size: int = 60,
+        compress_level: int = 1
+    ):
+        """
+        初始化影格記錄器並啟動寫入執行緒
+
+        Args:
+            directory: 記錄目錄（不存在時自動建立）
+            tile_size: tile 邊長（像素）
+            threshold: tile 內任一像素通道差異超過此值才視為變化（0 表示無損）
+            keyframe_interval: 每隔幾幀寫入一個關鍵影格
+            keyframe_ratio: 變化的 tile 比例超過此值時直接寫入關鍵影格
+            chunk_frames: 每個分段檔案的影格數
+            max_bytes: 記錄目錄的最大容量，超過時刪除最舊的分段（None 表示不限制）
+            queue_size: 待寫入佇列長度，佇列滿時丟棄新影格而不阻塞擷取
+            compress_level: zlib 壓縮等級
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.tile_size = tile_size
+        self.threshold = threshold
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_ratio = keyframe_ratio
+        self.chunk_frames = chunk_frames
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._seq = 0
+
+        # 寫入執行緒狀態
+        self._file = None
+        self._chunk_index = 0
+        self._chunk_count = 0
+        self._chunks: List[Tuple[Path, int]] = []
+        self._since_keyframe = 0
+        self._key: Optional[np.ndarray] = None
+        self._padded: Optional[np.ndarray] = None
+        self._size: Optional[Tuple[int, int]] = None
+        self._tile_count = 0
+
+        # 統計
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.keyframes = 0
+        self.tiles_written = 0
+        self.bytes_written = 0
+        self.chunks_deleted = 0
+        self.error: Optional[BaseException] = None
+
+        self._write_info()
+        self._thread = threading.Thread(
+            target=self._run, name="SessionRecorder", daemon=True
+        )
+        self._thread.start()
+
+        print(f"✅ 影格記錄器啟動: {self.directory}")
+
+    def write(self, frame: Any, timestamp: Optional[float] = None) -> bool:
+        """
+        加入一幀到寫入佇列（不阻塞）
+
+        影像會先複製，因此零複製模式的緩衝區之後被覆寫也不影響記錄。
+
+        Args:
+            frame: FramePacket 或 BGR 影像
+            timestamp: 擷取時間（None 表示使用封包的時間戳記或目前時間）
+
+        Returns:
+            是否加入佇列（佇列已滿或已關閉時丟棄並回傳 False）
+        """
+        if self._closed or self.error is not None:
+            return False
+
+        image = getattr(frame, 'bgr', frame)
+        if timestamp is None:
+            timestamp = getattr(frame, 'timestamp', None)
+            if timestamp is None:
+                timestamp = time.monotonic()
+        seq = getattr(frame, 'seq', None)
+        if seq is None:
+            seq = self._seq + 1
+        self._seq = seq
+
+        try:
+            self._queue.put_nowait((seq, timestamp, image.copy()))
+            return True
+        except queue.Full:
+            self.frames_dropped += 1
+            return False
+
+    def _run(self):
+        """寫入執行緒主迴圈"""
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                self._encode(*item)
+        except BaseException as e:
+            self.error = e
+            print(f"❌ 影格記錄失敗: {e}")
+        finally:
+            self._close_chunk()
+
+    def _encode(self, seq: int, timestamp: float, image: np.ndarray):
+        """編碼一幀並寫入目前的分段"""
+        height, width = image.shape[:2]
+        ts = self.tile_size
+
+        if self._file is None or self._chunk_count >= self.chunk_frames:
+            self._open_chunk()
+
+        if self._size != (width, height):
+            rows, cols = _tile_grid(width, height, ts)
+            self._padded = np.zeros((rows * ts, cols * ts, 3), dtype=np.uint8)
+            self._tile_count = rows * cols
+            self._key = None
+            self._size = (width, height)
+
+        padded = self._padded
+        padded[:height, :width] = image
+
+        changed = None
+        if self._key is not None and self._since_keyframe < self.keyframe_interval:
+            changed = self._changed_tiles(padded)
+            if changed[0].size > self.keyframe_ratio * self._tile_count:
+                changed = None
+
+        if changed is None:
+            payload = zlib.compress(image.tobytes(), self.compress_level)
+            self._write_record(KEYFRAME, seq, timestamp, width, height, 0, payload)
+            self._key = padded.copy()
+            self._since_keyframe = 0
+            self.keyframes += 1
+        else:
+            rows, cols = changed
+            tiles = _tiles_view(padded, ts)[rows, cols]
+            indices = (rows * (padded.shape[1] // ts) + cols).astype('<u4')
+            payload = zlib.compress(indices.tobytes() + tiles.tobytes(), self.compress_level)
+            self._write_record(DELTA, seq, timestamp, width, height, indices.size, payload)
+            self._since_keyframe += 1
+            self.tiles_written += indices.size
+
+        self._chunk_count += 1
+        self.frames_written += 1
+
+    def _changed_tiles(self, padded: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        找出與關鍵影格相比有變化的 tile
+
+        Returns:
+            (列索引, 行索引)
+        """
+        ts = self.tile_size
+        diff = cv2.absdiff(padded, self._key)
+        rows, cols = padded.shape[0] // ts, padded.shape[1] // ts
+        tile_max = diff.reshape(rows, ts, cols, ts * 3).max(axis=(1, 3))
+        return np.nonzero(tile_max > self.threshold)
+
+    def _write_record(
+        self, kind: int, seq: int, timestamp: float,
+        width: int, height: int, tiles: int, payload: bytes
+    ):
+        """寫入一筆影格記錄"""
+        header = _HEADER.pack(_MAGIC, kind, seq, timestamp, width, height, tiles, len(payload))
+        self._file.write(header)
+        self._file.write(payload)
+        self.bytes_written += len(header) + len(payload)
+
+    def _open_chunk(self):
+        """開始新的分段（以關鍵影格開始）"""
+        self._close_chunk()
+        path = self.directory / f"chunk_{self._chunk_index:06d}.bin"
+        self._chunk_index += 1
+        self._file = open(path, 'wb')
+        self._chunk_count = 0
+        self._key = None
+
+    def _close_chunk(self):
+        """關閉目前的分段並套用容量限制"""
+        if self._file is None:
+            return
+        path = Path(self._file.name)
+        self._file.close()
+        self._file = None
+        self._chunks.append((path, path.stat().st_size))
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        """刪除最舊的分段直到總容量不超過 max_bytes（至少保留最新的分段）"""
+        if self.max_bytes is None:
+            return
+        total = sum(size for _, size in self._chunks)
+        while total > self.max_bytes and len(self._chunks) > 1:
+            path, size = self._chunks.pop(0)
+            path.unlink(missing_ok=True)
+            total -= size
+            self.chunks_deleted += 1
+
+    def _write_info(self, stats: Optional[Dict[str, Any]] = None):
+        """寫入記錄資訊"""
+        info = {
+            "version": 1,
+            "tile_size": self.tile_size,
+            "threshold": self.threshold,
+            "created": time.time(),
+        }
+        if stats is not None:
+            info["stats"] = stats
+        with open(self.directory / "session.json", 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得記錄統計
+
+        Returns:
+            {"frames_written", "frames_dropped", "keyframes", "avg_tiles",
+             "bytes_written", "chunks_deleted", "queue"}
+        """
+        deltas = self.frames_written - self.keyframes
+        return {
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "keyframes": self.keyframes,
+            "avg_tiles": self.tiles_written / deltas if deltas else 0.0,
+            "bytes_written": self.bytes_written,
+            "chunks_deleted": self.chunks_deleted,
+            "queue": self._queue.qsize(),
+        }
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """寫完佇列中的影格並停止寫入執行緒"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+        stats = self.get_stats()
+        self._write_info(stats)
+        print(
+            f"✅ 影格記錄完成: {stats['frames_written']} 幀"
+            f"（丟棄 {stats['frames_dropped']}），{stats['bytes_written'] / 1024 ** 2:.1f} MB"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SessionReader:
+    """影格記錄讀取器"""
+
+    def __init__(self, directory: str):
+        """
+        初始化讀取器
+
+        Args:
+            directory: SessionRecorder 的記錄目錄
+        """
+        self.directory = Path(directory)
+        info_path = self.directory / "session.json"
+        if not info_path.exists():
+            raise FileNotFoundError(f"不是影格記錄目錄: {directory}")
+
+        with open(info_path, 'r', encoding='utf-8') as f:
+            self.info = json.load(f)
+        self.tile_size = self.info["tile_size"]
+        self.chunks = sorted(self.directory.glob("chunk_*.bin"))
+
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        return self.frames()
+
+    def frames(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        """
+        依序解碼所有影格
+
+        Yields:
+            (影格序號, 時間戳記, BGR 影像)。影像為新配置的陣列，可直接保留
+        """
+        for chunk in self.chunks:
+            yield from self.read_chunk(chunk)
+
+    def read_chunk(self, path: Path) -> Iterator[Tuple[int, float, np.ndarray]]:
+        """解碼一個分段（結尾不完整的記錄會被略過）"""
+        ts = self.tile_size
+        key = None
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            magic, kind, seq, timestamp, width, height, tiles, length = \
+                _HEADER.unpack_from(data, offset)
+            offset += _HEADER.size
+            if magic != _MAGIC or offset + length > len(data):
+                break
+            raw = zlib.decompress(data[offset:offset + length])
+            offset += length
+
+            if kind == KEYFRAME:
+                rows, cols = _tile_grid(width, height, ts)
+                key = np.zeros((rows * ts, cols * ts, 3), dtype=np.uint8)
+                key[:height, :width] = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 3)
+                yield seq, timestamp, key[:height, :width].copy()
+            elif key is not None:
+                canvas = key.copy()
+                indices = np.frombuffer(raw, dtype='<u4', count=tiles)
+                pixels = np.frombuffer(raw, dtype=np.uint8, offset=indices.nbytes)
+                cols = canvas.shape[1] // ts
+                _tiles_view(canvas, ts)[indices // cols, indices % cols] = \
+                    pixels.reshape(tiles, ts, ts, 3)
+                yield seq, timestamp, canvas[:height, :width]
+
+    def __len__(self) -> int:
+        """影格數（只讀取標頭）"""
+        count = 0
+        for chunk in self.chunks:
+            size = chunk.stat().st_size
+            with open(chunk, 'rb') as f:
+                while True:
+                    header = f.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        break
+                    length = _HEADER.unpack(header)[-1]
+                    if f.seek(length, 1) > size:
+                        break
+                    count += 1
+        return count
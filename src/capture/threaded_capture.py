@@ -0,0 +1,244 @@
+"""
+背景執行緒擷取模組
+
+由生產者執行緒持續擷取畫面並寫入環形緩衝區，
+呼叫端不必在自己的執行緒上等待擷取與 FPS 限制。
+"""
+
+import threading
+import time
+from typing import Callable, Optional, List, Dict, Any, Iterable, Tuple
+
+import numpy as np
+
+from .base_capture import BaseCapture
+from .frame_packet import FramePacket
+from .frame_ring import FrameRing
+from .screen_capture import ScreenCapture
+
+
+class ThreadedCapture:
+    """背景執行緒螢幕擷取類別"""
+
+    def __init__(
+        self,
+        source_factory: Optional[Callable[[], Any]] = None,
+        ring_size: int = 4,
+        start_timeout: float = 5.0,
+        **capture_kwargs
+    ):
+        """
+        初始化背景擷取器
+
+        mss 的 handle 只能在建立它的執行緒使用，因此擷取來源由生產者執行緒
+        透過 source_factory 自行建立。
+
+        Args:
+            source_factory: 建立擷取來源的函式（需提供 capture() 與 close()，
+                若提供 capture_packet(pool) 則直接使用影格封包），
+                None 表示以 capture_kwargs 建立 ScreenCapture
+            ring_size: 環形緩衝區大小。消費者持有的影格在之後
+                ring_size 個新影格內保證不被覆寫，需保留更久請自行 copy()
+            start_timeout: 等待擷取來源初始化的最長時間（秒）
+            **capture_kwargs: 傳給 ScreenCapture 的參數（region, resize, fps_limit...）
+        """
+        if source_factory is None:
+            source_factory = lambda: ScreenCapture(**capture_kwargs)
+
+        self.source_factory = source_factory
+        self.ring = FrameRing(ring_size)
+        self.error: Optional[BaseException] = None
+
+        # 每個槽位各自的輸出緩衝區池（只配置一次，之後重複使用）
+        self._pools: List[Dict[str, np.ndarray]] = [{} for _ in range(ring_size)]
+        self._seq = 0
+        self._last_returned_seq = 0
+        self._source = None
+
+        # 具名子區域（由最新影格以 view 裁切）
+        self.rois: Dict[str, Tuple[int, int, int, int]] = {}
+
+        self._stop_event = threading.Event()
+        self._ready_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="ThreadedCapture", daemon=True
+        )
+        self._thread.start()
+
+        if not self._ready_event.wait(start_timeout):
+            print("⚠️ 背景擷取器初始化逾時")
+        if self.error is not None:
+            raise RuntimeError(f"背景擷取器初始化失敗: {self.error}") from self.error
+
+        print(f"✅ 背景擷取器啟動完成 (ring_size={ring_size})")
+
+    def _run(self):
+        """生產者執行緒主迴圈"""
+        try:
+            self._source = self.source_factory()
+        except BaseException as e:
+            self.error = e
+            self._ready_event.set()
+            self.ring.close()
+            return
+
+        self._ready_event.set()
+
+        try:
+            while not self._stop_event.is_set():
+                packet = self._grab_packet(self._pools[(self._seq + 1) % self.ring.size])
+                self._seq = packet.seq
+                self.ring.publish(packet)
+        except BaseException as e:
+            # 關閉過程中來源中斷屬於正常結束
+            if not self._stop_event.is_set():
+                self.error = e
+                print(f"❌ 背景擷取執行緒發生錯誤: {e}")
+        finally:
+            self.ring.close()
+            self._source.close()
+
+    def _grab_packet(self, pool: Dict[str, np.ndarray]) -> FramePacket:
+        """由擷取來源取得影格封包，衍生影像寫入該槽位的緩衝區池"""
+        # 來源自行編號，序號與來源的變化偵測器一致
+        if hasattr(self._source, 'capture_packet'):
+            return self._source.capture_packet(pool=pool)
+
+        # 只提供 capture() 的來源：複製到槽位緩衝區，避免來源重複使用緩衝區
+        image = self._source.capture()
+        buffer = pool.get('source')
+        if buffer is None or buffer.shape != image.shape or buffer.dtype != image.dtype:
+            buffer = np.empty_like(image)
+            pool['source'] = buffer
+        np.copyto(buffer, image)
+        return FramePacket(
+            buffer, seq=self._seq + 1, timestamp=time.monotonic(),
+            source_format='BGR', pool=pool
+        )
+
+    def latest(self) -> Optional[FramePacket]:
+        """
+        取得最新影格（不阻塞）
+
+        Returns:
+            最新影格，尚無影格時回傳 None
+        """
+        return self.ring.latest()
+
+    def wait_next(
+        self,
+        after_seq: int = 0,
+        timeout: Optional[float] = None
+    ) -> Optional[FramePacket]:
+        """
+        等待序號大於 after_seq 的新影格
+
+        Args:
+            after_seq: 已處理過的最後序號
+            timeout: 最長等待時間（秒）
+
+        Returns:
+            新影格，逾時或擷取器停止時回傳 None
+        """
+        return self.ring.wait_next(after_seq, timeout)
+
+    def capture(self, timeout: Optional[float] = 5.0) -> np.ndarray:
+        """
+        取得尚未經由 capture() 回傳過的最新影像（與 ScreenCapture.capture 相容）
+
+        Returns:
+            BGR 格式的圖像 (numpy array)
+        """
+        return self.capture_packet(timeout).bgr
+
+    def capture_packet(self, timeout: Optional[float] = 5.0) -> FramePacket:
+        """
+        取得尚未經由 capture() / capture_packet() 回傳過的最新影格封包
+
+        Returns:
+            FramePacket
+        """
+        frame = self.ring.wait_next(self._last_returned_seq, timeout)
+        if frame is None:
+            if self.error is not None:
+                raise RuntimeError(f"背景擷取器已停止: {self.error}") from self.error
+            raise TimeoutError("等待新影格逾時")
+
+        self._last_returned_seq = frame.seq
+        return frame
+
+    def add_roi(self, name: str, rect: Tuple[int, int, int, int]):
+        """
+        註冊具名子區域
+
+        Args:
+            name: 子區域名稱
+            rect: (x, y, w, h)，輸出影格座標
+        """
+        self.rois[name] = BaseCapture._check_rect(rect)
+
+    def remove_roi(self, name: str):
+        """移除具名子區域"""
+        self.rois.pop(name, None)
+
+    def capture_rois(
+        self,
+        names: Optional[Iterable[str]] = None,
+        timeout: Optional[float] = 5.0
+    ) -> Dict[str, FramePacket]:
+        """
+        取得新影格的具名子區域
+
+        生產者持續擷取完整影格，子區域為其 view（不複製像素），只縮小匹配範圍。
+
+        Args:
+            names: 子區域名稱，None 表示全部
+            timeout: 等待新影格的最長時間（秒）
+
+        Returns:
+            {名稱: FramePacket}，各封包的 offset 為子區域在影格中的位置
+        """
+        names = list(self.rois) if names is None else list(names)
+        for name in names:
+            if name not in self.rois:
+                raise KeyError(f"子區域不存在: {name}")
+
+        packet = self.capture_packet(timeout)
+        return {name: packet.crop(self.rois[name], roi=name) for name in names}
+
+    def get_fps(self) -> int:
+        """取得生產者目前的 FPS"""
+        source = self._source
+        return source.get_fps() if source is not None else 0
+
+    def get_timing_stats(self) -> Dict[str, Any]:
+        """取得生產者的影格間隔與擷取耗時統計（尚未啟動時為空字典）"""
+        source = self._source
+        if source is None or not hasattr(source, 'get_timing_stats'):
+            return {}
+        return source.get_timing_stats()
+
+    @property
+    def change_detector(self):
+        """擷取來源的變化偵測器（沒有時為 None）"""
+        return getattr(self._source, 'change_detector', None)
+
+    @property
+    def last_seq(self) -> int:
+        """最新影格序號（尚無影格時為 0）"""
+        return self._seq
+
+    def close(self, timeout: float = 2.0):
+        """停止生產者執行緒並釋放擷取來源"""
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"ThreadedCapture(ring={self.ring}, running={self._thread.is_alive()})"
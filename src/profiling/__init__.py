@@ -0,0 +1,6 @@
+"""profiling package - 效能量測模組"""
+
+from .histogram import TimingHistogram
+from .tracer import Tracer, tracer
+
+__all__ = ['TimingHistogram', 'Tracer', 'tracer']
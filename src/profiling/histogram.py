@@ -0,0 +1,100 @@
+"""
+計時直方圖模組
+
+以固定大小的環形陣列保留最近的計時樣本，提供 p50 / p95 / p99 等百分位數。
+"""
+
+import threading
+from typing import Dict
+
+import numpy as np
+
+
+class TimingHistogram:
+    """滾動計時直方圖（保留最近 window 筆樣本）"""
+
+    def __init__(self, window: int = 1000):
+        """
+        初始化計時直方圖
+
+        Args:
+            window: 保留的樣本數
+        """
+        self.window = window
+        self._samples = np.zeros(window, dtype=np.float64)
+        self._index = 0
+        self.count = 0  # 累計樣本數（不受 window 限制）
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, value: float):
+        """
+        加入一筆樣本
+
+        Args:
+            value: 樣本值（秒）
+        """
+        with self._lock:
+            self._samples[self._index] = value
+            self._index = (self._index + 1) % self.window
+            self.count += 1
+            self.total += value
+
+    def values(self) -> np.ndarray:
+        """取得目前視窗內的樣本（複本）"""
+        with self._lock:
+            return self._samples[:min(self.count, self.window)].copy()
+
+    def percentile(self, q: float) -> float:
+        """
+        取得百分位數
+
+        Args:
+            q: 百分位（0-100）
+
+        Returns:
+            樣本值（沒有樣本時為 0.0）
+        """
+        values = self.values()
+        return float(np.percentile(values, q)) if values.size else 0.0
+
+    def mean(self) -> float:
+        """視窗內樣本的平均值"""
+        values = self.values()
+        return float(values.mean()) if values.size else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """
+        取得摘要（毫秒）
+
+        Returns:
+            {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}
+        """
+        values = self.values()
+        if not values.size:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0,
+                    "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+        return {
+            "count": self.count,
+            "mean_ms": float(values.mean() * 1000),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(values.max() * 1000),
+        }
+
+    def reset(self):
+        """清除所有樣本"""
+        with self._lock:
+            self._index = 0
+            self.count = 0
+            self.total = 0.0
+
+    def __repr__(self) -> str:
+        s = self.summary()
+        return (
+            f"TimingHistogram(n={s['count']}, p50={s['p50_ms']:.2f}ms, "
+            f"p95={s['p95_ms']:.2f}ms, p99={s['p99_ms']:.2f}ms)"
+        )
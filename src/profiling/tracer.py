@@ -0,0 +1,240 @@
+"""
+熱路徑計時模組
+
+以 span 量測擷取、模板匹配與 ADB 指令等各階段的耗時，
+彙整為滾動直方圖，並可輸出 Chrome trace JSON（chrome://tracing 或 Perfetto 開啟）。
+
+停用時 span() 只回傳共用的空操作物件，幾乎沒有額外成本。
+
+使用方式：
+    from profiling import tracer
+
+    tracer.enable()
+    with tracer.span('capture.grab'):
+        ...
+
+    @tracer.traced('match')
+    def match(...):
+        ...
+
+    print(tracer.report())
+    tracer.dump_chrome_trace('logs/trace.json')
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from .histogram import TimingHistogram
+
+
+class _NullSpan:
+    """停用時使用的空操作 span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """計時 span（離開時記錄到直方圖與 trace 事件）"""
+
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: Optional[Dict[str, Any]]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter_ns()
+        self.tracer._record(self.name, self.start, end, self.args)
+        return False
+
+
+class Tracer:
+    """span 計時器"""
+
+    def __init__(self, enabled: bool = False, max_events: int = 200_000, window: int = 1000):
+        """
+        初始化計時器
+
+        Args:
+            enabled: 是否啟用
+            max_events: 保留的 trace 事件數（超過時捨棄最舊的事件）
+            window: 每個 span 名稱的直方圖樣本數
+        """
+        self.enabled = enabled
+        self.window = window
+        self._events: deque = deque(maxlen=max_events)
+        self._histograms: Dict[str, TimingHistogram] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def enable(self):
+        """啟用計時"""
+        self.enabled = True
+
+    def disable(self):
+        """停用計時"""
+        self.enabled = False
+
+    def span(self, name: str, **args):
+        """
+        建立計時 span（以 with 使用）
+
+        Args:
+            name: span 名稱（以 . 分階層，例如 'match.template'）
+            **args: 附加在 trace 事件上的參數
+
+        Returns:
+            context manager
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args or None)
+
+    def traced(self, name: str):
+        """
+        以 span 包住整個函式的裝飾器（停用時只多一次屬性檢查）
+
+        Args:
+            name: span 名稱
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, name, None):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _record(self, name: str, start: int, end: int, args: Optional[Dict[str, Any]]):
+        """記錄一個完成的 span"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, TimingHistogram(self.window))
+        histogram.add((end - start) / 1e9)
+        self._events.append((name, start, end, threading.get_ident(), args))
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        取得各 span 的耗時統計
+
+        Returns:
+            {span 名稱: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "total_ms"}}
+        """
+        stats = {}
+        for name, histogram in list(self._histograms.items()):
+            summary = histogram.summary()
+            summary["total_ms"] = histogram.total * 1000
+            stats[name] = summary
+        return stats
+
+    def report(self) -> str:
+        """
+        產生耗時報表（依累計耗時排序）
+
+        Returns:
+            多行文字
+        """
+        stats = self.get_stats()
+        if not stats:
+            return "（沒有計時資料）"
+
+        lines = [
+            f"{'span':<24}{'count':>8}{'total ms':>12}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+        ]
+        for name, s in sorted(stats.items(), key=lambda item: -item[1]["total_ms"]):
+            lines.append(
+                f"{name:<24}{s['count']:>8}{s['total_ms']:>12.1f}{s['p50_ms']:>9.2f}"
+                f"{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}{s['max_ms']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        轉換為 Chrome trace 格式
+
+        Returns:
+            {"traceEvents": [...], "displayTimeUnit": "ms"}
+        """
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = []
+        seen_threads = set()
+        for name, start, end, tid, args in list(self._events):
+            event = {
+                "name": name,
+                "cat": name.split('.', 1)[0],
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": self._pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            events.append(event)
+            seen_threads.add(tid)
+
+        for tid in seen_threads:
+            events.append({
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": tid,
+                "args": {"name": thread_names.get(tid, str(tid))},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path: str) -> int:
+        """
+        輸出 Chrome trace JSON 檔案
+
+        Args:
+            path: 輸出路徑（目錄不存在時自動建立）
+
+        Returns:
+            輸出的事件數
+        """
+        trace = self.chrome_trace()
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+        return len(trace["traceEvents"])
+
+    def reset(self):
+        """清除所有計時資料"""
+        with self._lock:
+            self._events.clear()
+            self._histograms = {}
+            self._origin = time.perf_counter_ns()
+
+    def __repr__(self) -> str:
+        return f"Tracer(enabled={self.enabled}, spans={len(self._histograms)}, events={len(self._events)})"
+
+
+# 全域計時器（各模組共用）
+tracer = Tracer()
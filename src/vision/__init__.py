@@ -1,5 +1,12 @@
 """vision package - 圖像識別模組"""
 
 from .template_matcher import TemplateMatcher
+from .template_pack import build_template_pack, read_template_pack, is_template_pack_stale
+from .screen_state import ScreenStateIndex
+from .detector import YOLODetector, quantize_detector
+from .scheduler import VisionScheduler
 
-__all__ = ['TemplateMatcher']
+__all__ = [
+    'TemplateMatcher', 'build_template_pack', 'read_template_pack', 'is_template_pack_stale', 'ScreenStateIndex',
+    'YOLODetector', 'quantize_detector', 'VisionScheduler'
+]
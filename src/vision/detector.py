@@ -0,0 +1,379 @@
+"""
+物件偵測模組
+
+以 ONNX Runtime 在 CPU 上執行匯出的 YOLO 模型（vision.yolo 的類別：player、enemy ...）。
+
+輸入張量與 letterbox 畫布預先配置，每幀只把縮放後的畫面寫入畫布中央並正規化到同一塊記憶體；
+後處理以 numpy 向量化解碼與非極大值抑制，結果換算回畫面座標。
+可一次推論多個影格（例如多開模擬器的畫面），也可載入 int8 量化的模型。
+
+使用方式：
+    detector = YOLODetector('data/models/yolov8n.onnx', class_names=['player', 'enemy', ...])
+    for name, confidence, (x1, y1, x2, y2) in detector.detect(packet):
+        ...
+
+    # 量化（可選）：以記錄的畫面校正後輸出 int8 模型
+    quantize_detector('data/models/yolov8n.onnx', 'data/models/yolov8n.int8.onnx', calibration_images)
+"""
+
+import ast
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from profiling import tracer
+
+try:
+    import onnxruntime as ort
+except ImportError:  # 選用相依套件
+    ort = None
+
+
+# letterbox 邊框顏色（與 YOLO 訓練時相同）
+_PAD_VALUE = 114
+
+# 非極大值抑制前最多保留的候選數
+_MAX_CANDIDATES = 1000
+
+# (類別名稱, 信心度, (x1, y1, x2, y2))
+Detection = Tuple[str, float, Tuple[int, int, int, int]]
+
+
+def decode_predictions(
+    prediction: np.ndarray,
+    num_classes: int,
+    conf_threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    解碼單張影像的 YOLO 輸出
+
+    支援 YOLOv8 格式 (4 + 類別數, 候選數) 與其轉置，以及 YOLOv5 格式 (候選數, 5 + 類別數)。
+
+    Args:
+        prediction: 單張影像的模型輸出
+        num_classes: 類別數
+        conf_threshold: 信心閾值
+
+    Returns:
+        (外框 (N, 4) [x1, y1, x2, y2]（模型輸入座標）, 信心度 (N,), 類別索引 (N,))
+    """
+    if prediction.shape[0] == 4 + num_classes:
+        prediction = prediction.T
+    if prediction.shape[1] == 5 + num_classes:
+        class_scores = prediction[:, 5:] * prediction[:, 4:5]
+    elif prediction.shape[1] == 4 + num_classes:
+        class_scores = prediction[:, 4:]
+    else:
+        raise ValueError(f"無法解析的模型輸出: {prediction.shape}（類別數 {num_classes}）")
+
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(class_ids)), class_ids]
+    keep = np.nonzero(scores >= conf_threshold)[0]
+    if len(keep) > _MAX_CANDIDATES:
+        keep = keep[np.argpartition(-scores[keep], _MAX_CANDIDATES)[:_MAX_CANDIDATES]]
+
+    cx, cy, w, h = (prediction[keep, i] for i in range(4))
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return boxes, scores[keep], class_ids[keep]
+
+
+def nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    class_ids: np.ndarray,
+    iou_threshold: float = 0.45,
+    max_detections: Optional[int] = None
+) -> List[int]:
+    """
+    依類別分開的非極大值抑制
+
+    每次保留剩餘候選中分數最高者，並一次捨棄所有與其同類別且重疊的候選，
+    迴圈次數等於保留的數量。
+
+    Returns:
+        保留的候選索引（依分數由高到低）
+    """
+    order = np.argsort(-scores, kind='stable')
+    # 不同類別的外框平移到互不重疊的位置，一次處理所有類別
+    span = boxes.max(initial=0) - boxes.min(initial=0) + 1
+    shifted = boxes + (class_ids * span)[:, None]
+    areas = (shifted[:, 2] - shifted[:, 0]) * (shifted[:, 3] - shifted[:, 1])
+
+    keep = []
+    remaining = order
+    while remaining.size and (max_detections is None or len(keep) < max_detections):
+        i = remaining[0]
+        keep.append(int(i))
+        rest = remaining[1:]
+        w = np.clip(np.minimum(shifted[rest, 2], shifted[i, 2]) - np.maximum(shifted[rest, 0], shifted[i, 0]), 0, None)
+        h = np.clip(np.minimum(shifted[rest, 3], shifted[i, 3]) - np.maximum(shifted[rest, 1], shifted[i, 1]), 0, None)
+        inter = w * h
+        suppress = inter > iou_threshold * (areas[rest] + areas[i] - inter)
+        remaining = rest[~suppress]
+    return keep
+
+
+class YOLODetector:
+    """ONNX Runtime（CPU）YOLO 偵測器"""
+
+    def __init__(
+        self,
+        model_path: str,
+        class_names: Optional[Sequence[str]] = None,
+        conf_threshold: float = 0.5,
+        iou_threshold: float = 0.45,
+        img_size: int = 640,
+        batch_size: int = 1,
+        threads: Optional[int] = None,
+        max_detections: int = 100
+    ):
+        """
+        載入模型並配置輸入張量
+
+        Args:
+            model_path: ONNX 模型路徑（tool_export_detector.py 產生，可為 int8 量化模型）
+            class_names: 類別名稱，None 表示讀取模型中繼資料（Ultralytics 匯出時寫入）
+            conf_threshold: 信心閾值
+            iou_threshold: 非極大值抑制的 IoU 閾值
+            img_size: 模型輸入邊長（模型輸入大小固定時以模型為準）
+            batch_size: 一次推論的影格數（模型批次大小固定時以模型為準）
+            threads: ONNX Runtime 執行緒數，None 表示 CPU 核心數
+            max_detections: 每個影格最多回傳的數量
+        """
+        if ort is None:
+            raise ImportError("ONNX 偵測器需要 onnxruntime，請執行: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = threads or os.cpu_count() or 1
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=['CPUExecutionProvider']
+        )
+        self.model_path = str(model_path)
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.output_name = self.session.get_outputs()[0].name
+        batch_dim, _, height_dim, width_dim = model_input.shape
+        # 動態維度（字串或 None）使用參數的大小
+        self.fixed_batch = isinstance(batch_dim, int)
+        self.batch_size = batch_dim if self.fixed_batch else batch_size
+        self.input_size = (
+            width_dim if isinstance(width_dim, int) else img_size,
+            height_dim if isinstance(height_dim, int) else img_size
+        )  # (width, height)
+
+        self.class_names = list(class_names) if class_names else self._model_class_names()
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_detections = max_detections
+
+        # 預先配置的輸入張量與 letterbox 畫布
+        width, height = self.input_size
+        self._input = np.zeros((self.batch_size, 3, height, width), dtype=np.float32)
+        self._canvas = np.full((height, width, 3), _PAD_VALUE, dtype=np.uint8)
+        self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self._layout: Optional[Tuple[int, int, int, int]] = None  # 目前畫布內容的位置與大小
+
+        # 統計
+        self.frames = 0
+        self.inference_time = 0.0
+
+        logger.info(
+            f"物件偵測器初始化完成 ({Path(self.model_path).name}, "
+            f"{width}x{height}, batch={self.batch_size}, 類別={len(self.class_names)})"
+        )
+
+    def _model_class_names(self) -> List[str]:
+        """讀取 Ultralytics 寫入模型中繼資料的類別名稱 {0: 'player', ...}"""
+        names = self.session.get_modelmeta().custom_metadata_map.get('names')
+        if not names:
+            raise ValueError("模型沒有類別名稱中繼資料，請提供 class_names")
+        names = ast.literal_eval(names)
+        if isinstance(names, dict):
+            return [names[i] for i in sorted(names)]
+        return list(names)
+
+    def _letterbox(self, frame: Any, slot: int) -> Tuple[float, int, int]:
+        """
+        將影格等比例縮放到畫布中央，正規化後寫入輸入張量的第 slot 張
+
+        Returns:
+            (縮放比例, 左側邊框, 上方邊框)
+        """
+        image = frame.bgr if hasattr(frame, 'bgr') else frame
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        h, w = image.shape[:2]
+        width, height = self.input_size
+        ratio = min(width / w, height / h)
+        new_w, new_h = max(round(w * ratio), 1), max(round(h * ratio), 1)
+        left, top = (width - new_w) // 2, (height - new_h) // 2
+
+        # FramePacket 會快取縮放結果
+        if hasattr(frame, 'resized'):
+            resized = frame.resized((new_w, new_h))
+        else:
+            resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+        # 大小改變時才重新填滿邊框
+        layout = (new_w, new_h, left, top)
+        if layout != self._layout:
+            self._canvas.fill(_PAD_VALUE)
+            self._layout = layout
+        self._canvas[top:top + new_h, left:left + new_w] = resized
+
+        # BGR -> RGB、HWC -> CHW、正規化到 0-1，直接寫入預先配置的張量
+        cv2.cvtColor(self._canvas, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        np.multiply(self._rgb.transpose(2, 0, 1), np.float32(1 / 255), out=self._input[slot])
+        return ratio, left, top
+
+    def _postprocess(
+        self,
+        prediction: np.ndarray,
+        frame: Any,
+        letterbox: Tuple[float, int, int]
+    ) -> List[Detection]:
+        """解碼、非極大值抑制並換算回畫面座標"""
+        boxes, scores, class_ids = decode_predictions(
+            prediction, len(self.class_names), self.conf_threshold
+        )
+        keep = nms(boxes, scores, class_ids, self.iou_threshold, self.max_detections)
+        if not keep:
+            return []
+
+        ratio, left, top = letterbox
+        image = frame.bgr if hasattr(frame, 'bgr') else frame
+        h, w = image.shape[:2]
+        boxes = boxes[keep]
+        boxes[:, [0, 2]] = np.clip((boxes[:, [0, 2]] - left) / ratio, 0, w)
+        boxes[:, [1, 3]] = np.clip((boxes[:, [1, 3]] - top) / ratio, 0, h)
+
+        # 子區域封包加上 offset，回傳完整畫面座標
+        offset_x, offset_y = getattr(frame, 'offset', (0, 0))
+        boxes = np.round(boxes).astype(int) + [offset_x, offset_y, offset_x, offset_y]
+        return [
+            (self.class_names[class_ids[i]], float(scores[i]), tuple(int(v) for v in box))
+            for i, box in zip(keep, boxes)
+        ]
+
+    @tracer.traced('detect')
+    def detect(self, frame: Any) -> List[Detection]:
+        """
+        偵測單一影格
+
+        Args:
+            frame: FramePacket 或 BGR 影像
+
+        Returns:
+            [(類別名稱, 信心度, (x1, y1, x2, y2)), ...]，畫面座標，依信心度由高到低
+        """
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames: Iterable[Any]) -> List[List[Detection]]:
+        """
+        一次推論多個影格（每 batch_size 個影格執行一次模型）
+
+        Args:
+            frames: FramePacket 或 BGR 影像
+
+        Returns:
+            每個影格的偵測結果
+        """
+        frames = list(frames)
+        results: List[List[Detection]] = []
+        for start in range(0, len(frames), self.batch_size):
+            chunk = frames[start:start + self.batch_size]
+
+            with tracer.span('detect.preprocess'):
+                letterboxes = [self._letterbox(frame, slot) for slot, frame in enumerate(chunk)]
+
+            # 批次大小固定的模型一定要餵滿整個張量，多出的位置沿用舊內容
+            tensor = self._input if self.fixed_batch else self._input[:len(chunk)]
+            infer_start = time.perf_counter()
+            with tracer.span('detect.infer', batch=len(chunk)):
+                output = self.session.run([self.output_name], {self.input_name: tensor})[0]
+            self.inference_time += time.perf_counter() - infer_start
+            self.frames += len(chunk)
+
+            with tracer.span('detect.nms'):
+                for slot, frame in enumerate(chunk):
+                    results.append(self._postprocess(output[slot], frame, letterboxes[slot]))
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """取得推論統計（每幀平均推論時間與對應的 fps）"""
+        avg_ms = self.inference_time / self.frames * 1000 if self.frames else 0.0
+        return {
+            'frames': self.frames,
+            'inference_ms': avg_ms,
+            'fps': 1000 / avg_ms if avg_ms else 0.0,
+        }
+
+    def __repr__(self) -> str:
+        width, height = self.input_size
+        return f"YOLODetector(model={Path(self.model_path).name}, size={width}x{height}, batch={self.batch_size})"
+
+
+class _CalibrationReader:
+    """quantize_static() 的校正資料（以與推論相同的 letterbox 前處理）"""
+
+    def __init__(self, detector: YOLODetector, images: Sequence[np.ndarray]):
+        self.detector = detector
+        self.images = iter(images)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        image = next(self.images, None)
+        if image is None:
+            return None
+        self.detector._letterbox(image, 0)
+        return {self.detector.input_name: self.detector._input[:1].copy()}
+
+
+def quantize_detector(
+    model_path: str,
+    output_path: str,
+    calibration_images: Optional[Sequence[np.ndarray]] = None,
+    img_size: int = 640
+) -> str:
+    """
+    將偵測模型量化為 int8
+
+    提供校正畫面時使用靜態量化（QDQ，權重與活化值都是 int8，CPU 上最快），
+    否則只量化權重（動態量化）。
+
+    Args:
+        model_path: 原始 ONNX 模型
+        output_path: 輸出路徑
+        calibration_images: 校正用的 BGR 畫面（建議數十張涵蓋各種畫面）
+        img_size: 模型輸入邊長（動態大小的模型使用）
+
+    Returns:
+        輸出路徑
+    """
+    if ort is None:
+        raise ImportError("量化需要 onnxruntime，請執行: pip install onnxruntime")
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    if not calibration_images:
+        quantize_dynamic(str(model_path), str(output_path), weight_type=QuantType.QUInt8)
+        return str(output_path)
+
+    detector = YOLODetector(model_path, class_names=['_'], img_size=img_size, batch_size=1)
+    quantize_static(
+        str(model_path),
+        str(output_path),
+        _CalibrationReader(detector, calibration_images),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True
+    )
+    return str(output_path)
@@ -0,0 +1,94 @@
+"""
+匹配結果快取模組
+
+以影格識別（擷取序號與時間，可選擇以影像內容的雜湊）加上查詢參數為鍵，
+保存最近的匹配結果。同一影格重複查詢相同模板（例如先 match() 再 visualize_match()，
+或多個呼叫者各自查詢）只需一次字典查詢，不必重新轉換灰階與執行 matchTemplate。
+"""
+
+import zlib
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import numpy as np
+
+
+# 快取未命中（匹配結果本身可能是 None）
+MISSING = object()
+
+
+def frame_key(screen: Any, content: bool = False) -> Optional[Hashable]:
+    """
+    取得影格識別
+
+    擷取器產生的 FramePacket（timestamp 非 0）以來源名稱、序號與擷取時間識別，不需讀取像素
+    （多實例擷取的各實例畫面來自同一次擷取，只有來源名稱不同）。
+    其他影像預設無法識別（不快取）：同一個陣列常被當作連續的影格重複匹配，
+    沿用結果會跳過搜尋區域、鎖定比例等狀態的更新。
+
+    Args:
+        screen: FramePacket 或影像
+        content: 其他影像改以內容的 CRC32 與 Adler-32 識別，並加上序號避免不同影格的結果互相混用
+
+    Returns:
+        可雜湊的識別，無法識別時為 None
+    """
+    offset = getattr(screen, 'offset', (0, 0))
+    timestamp = getattr(screen, 'timestamp', 0.0)
+    if timestamp:
+        return ('frame', getattr(screen, 'stream', None), screen.seq, timestamp, offset, screen.shape[:2])
+
+    image = getattr(screen, 'source', screen)
+    if not content or not isinstance(image, np.ndarray):
+        return None
+    data = np.ascontiguousarray(image)
+    return (
+        'content', getattr(screen, 'seq', None), getattr(screen, 'size', None), offset,
+        image.shape, zlib.crc32(data), zlib.adler32(data)
+    )
+
+
+class ResultCache:
+    """有大小上限的 LRU 快取（鍵的第一個元素為影格識別，None 表示無法識別的影格，不快取）"""
+
+    def __init__(self, max_size: int = 256):
+        """
+        Args:
+            max_size: 最多保存的項目數（0 表示停用）
+        """
+        self.max_size = max_size
+        self._items: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """取得快取的值，未命中時回傳 MISSING"""
+        if key[0] is None:
+            return MISSING
+        value = self._items.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """保存值，超過上限時移除最久未使用的項目"""
+        if self.max_size <= 0 or key[0] is None:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def discard(self, name: str):
+        """移除某個模板的所有項目（鍵的第二個元素為模板名稱）"""
+        for key in [key for key in self._items if key[1] == name]:
+            del self._items[key]
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
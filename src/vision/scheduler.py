@@ -0,0 +1,305 @@
+"""
+視覺排程模組
+
+物件偵測器即使是 nano 模型，在 CPU 上每幀執行仍然太慢。排程器每 N 幀才執行一次偵測器，
+其餘影格以上次偵測結果的外框影像在預測位置附近做局部模板匹配，推算物件的新位置。
+
+N 依量測到的偵測耗時（攤提到每幀的預算）與畫面中物件的移動速度自動調整，
+並以 max_interval 限制偵測結果最多沿用幾幀。畫面大幅變化（換場景）或追蹤失敗時立即重新偵測。
+
+使用方式：
+    scheduler = VisionScheduler(detector, change_detector=capturer.change_detector)
+    for name, confidence, (x1, y1, x2, y2) in scheduler.update(packet):
+        ...
+"""
+
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from profiling import tracer
+from .detector import Detection
+
+
+# 外框影像的標準差低於此值時無法可靠追蹤（純色區域），直接沿用偵測位置
+_MIN_PATCH_STD = 2.0
+
+# 偵測耗時與移動速度的指數移動平均權重
+_EMA_ALPHA = 0.2
+
+
+class VisionScheduler:
+    """偵測 + 追蹤的混合視覺排程器"""
+
+    def __init__(
+        self,
+        detector: Any,
+        change_detector: Optional[Any] = None,
+        min_interval: int = 1,
+        max_interval: int = 15,
+        detect_budget_ms: float = 8.0,
+        scene_change_ratio: float = 0.3,
+        track_radius: int = 24,
+        track_threshold: float = 0.6,
+        motion_tolerance: float = 12.0
+    ):
+        """
+        初始化視覺排程器
+
+        Args:
+            detector: 物件偵測器（vision.YOLODetector 或任何提供 detect(frame) 的物件）
+            change_detector: 畫面變化偵測器（capture.ChangeDetector）。
+                提供時，變化區塊比例超過 scene_change_ratio 立即重新偵測，外框內沒有變化的物件不需追蹤
+            min_interval: 兩次偵測之間最少間隔的影格數
+            max_interval: 兩次偵測之間最多間隔的影格數（偵測結果最多沿用幾幀）
+            detect_budget_ms: 偵測器攤提到每幀的耗時預算（毫秒），偵測越慢間隔越長
+            scene_change_ratio: 自上次偵測後變化的區塊比例超過此值時視為換場景
+            track_radius: 追蹤時在預測外框四周搜尋的距離（像素）
+            track_threshold: 追蹤匹配的最低信心度，低於此值視為追蹤失敗
+            motion_tolerance: 兩次偵測之間允許物件累積移動的距離（像素），物件移動越快間隔越短
+        """
+        if min_interval < 1 or max_interval < min_interval:
+            raise ValueError(f"偵測間隔範圍不正確: {min_interval} - {max_interval}")
+
+        self.detector = detector
+        self.change_detector = change_detector
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.detect_budget_ms = detect_budget_ms
+        self.scene_change_ratio = scene_change_ratio
+        self.track_radius = track_radius
+        self.track_threshold = track_threshold
+        self.motion_tolerance = motion_tolerance
+
+        # 追蹤中的物件：{name, confidence, box (x1, y1, x2, y2 畫面座標), patch, vx, vy}
+        self._objects: List[Dict[str, Any]] = []
+        self.interval = min_interval
+        self.age = 0  # 目前結果距離上次偵測的影格數
+        self.last_detected = False  # 最近一次 update() 是否執行了偵測器
+        self._force_detect = True
+        self._detect_seq: Optional[int] = None
+        self._last_seq: Optional[int] = None
+        self._counter = 0
+
+        # 量測值（指數移動平均）
+        self.detect_ms = 0.0
+        self.motion = 0.0  # 物件每幀平均移動距離（像素）
+
+        # 統計
+        self.frames = 0
+        self.detections = 0
+        self.tracked_frames = 0
+        self.scene_changes = 0
+        self.track_losses = 0
+        self.detect_time = 0.0
+        self.track_time = 0.0
+
+    def update(self, frame: Any) -> List[Detection]:
+        """
+        處理一個影格
+
+        Args:
+            frame: FramePacket 或 BGR 影像（與偵測器的輸入相同）
+
+        Returns:
+            [(類別名稱, 信心度, (x1, y1, x2, y2)), ...]，畫面座標。
+            偵測的影格為偵測器的結果，其他影格為追蹤後的外框（信心度沿用偵測時的值）
+        """
+        seq = getattr(frame, 'seq', None)
+        if seq is None:
+            self._counter += 1
+            seq = self._counter
+        self.frames += 1
+
+        if self._should_detect(seq):
+            self._detect(frame, seq)
+        else:
+            self._track(frame, seq)
+
+        self._last_seq = seq
+        self._adapt_interval()
+        return self.results()
+
+    def results(self) -> List[Detection]:
+        """目前的結果（不處理新影格）"""
+        return [
+            (obj['name'], obj['confidence'], tuple(int(round(v)) for v in obj['box']))
+            for obj in self._objects
+        ]
+
+    def request_detection(self):
+        """下一個影格強制執行偵測器（例如點擊後畫面即將改變）"""
+        self._force_detect = True
+
+    def _should_detect(self, seq: int) -> bool:
+        if self._force_detect or self.age + 1 >= self.interval:
+            return True
+
+        detector = self.change_detector
+        if detector is None or detector.last_change is None or self._detect_seq is None:
+            return False
+        # 自上次偵測後變化的區塊比例（換場景、開關選單）
+        changed = float(np.mean(detector.last_change > self._detect_seq))
+        if changed >= self.scene_change_ratio:
+            self.scene_changes += 1
+            return True
+        return False
+
+    def _detect(self, frame: Any, seq: int):
+        start = time.perf_counter()
+        with tracer.span('schedule.detect', interval=self.interval):
+            detections = self.detector.detect(frame)
+            gray, (offset_x, offset_y) = self._gray(frame)
+            objects = []
+            for name, confidence, box in detections:
+                x1, y1, x2, y2 = box
+                # 外框影像（畫面邊緣的外框先裁切到影格內）
+                fx1, fy1 = max(x1 - offset_x, 0), max(y1 - offset_y, 0)
+                fx2, fy2 = min(x2 - offset_x, gray.shape[1]), min(y2 - offset_y, gray.shape[0])
+                patch = None
+                tracked_box = [float(v) for v in box]
+                if fx2 - fx1 >= 4 and fy2 - fy1 >= 4:
+                    patch = gray[fy1:fy2, fx1:fx2].copy()
+                    tracked_box = [
+                        float(fx1 + offset_x), float(fy1 + offset_y), float(fx2 + offset_x), float(fy2 + offset_y)
+                    ]
+                    if float(patch.std()) < _MIN_PATCH_STD:
+                        patch = None
+                objects.append({
+                    'name': name,
+                    'confidence': confidence,
+                    'box': tracked_box,
+                    'patch': patch,
+                    'vx': 0.0,
+                    'vy': 0.0,
+                })
+        elapsed = time.perf_counter() - start
+
+        self._objects = objects
+        self.detect_time += elapsed
+        self.detect_ms = elapsed * 1000 if not self.detections else (
+            (1 - _EMA_ALPHA) * self.detect_ms + _EMA_ALPHA * elapsed * 1000
+        )
+        self.detections += 1
+        self.age = 0
+        self.last_detected = True
+        self._force_detect = False
+        self._detect_seq = seq
+
+    def _track(self, frame: Any, seq: int):
+        start = time.perf_counter()
+        with tracer.span('schedule.track', objects=len(self._objects)):
+            gray, offset = self._gray(frame) if self._objects else (None, (0, 0))
+            moved = []
+            for obj in self._objects:
+                if obj['patch'] is None or not self._region_changed(obj['box']):
+                    # 無法追蹤或外框內沒有變化：沿用原位置
+                    obj['vx'] = obj['vy'] = 0.0
+                    moved.append(0.0)
+                    continue
+                distance = self._track_object(gray, offset, obj)
+                if distance is None:
+                    # 追蹤失敗：保留最後位置，下一幀重新偵測
+                    self.track_losses += 1
+                    self._force_detect = True
+                    continue
+                moved.append(distance)
+        self.track_time += time.perf_counter() - start
+
+        if moved:
+            self.motion = (1 - _EMA_ALPHA) * self.motion + _EMA_ALPHA * (sum(moved) / len(moved))
+        self.tracked_frames += 1
+        self.age += 1
+        self.last_detected = False
+
+    def _track_object(self, gray: np.ndarray, offset, obj: Dict[str, Any]) -> Optional[float]:
+        """
+        在預測位置附近匹配物件的外框影像
+
+        Returns:
+            本幀移動的距離（像素）或 None（追蹤失敗）
+        """
+        patch = obj['patch']
+        h, w = patch.shape
+        x1, y1 = obj['box'][0] + obj['vx'] - offset[0], obj['box'][1] + obj['vy'] - offset[1]
+        x0, y0 = max(int(round(x1)) - self.track_radius, 0), max(int(round(y1)) - self.track_radius, 0)
+        wx1 = min(int(round(x1)) + w + self.track_radius, gray.shape[1])
+        wy1 = min(int(round(y1)) + h + self.track_radius, gray.shape[0])
+        if wx1 - x0 < w or wy1 - y0 < h:
+            return None
+
+        result = cv2.matchTemplate(gray[y0:wy1, x0:wx1], patch, cv2.TM_CCOEFF_NORMED)
+        _, confidence, _, loc = cv2.minMaxLoc(result)
+        if not confidence >= self.track_threshold:
+            return None
+
+        new_x, new_y = float(x0 + loc[0] + offset[0]), float(y0 + loc[1] + offset[1])
+        dx, dy = new_x - obj['box'][0], new_y - obj['box'][1]
+        obj['box'] = [new_x, new_y, new_x + w, new_y + h]
+        obj['vx'], obj['vy'] = dx, dy
+        return math.hypot(dx, dy)
+
+    def _region_changed(self, box) -> bool:
+        """外框自上一幀後是否有變化（沒有變化偵測器時一律視為有變化）"""
+        detector = self.change_detector
+        if detector is None or self._last_seq is None:
+            return True
+        x1, y1, x2, y2 = box
+        return detector.changed_since(self._last_seq, (int(x1), int(y1), int(x2 - x1) + 1, int(y2 - y1) + 1))
+
+    def _adapt_interval(self):
+        """
+        依偵測耗時與物件移動速度調整偵測間隔
+
+        偵測耗時攤提到每幀不超過預算需要的間隔為下限；物件移動越快，
+        兩次偵測之間累積的移動越快超過 motion_tolerance，間隔越短。結果限制在 [min, max] 內。
+        """
+        latency_interval = self.min_interval
+        if self.detect_budget_ms > 0:
+            latency_interval = math.ceil(self.detect_ms / self.detect_budget_ms)
+
+        motion_interval = self.max_interval
+        if self.motion > 0:
+            motion_interval = int(self.motion_tolerance / self.motion)
+
+        interval = max(latency_interval, min(motion_interval, self.max_interval))
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+
+    def _gray(self, frame: Any):
+        """取得灰階影像與畫面座標 offset"""
+        offset = getattr(frame, 'offset', None) or (0, 0)
+        gray = getattr(frame, 'gray', None)
+        if gray is None:
+            gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return gray, offset
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        取得統計
+
+        Returns:
+            {"frames", "detections", "tracked_frames", "scene_changes", "track_losses",
+             "interval", "age", "detect_ms", "track_ms", "vision_ms"}
+            （track_ms 為每個追蹤影格的平均耗時，vision_ms 為每幀平均的偵測 + 追蹤耗時）
+        """
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "tracked_frames": self.tracked_frames,
+            "scene_changes": self.scene_changes,
+            "track_losses": self.track_losses,
+            "interval": self.interval,
+            "age": self.age,
+            "detect_ms": self.detect_ms,
+            "track_ms": self.track_time / self.tracked_frames * 1000 if self.tracked_frames else 0.0,
+            "vision_ms": (self.detect_time + self.track_time) / self.frames * 1000 if self.frames else 0.0,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"VisionScheduler(interval={self.interval}, "
+            f"range={self.min_interval}-{self.max_interval}, objects={len(self._objects)})"
+        )
@@ -0,0 +1,223 @@
+"""
+畫面狀態分類模組
+
+以幾個錨點區域的感知雜湊（dHash）辨識目前的遊戲畫面（大廳、模式選擇、戰鬥、結算…）。
+分類只需縮小畫面、計算數十個位元並查表比對漢明距離，遠比逐一匹配所有模板快，
+可作為模板匹配前的快速篩選：只匹配與目前畫面相關的模板。
+
+範例畫面目錄結構（每個子目錄為一種狀態）：
+    data/screenshots/
+        lobby/*.png
+        battle/*.png
+        states.yaml    # 選用：{狀態: [相關模板名稱, ...]}
+
+使用方式：
+    index = ScreenStateIndex.build_from_dir('data/screenshots')
+    index.save('data/screen_states.npz')
+
+    index = ScreenStateIndex.load('data/screen_states.npz')
+    state, distance = index.classify(packet)
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Any
+
+import cv2
+import numpy as np
+import yaml
+
+
+# 預設錨點區域（相對於畫面寬高的比例 (x, y, w, h)）：整個畫面、頂部、底部與中央
+DEFAULT_ANCHORS = (
+    (0.0, 0.0, 1.0, 1.0),
+    (0.0, 0.0, 1.0, 0.2),
+    (0.0, 0.8, 1.0, 0.2),
+    (0.2, 0.3, 0.6, 0.4),
+)
+
+# 縮圖大小：錨點從縮圖裁切，每幀只縮放一次完整畫面
+_THUMB_SIZE = (72, 128)  # (width, height)
+
+# 每個位元組的 1 位元數
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _thumbnail(frame: Any) -> np.ndarray:
+    """取得灰階縮圖（FramePacket 會快取縮放結果）"""
+    resized = getattr(frame, 'resized', None)
+    if resized is not None:
+        return resized(_THUMB_SIZE, gray=True)
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, _THUMB_SIZE, interpolation=cv2.INTER_AREA)
+
+
+def dhash(gray: np.ndarray, hash_size: int = 8) -> np.ndarray:
+    """
+    計算差異雜湊（縮小為 (hash_size + 1) x hash_size 後比較相鄰像素）
+
+    Args:
+        gray: 灰階影像
+        hash_size: 雜湊邊長（位元數為 hash_size 的平方）
+
+    Returns:
+        打包後的位元（uint8 陣列，長度 hash_size * hash_size / 8）
+    """
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return np.packbits(bits.reshape(-1))
+
+
+class ScreenStateIndex:
+    """以感知雜湊最近鄰辨識畫面狀態"""
+
+    def __init__(
+        self,
+        anchors: Sequence[Tuple[float, float, float, float]] = DEFAULT_ANCHORS,
+        hash_size: int = 8,
+        max_distance: Optional[int] = None
+    ):
+        """
+        初始化空的索引
+
+        Args:
+            anchors: 錨點區域（相對於畫面寬高的比例 (x, y, w, h)）
+            hash_size: 每個錨點的雜湊邊長（位元數為 hash_size 的平方）
+            max_distance: 最近範例的漢明距離超過此值時視為未知畫面，
+                None 表示總位元數的 1/4
+        """
+        self.anchors = [tuple(float(v) for v in anchor) for anchor in anchors]
+        self.hash_size = hash_size
+        total_bits = len(self.anchors) * hash_size * hash_size
+        self.max_distance = total_bits // 4 if max_distance is None else max_distance
+
+        self.labels: List[str] = []
+        self.signatures = np.zeros((0, total_bits // 8), dtype=np.uint8)
+        self.templates: Dict[str, List[str]] = {}  # 各狀態相關的模板
+
+    def signature(self, frame: Any) -> np.ndarray:
+        """
+        計算畫面的雜湊簽章（所有錨點的雜湊串接）
+
+        Args:
+            frame: FramePacket、BGR 影像或灰階影像
+
+        Returns:
+            uint8 陣列
+        """
+        thumb = _thumbnail(frame)
+        height, width = thumb.shape[:2]
+        parts = []
+        for ax, ay, aw, ah in self.anchors:
+            x0, y0 = int(ax * width), int(ay * height)
+            x1 = max(int((ax + aw) * width), x0 + 2)
+            y1 = max(int((ay + ah) * height), y0 + 2)
+            parts.append(dhash(thumb[y0:y1, x0:x1], self.hash_size))
+        return np.concatenate(parts)
+
+    def add(self, label: str, frame: Any):
+        """
+        加入一個已標記的範例畫面
+
+        Args:
+            label: 畫面狀態名稱
+            frame: 範例畫面
+        """
+        self.labels.append(label)
+        self.signatures = np.vstack([self.signatures, self.signature(frame)[None, :]])
+
+    def distances(self, frame: Any) -> np.ndarray:
+        """計算畫面與所有範例的漢明距離"""
+        diff = np.bitwise_xor(self.signatures, self.signature(frame)[None, :])
+        return _POPCOUNT[diff].sum(axis=1, dtype=np.int32)
+
+    def classify(self, frame: Any) -> Tuple[Optional[str], int]:
+        """
+        辨識畫面狀態
+
+        Args:
+            frame: FramePacket、BGR 影像或灰階影像
+
+        Returns:
+            (狀態名稱, 漢明距離)，沒有足夠接近的範例時狀態為 None
+        """
+        if not self.labels:
+            return None, -1
+        distances = self.distances(frame)
+        best = int(np.argmin(distances))
+        distance = int(distances[best])
+        if distance > self.max_distance:
+            return None, distance
+        return self.labels[best], distance
+
+    @property
+    def states(self) -> List[str]:
+        """所有狀態名稱"""
+        return sorted(set(self.labels))
+
+    @classmethod
+    def build_from_dir(cls, directory: str, **kwargs) -> 'ScreenStateIndex':
+        """
+        從範例畫面目錄建立索引（每個子目錄名稱為狀態，目錄內的 *.png 為範例）
+
+        目錄中的 states.yaml（{狀態: [模板名稱, ...]}）會一併載入。
+
+        Args:
+            directory: 範例畫面目錄
+            **kwargs: 傳給建構子的參數
+
+        Returns:
+            ScreenStateIndex
+        """
+        index = cls(**kwargs)
+        root = Path(directory)
+        for state_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+            for path in sorted(state_dir.glob("*.png")):
+                image = cv2.imread(str(path))
+                if image is None:
+                    continue
+                index.add(state_dir.name, image)
+
+        manifest = root / "states.yaml"
+        if manifest.exists():
+            with open(manifest, 'r', encoding='utf-8') as f:
+                index.templates = {
+                    state: list(names or []) for state, names in (yaml.safe_load(f) or {}).items()
+                }
+
+        if not index.labels:
+            raise ValueError(f"目錄中沒有範例畫面: {directory}")
+        return index
+
+    def save(self, path: str):
+        """儲存索引（.npz）"""
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            output,
+            anchors=np.array(self.anchors, dtype=np.float64),
+            hash_size=self.hash_size,
+            max_distance=self.max_distance,
+            labels=np.array(self.labels),
+            signatures=self.signatures,
+            templates=np.array(yaml.safe_dump(self.templates, allow_unicode=True)),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'ScreenStateIndex':
+        """載入 save() 儲存的索引"""
+        with np.load(path) as data:
+            index = cls(
+                anchors=[tuple(anchor) for anchor in data['anchors']],
+                hash_size=int(data['hash_size']),
+                max_distance=int(data['max_distance'])
+            )
+            index.labels = [str(label) for label in data['labels']]
+            index.signatures = data['signatures'].copy()
+            index.templates = yaml.safe_load(str(data['templates'])) or {}
+        return index
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __repr__(self) -> str:
+        return f"ScreenStateIndex(states={self.states}, examples={len(self.labels)})"
@@ -4,25 +4,147 @@
 使用 OpenCV 進行模板匹配，識別 UI 元素。
 """
 
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import cv2
 import numpy as np
-from typing import Optional, Tuple, List
+import yaml
+from typing import Optional, Tuple, List, Dict, Set, Iterable, Sequence, Any
 from pathlib import Path
 from loguru import logger
 
+from profiling import tracer
+from .template_pack import read_template_pack
+from .result_cache import ResultCache, MISSING, frame_key
+
+
+# 統計預篩可以限制信心度的匹配方法（TM_CCOEFF 系列不受亮度與對比影響，
+# TM_CCORR_NORMED 不受對比影響，以總和與平方和推導的上界幾乎不會低於閾值）
+_PREFILTER_METHODS = (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED, cv2.TM_CCORR)
+
+# 統計預篩保留的相對誤差（matchTemplate 以 float32 計算）
+_PREFILTER_EPS = 1e-4
+
+# 像素值的平方（cv2.LUT 比 cv2.multiply 快）
+_SQUARE_LUT = (np.arange(256, dtype=np.uint32) ** 2).astype(np.uint16)
+
 
 class TemplateMatcher:
     """模板匹配類別"""
     
-    def __init__(self, threshold: float = 0.8):
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        change_detector: Optional[Any] = None,
+        workers: Optional[int] = None,
+        learn_regions: bool = False,
+        region_margin: int = 16,
+        region_miss_limit: int = 10,
+        pyramid_levels: int = 0,
+        pyramid_candidates: int = 3,
+        pyramid_min_size: int = 8,
+        scale_range: Optional[Sequence[float]] = None,
+        scale_step: float = 0.05,
+        scale_miss_limit: int = 50,
+        track_radius: int = 16,
+        track_widen_steps: int = 2,
+        state_index: Optional[Any] = None,
+        result_cache_size: int = 256,
+        keep_response_maps: int = 0,
+        cache_by_content: bool = False,
+        prefilter_level: int = 0
+    ):
         """
         初始化模板匹配器
         
         Args:
             threshold: 匹配信心閾值（0-1）
+            change_detector: 畫面變化偵測器（capture.ChangeDetector）。
+                提供時，若模板的搜尋區域自上次匹配後沒有變化，直接沿用上次結果
+            workers: match_many() 的執行緒數，None 表示 CPU 核心數
+            learn_regions: 是否從過去的匹配位置學習搜尋區域（未宣告區域的模板）
+            region_margin: 學習區域在匹配外框四周保留的邊界（像素）
+            region_miss_limit: 搜尋區域連續未匹配幾次後，改為搜尋整個畫面一次
+            pyramid_levels: 金字塔匹配的縮小層數（0 表示停用）。先在縮小的畫面上找出候選位置，
+                再只在候選位置附近以原始解析度匹配，信心度與完整匹配相同
+            pyramid_candidates: 縮小層保留的候選位置數
+            pyramid_min_size: 縮小後模板的最小邊長（模板較小時自動減少層數）
+            scale_range: 多尺度匹配的模板縮放範圍 (最小, 最大)，None 表示只用原始大小。
+                在範圍內找到匹配後鎖定該比例，之後只以單一比例匹配
+            scale_step: 縮放比例的間隔
+            scale_miss_limit: 鎖定比例後，曾以該比例匹配的模板連續未匹配幾次，改為該模板重新搜尋所有比例一次
+            track_radius: track() 預測位置周圍的搜尋半徑（像素）
+            track_widen_steps: track() 未匹配時將半徑加倍重試的次數，之後改為完整搜尋
+            state_index: 畫面狀態索引（vision.ScreenStateIndex）。
+                match_screen() 先辨識畫面狀態，只匹配與該狀態相關的模板
+            result_cache_size: 匹配結果快取的項目數（0 表示停用）。
+                同一影格重複查詢相同模板時直接回傳快取的結果
+            keep_response_maps: 保留最近幾個完整的匹配分數圖（match_all() 與 response_map() 共用，
+                0 表示不保留）
+            cache_by_content: 沒有擷取時間的影像（一般 numpy 陣列）也以像素內容的雜湊識別影格並快取結果。
+                預設只快取擷取器產生的 FramePacket，同一個陣列重複匹配時視為新的影格
+            prefilter_level: 統計預篩使用的縮小層數（0 表示停用）。以每 2^N x 2^N 像素格子的積分影像
+                求出每個位置的像素總和與平方和的範圍，由閾值與匹配方法推導出信心度上界，
+                沒有任何位置可能達到閾值時不執行 matchTemplate。只適用 TM_SQDIFF、TM_SQDIFF_NORMED 與 TM_CCORR，
+                預設的 TM_CCOEFF_NORMED 不受亮度與對比影響，任何非純色的視窗都可能達到 1，不執行預篩
         """
         self.threshold = threshold
         self.templates = {}
+        self.change_detector = change_detector
+        self.workers = workers or os.cpu_count() or 1
+        
+        # match_many() 使用的執行緒池（第一次使用時建立）
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # 模板搜尋區域（畫面座標 (x, y, w, h)）
+        self.search_regions: Dict[str, Tuple[int, int, int, int]] = {}
+        self.learn_regions = learn_regions
+        self.region_margin = region_margin
+        self.region_miss_limit = region_miss_limit
+        self._hit_boxes: Dict[str, List[int]] = {}  # 學習到的匹配外框 [x0, y0, x1, y1]
+        self._miss_streaks: Dict[str, int] = {}
+        
+        # 金字塔匹配
+        self.pyramid_levels = pyramid_levels
+        self.pyramid_candidates = pyramid_candidates
+        self.pyramid_min_size = pyramid_min_size
+        
+        # 多尺度匹配（所有模板共用鎖定的比例：比例由視窗大小 / DPI 決定）
+        self.scales = self._scale_list(scale_range, scale_step)
+        self.scale_miss_limit = scale_miss_limit
+        self.locked_scale: Optional[float] = None
+        # 曾以鎖定比例匹配的模板與其連續未匹配次數（不在畫面上的模板不會觸發重新搜尋）
+        self._scale_confirmed: Set[str] = set()
+        self._scale_misses: Dict[str, int] = {}
+        self._match_scales: Dict[str, float] = {}  # 各模板最近一次匹配使用的比例
+        
+        # 追蹤：各模板上次的位置與速度 {模板名稱: {"x", "y", "vx", "vy", "seq"}}
+        self.track_radius = track_radius
+        self.track_widen_steps = track_widen_steps
+        self._tracks: Dict[str, Dict[str, float]] = {}
+        self.track_hits = 0  # 在預測視窗內找到的次數
+        self.track_searches = 0  # 改為完整搜尋的次數
+        
+        # 畫面狀態分類
+        self.state_index = state_index
+        self.last_state: Optional[str] = None
+        
+        # 畫面未變化時可沿用的前次結果 {(模板名稱, 方法): (影格序號, 結果)}
+        self._reuse_cache = {}
+        self.reuse_hits = 0
+        
+        # 同一影格的查詢結果 {(影格識別, 模板名稱, 方法, ...): 結果}
+        self.result_cache = ResultCache(result_cache_size)
+        self.response_maps = ResultCache(keep_response_maps)
+        self.cache_by_content = cache_by_content
+        
+        # 統計預篩（_match_gray() 可能在 match_many() 的工作執行緒中執行，計數需加鎖）
+        self.prefilter_level = prefilter_level
+        self.prefilter_checks = 0
+        self.prefilter_rejects = 0
+        self._prefilter_lock = threading.Lock()
         
         logger.info(f"模板匹配器初始化完成 (threshold={threshold})")
     
@@ -53,6 +175,16 @@ class TemplateMatcher:
                 'shape': template.shape[:2]  # (height, width)
             }
             
+            # 預先建立各比例的模板、金字塔與統計預篩使用的總和
+            self._prefilter_signature(self.templates[name])
+            for scale in self.scales:
+                scaled = self._scaled_template(self.templates[name], scale)
+                self._prefilter_signature(scaled)
+                if self.pyramid_levels > 0:
+                    self._template_pyramid(scaled)
+            
+            self._forget(name)
+            
             logger.success(f"✅ 載入模板: {name} ({template.shape[1]}x{template.shape[0]})")
             return True
             
@@ -60,6 +192,57 @@ class TemplateMatcher:
             logger.error(f"載入模板失敗: {e}")
             return False
     
+    def _forget(self, name: str):
+        """模板內容改變，舊的沿用結果與學習區域失效"""
+        self._reuse_cache = {
+            key: value for key, value in self._reuse_cache.items() if key[0] != name
+        }
+        self.result_cache.discard(name)
+        self.response_maps.discard(name)
+        self._hit_boxes.pop(name, None)
+        self._miss_streaks.pop(name, None)
+        self._match_scales.pop(name, None)
+        self._scale_confirmed.discard(name)
+        self._scale_misses.pop(name, None)
+        self._tracks.pop(name, None)
+    
+    def load_template_pack(self, pack_path: str) -> int:
+        """
+        載入模板包（tool_build_template_pack.py 產生）
+        
+        模板影像、金字塔與預先縮放的模板都直接映射自檔案，不需解碼或重新計算；
+        包內的閾值與搜尋區域一併套用。
+        
+        Args:
+            pack_path: 模板包路徑
+            
+        Returns:
+            載入的模板數量
+        """
+        start = time.perf_counter()
+        try:
+            header, templates = read_template_pack(pack_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"載入模板包失敗: {e}")
+            return 0
+        
+        for name, data in templates.items():
+            self.templates[name] = data
+            self._prefilter_signature(data)
+            for scaled in data['scaled'].values():
+                self._prefilter_signature(scaled)
+            self._forget(name)
+            region = header["templates"][name].get("region")
+            if region is not None:
+                self.set_search_region(name, region)
+        
+        if header["pyramid_levels"] < self.pyramid_levels or not set(self.scales) <= set(header["scales"]):
+            logger.warning("模板包的金字塔層數或縮放比例與目前設定不同，缺少的部分將在匹配時計算")
+        
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.success(f"✅ 載入模板包: {pack_path} ({len(templates)} 個模板, {elapsed:.1f} ms)")
+        return len(templates)
+    
     def load_templates_from_dir(self, directory: str) -> int:
         """
         從目錄載入所有模板
@@ -83,11 +266,103 @@ class TemplateMatcher:
                 count += 1
         
         logger.info(f"從 {directory} 載入了 {count} 個模板")
+        
+        # 目錄中有搜尋區域清單時一併載入
+        manifest = dir_path / "regions.yaml"
+        if manifest.exists():
+            self.load_search_regions(str(manifest))
+        
         return count
     
+    def set_search_region(self, name: str, rect: Optional[Tuple[int, int, int, int]]):
+        """
+        設定模板的搜尋區域
+        
+        Args:
+            name: 模板名稱
+            rect: 畫面座標 (x, y, w, h)，None 表示移除（改為學習或搜尋整個畫面）
+        """
+        if rect is None:
+            self.search_regions.pop(name, None)
+        else:
+            x, y, w, h = (int(v) for v in rect)
+            if w <= 0 or h <= 0 or x < 0 or y < 0:
+                raise ValueError(f"無效的搜尋區域: {rect}")
+            self.search_regions[name] = (x, y, w, h)
+        self._miss_streaks.pop(name, None)
+        self._reuse_cache = {
+            key: value for key, value in self._reuse_cache.items() if key[0] != name
+        }
+        self.result_cache.discard(name)
+    
+    def load_search_regions(self, manifest_path: str) -> int:
+        """
+        從清單檔載入模板搜尋區域
+        
+        清單格式（YAML），也可指定個別模板的匹配閾值：
+            button_start: [x, y, w, h]
+            button_mode: {region: [x, y, w, h], threshold: 0.85}
+        
+        Args:
+            manifest_path: 清單檔路徑
+            
+        Returns:
+            載入的區域數量
+        """
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                regions = yaml.safe_load(f) or {}
+        except Exception as e:
+            logger.error(f"載入搜尋區域失敗: {e}")
+            return 0
+        
+        count = 0
+        for name, entry in regions.items():
+            try:
+                if isinstance(entry, dict):
+                    if entry.get('threshold') is not None and name in self.templates:
+                        self.templates[name]['threshold'] = float(entry['threshold'])
+                    entry = entry.get('region')
+                    if entry is None:
+                        continue
+                self.set_search_region(name, entry)
+                count += 1
+            except (TypeError, ValueError) as e:
+                logger.warning(f"略過搜尋區域 '{name}': {e}")
+        
+        logger.info(f"從 {manifest_path} 載入了 {count} 個搜尋區域")
+        return count
+    
+    @staticmethod
+    def _to_gray(screen: Any) -> np.ndarray:
+        """
+        取得灰階影像
+        
+        FramePacket 會快取灰階結果，同一影格的多個模板只轉換一次。
+        
+        Args:
+            screen: FramePacket、BGR 影像或灰階影像
+            
+        Returns:
+            灰階影像
+        """
+        gray = getattr(screen, 'gray', None)
+        if gray is not None:
+            return gray
+        if screen.ndim == 2:
+            return screen
+        return cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+    
+    @staticmethod
+    def _to_bgr(screen: Any) -> np.ndarray:
+        """取得 BGR 影像（FramePacket 或 BGR 影像）"""
+        bgr = getattr(screen, 'bgr', None)
+        return bgr if bgr is not None else screen
+    
+    @tracer.traced('match')
     def match(
         self,
-        screen: np.ndarray,
+        screen: Any,
         template_name: str,
         method: int = cv2.TM_CCOEFF_NORMED
     ) -> Optional[Tuple[int, int, float]]:
@@ -95,7 +370,8 @@ class TemplateMatcher:
         在螢幕上尋找模板
         
         Args:
-            screen: 螢幕截圖（BGR 格式）
+            screen: 螢幕截圖（FramePacket 或 BGR 格式）。子區域封包的結果會加上 offset，
+                回傳完整畫面座標
             template_name: 模板名稱
             method: 匹配方法
             
@@ -105,106 +381,1159 @@ class TemplateMatcher:
         if template_name not in self.templates:
             logger.error(f"模板不存在: {template_name}")
             return None
+        return self._match(screen, template_name, method)
+    
+    def _match(
+        self,
+        screen: Any,
+        template_name: str,
+        method: int,
+        full_frame: bool = False
+    ) -> Optional[Tuple[int, int, float]]:
+        """
+        match() 的實作
+        
+        Args:
+            full_frame: 忽略搜尋區域，搜尋整個畫面（只沿用整個畫面都沒有變化的結果），
+                例如追蹤失敗時目標可能已離開學習到的區域
+        """
+        # 同一影格已查詢過時直接回傳
+        cache_key = self._cache_key(frame_key(screen, self.cache_by_content), template_name, method)
+        found = self.result_cache.get(cache_key)
+        if found is not MISSING:
+            self._replay_state(template_name, found)
+            return found
+        
+        # 子區域封包只涵蓋部分畫面，不參與結果沿用
+        seq = getattr(screen, 'seq', None)
+        if getattr(screen, 'roi', None) is not None:
+            seq = None
+        
+        # 搜尋區域自上次匹配後沒有變化時，沿用上次結果
+        key = (template_name, method)
+        if self._can_reuse(seq, key, full_frame):
+            self.reuse_hits += 1
+            found = self._reuse_cache[key][1]
+            self.result_cache.put(cache_key, found)
+            return found
         
         try:
-            template_data = self.templates[template_name]
-            template_gray = template_data['gray']
+            # 取得灰階影像（FramePacket 已快取時不重複轉換）
+            with tracer.span('match.gray'):
+                screen_gray = self._to_gray(screen)
+        except Exception as e:
+            logger.error(f"模板匹配失敗: {e}")
+            return None
+        
+        # 只在搜尋區域內匹配，結果換算回畫面座標
+        view, origin = (screen_gray, None) if full_frame else self._search_view(screen_gray, template_name, screen)
+        complete = origin is None and self._scale_search_complete(template_name)
+        pyramid = self._gray_pyramid(screen, screen_gray) if origin is None else None
+        found = self._offset(self._match_gray(view, template_name, method, pyramid), screen, origin)
+        self._update_region(template_name, found, origin is not None)
+        self._update_scale(template_name, found)
+        
+        self._remember(seq, key, found, complete)
+        self._cache_result(cache_key, found, complete)
+        
+        return found
+    
+    @tracer.traced('match_many')
+    def match_many(
+        self,
+        screen: Any,
+        template_names: Optional[Iterable[str]] = None,
+        method: int = cv2.TM_CCOEFF_NORMED,
+        stop_on_first: bool = False
+    ) -> Dict[str, Optional[Tuple[int, int, float]]]:
+        """
+        同時在螢幕上尋找多個模板
+        
+        灰階影像只準備一次，各模板的 cv2.matchTemplate 在執行緒池中平行執行
+        （OpenCV 執行期間會釋放 GIL）。
+        
+        Args:
+            screen: 螢幕截圖（FramePacket 或 BGR 格式）
+            template_names: 模板名稱列表，None 表示所有已載入的模板
+            method: 匹配方法
+            stop_on_first: 找到第一個匹配就停止（用於判斷目前畫面），
+                尚未開始的模板會被取消，不會出現在結果中
             
-            # 轉換螢幕截圖為灰階
-            screen_gray = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+        Returns:
+            {模板名稱: (x, y, confidence) 或 None}
+        """
+        if template_names is None:
+            template_names = self.get_template_names()
+        
+        results: Dict[str, Optional[Tuple[int, int, float]]] = {}
+        names = []
+        for name in dict.fromkeys(template_names):
+            if name not in self.templates:
+                logger.error(f"模板不存在: {name}")
+                results[name] = None
+            else:
+                names.append(name)
+        
+        seq = getattr(screen, 'seq', None)
+        if getattr(screen, 'roi', None) is not None:
+            seq = None
+        
+        # 先套用同一影格的快取與可沿用的結果，只匹配其餘模板
+        frame = frame_key(screen, self.cache_by_content)
+        pending = []
+        for name in names:
+            key = (name, method)
+            found = self.result_cache.get(self._cache_key(frame, name, method))
+            if found is not MISSING:
+                self._replay_state(name, found)
+                results[name] = found
+            elif self._can_reuse(seq, key):
+                self.reuse_hits += 1
+                results[name] = self._reuse_cache[key][1]
+                self.result_cache.put(self._cache_key(frame, name, method), results[name])
+            else:
+                pending.append(name)
+                continue
+            if stop_on_first and results[name] is not None:
+                return results
+        
+        if not pending:
+            return results
+        
+        try:
+            with tracer.span('match.gray'):
+                screen_gray = self._to_gray(screen)
+        except Exception as e:
+            logger.error(f"模板匹配失敗: {e}")
+            results.update((name, None) for name in pending)
+            return results
+        
+        # 搜尋區域在主執行緒決定，學習也在主執行緒更新
+        views = {name: self._search_view(screen_gray, name, screen) for name in pending}
+        # 畫面金字塔也只建立一次（搜尋區域較小，在工作執行緒中各自建立）
+        pyramid = None
+        if any(origin is None for _, origin in views.values()):
+            pyramid = self._gray_pyramid(screen, screen_gray)
+        all_scales = {name: self._scale_search_complete(name) for name in pending}
+        
+        def args(name: str) -> tuple:
+            view, origin = views[name]
+            return view, name, method, pyramid if origin is None else None
+        
+        def store(name: str, found: Optional[Tuple[int, int, float]]) -> Optional[Tuple[int, int, float]]:
+            origin = views[name][1]
+            found = self._offset(found, screen, origin)
+            self._update_region(name, found, origin is not None)
+            self._update_scale(name, found)
+            results[name] = found
+            complete = origin is None and all_scales[name]
+            self._remember(seq, (name, method), found, complete)
+            self._cache_result(self._cache_key(frame, name, method), found, complete)
+            return found
+        
+        if self.workers <= 1 or len(pending) == 1:
+            for name in pending:
+                if store(name, self._match_gray(*args(name))) and stop_on_first:
+                    break
+            return results
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix='template-match'
+            )
+        
+        futures = {
+            self._executor.submit(self._match_gray, *args(name)): name
+            for name in pending
+        }
+        not_done = set(futures)
+        while not_done:
+            done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+            hit = False
+            for future in done:
+                if store(futures[future], future.result()) is not None:
+                    hit = True
+            if hit and stop_on_first:
+                for future in not_done:
+                    future.cancel()
+                break
+        
+        return results
+
+    def match_screen(
+        self,
+        screen: Any,
+        method: int = cv2.TM_CCOEFF_NORMED,
+        stop_on_first: bool = False
+    ) -> Tuple[Optional[str], Dict[str, Optional[Tuple[int, int, float]]]]:
+        """
+        先辨識畫面狀態，再只匹配與該狀態相關的模板
+
+        未設定 state_index、無法辨識畫面，或該狀態沒有對應的模板清單時，匹配所有模板。
+
+        Args:
+            screen: 螢幕截圖（FramePacket 或 BGR 格式）
+            method: 匹配方法
+            stop_on_first: 找到第一個匹配就停止
+
+        Returns:
+            (畫面狀態或 None, {模板名稱: (x, y, confidence) 或 None})
+        """
+        state = None
+        template_names = None
+        if self.state_index is not None:
+            with tracer.span('match.state'):
+                state, _ = self.state_index.classify(screen)
+            if state is not None:
+                template_names = self.state_index.templates.get(state)
+
+        self.last_state = state
+        return state, self.match_many(screen, template_names, method, stop_on_first)
+
+    @tracer.traced('track')
+    def track(
+        self,
+        screen: Any,
+        template_name: str,
+        method: int = cv2.TM_CCOEFF_NORMED
+    ) -> Optional[Tuple[int, int, float, bool]]:
+        """
+        追蹤模板（適合移動中的目標）
+        
+        依上次的位置與速度預測本幀位置，先只在預測位置附近的小視窗匹配；
+        未找到時將視窗半徑加倍重試，仍未找到才搜尋整個畫面（不限於搜尋區域）。
+        
+        Args:
+            screen: 螢幕截圖（FramePacket 或 BGR 格式）
+            template_name: 模板名稱
+            method: 匹配方法
             
-            # 模板匹配
-            result = cv2.matchTemplate(screen_gray, template_gray, method)
+        Returns:
+            (x, y, confidence, tracked) 或 None。tracked 為 True 表示在預測視窗內找到，
+            False 表示來自完整搜尋
+        """
+        if template_name not in self.templates:
+            logger.error(f"模板不存在: {template_name}")
+            return None
+        
+        state = self._tracks.get(template_name)
+        seq = getattr(screen, 'seq', None)
+        if state is not None:
+            # 以影格序號計算經過的幀數（沒有序號時視為 1 幀）
+            frames = seq - state['seq'] if seq is not None and state['seq'] is not None and seq > state['seq'] else 1
+            dx, dy = state['vx'] * frames, state['vy'] * frames
+            predicted = (state['x'] + dx, state['y'] + dy)
+            radius = self.track_radius + int(abs(dx) + abs(dy)) // 2
             
-            # 取得最佳匹配位置
-            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            try:
+                screen_gray = self._to_gray(screen)
+            except Exception as e:
+                logger.error(f"模板匹配失敗: {e}")
+                return None
             
-            # 根據方法選擇位置
-            if method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED]:
-                match_loc = min_loc
-                confidence = 1 - min_val
+            for step in range(self.track_widen_steps + 1):
+                found = self._match_window(screen_gray, template_name, method, predicted, radius << step, screen)
+                if found is not None:
+                    self.track_hits += 1
+                    self._update_track(template_name, found, seq)
+                    return found + (True,)
+        
+        self.track_searches += 1
+        # 目標可能已離開學習到的搜尋區域，略過區域直接搜尋整個畫面
+        found = self._match(screen, template_name, method, full_frame=True)
+        if found is None:
+            self._tracks.pop(template_name, None)
+            return None
+        self._update_track(template_name, found, seq)
+        return found + (False,)
+    
+    def _match_window(
+        self,
+        screen_gray: np.ndarray,
+        template_name: str,
+        method: int,
+        center: Tuple[float, float],
+        radius: int,
+        screen: Any
+    ) -> Optional[Tuple[int, int, float]]:
+        """
+        只在預測中心點附近的視窗內匹配
+        
+        Args:
+            center: 預測的模板中心點（畫面座標）
+            radius: 視窗在模板外框四周延伸的距離（像素）
+        
+        Returns:
+            (x, y, confidence)（畫面座標）或 None
+        """
+        template_data = self.templates[template_name]
+        scale = self._match_scales.get(template_name, self.locked_scale or 1.0)
+        scaled = self._scaled_template(template_data, scale)
+        h, w = scaled['shape']
+        
+        offset_x, offset_y = getattr(screen, 'offset', None) or (0, 0)
+        cx, cy = int(round(center[0])) - offset_x, int(round(center[1])) - offset_y
+        x0, y0 = max(cx - w // 2 - radius, 0), max(cy - h // 2 - radius, 0)
+        x1 = min(cx - w // 2 + w + radius, screen_gray.shape[1])
+        y1 = min(cy - h // 2 + h + radius, screen_gray.shape[0])
+        if x1 - x0 < w or y1 - y0 < h:
+            return None
+        
+        with tracer.span('match.window', template=template_name, radius=radius):
+            loc, confidence = self._locate(screen_gray[y0:y1, x0:x1], scaled, method, coarse_to_fine=False)
+        if confidence < template_data.get('threshold', self.threshold):
+            return None
+        
+        found = (loc[0] + w // 2, loc[1] + h // 2, confidence)
+        return self._offset(found, screen, (x0, y0))
+    
+    def _update_track(self, template_name: str, found: Tuple[int, int, float], seq: Optional[int]):
+        """更新追蹤位置與速度（速度為每幀位移的指數平均）"""
+        state = self._tracks.get(template_name)
+        x, y = found[0], found[1]
+        if state is None:
+            self._tracks[template_name] = {'x': x, 'y': y, 'vx': 0.0, 'vy': 0.0, 'seq': seq}
+            return
+        
+        frames = seq - state['seq'] if seq is not None and state['seq'] is not None and seq > state['seq'] else 1
+        vx, vy = (x - state['x']) / frames, (y - state['y']) / frames
+        state['vx'] = 0.5 * state['vx'] + 0.5 * vx
+        state['vy'] = 0.5 * state['vy'] + 0.5 * vy
+        state['x'], state['y'], state['seq'] = x, y, seq
+    
+    def reset_track(self, template_name: Optional[str] = None):
+        """
+        清除追蹤狀態
+        
+        Args:
+            template_name: 模板名稱，None 表示全部
+        """
+        if template_name is None:
+            self._tracks.clear()
+        else:
+            self._tracks.pop(template_name, None)
+    
+    @staticmethod
+    def _offset(
+        found: Optional[Tuple[int, int, float]],
+        screen: Any,
+        origin: Optional[Tuple[int, int]] = None
+    ) -> Optional[Tuple[int, int, float]]:
+        """將子區域封包（及搜尋區域 origin）上的匹配座標換算為完整畫面座標"""
+        if found is None:
+            return None
+        offset_x, offset_y = getattr(screen, 'offset', None) or (0, 0)
+        if origin is not None:
+            offset_x += origin[0]
+            offset_y += origin[1]
+        if offset_x == 0 and offset_y == 0:
+            return found
+        return (found[0] + offset_x, found[1] + offset_y, found[2])
+    
+    def _search_rect(self, template_name: str) -> Optional[Tuple[int, int, int, int]]:
+        """
+        取得模板的搜尋區域 (x, y, w, h)
+        
+        宣告的區域優先，其次為學習到的區域；連續未匹配達 region_miss_limit 次時
+        回傳 None，改為搜尋整個畫面一次。
+        
+        Returns:
+            搜尋區域（畫面座標），None 表示整個畫面
+        """
+        if self._miss_streaks.get(template_name, 0) >= self.region_miss_limit:
+            return None
+        
+        rect = self.search_regions.get(template_name)
+        if rect is not None:
+            return rect
+        
+        box = self._hit_boxes.get(template_name)
+        if box is None:
+            return None
+        margin = self.region_margin
+        x0, y0 = max(box[0] - margin, 0), max(box[1] - margin, 0)
+        return (x0, y0, box[2] + margin - x0, box[3] + margin - y0)
+    
+    def _search_view(
+        self,
+        screen_gray: np.ndarray,
+        template_name: str,
+        screen: Any
+    ) -> Tuple[np.ndarray, Optional[Tuple[int, int]]]:
+        """
+        取得搜尋區域的灰階 view（不複製像素）
+        
+        Returns:
+            (view, 區域在影像中的左上角)，搜尋整個影像時左上角為 None
+        """
+        rect = self._search_rect(template_name)
+        if rect is None:
+            return screen_gray, None
+        
+        # 搜尋區域為畫面座標，換算為（子區域）影像座標並裁切到影像範圍內
+        offset_x, offset_y = getattr(screen, 'offset', None) or (0, 0)
+        x, y, w, h = rect
+        x0, y0 = max(x - offset_x, 0), max(y - offset_y, 0)
+        x1 = min(x - offset_x + w, screen_gray.shape[1])
+        y1 = min(y - offset_y + h, screen_gray.shape[0])
+        
+        th, tw = self.template_shape(template_name)
+        if x1 - x0 < tw or y1 - y0 < th:
+            return screen_gray, None
+        return screen_gray[y0:y1, x0:x1], (x0, y0)
+    
+    def _update_region(
+        self,
+        template_name: str,
+        found: Optional[Tuple[int, int, float]],
+        regional: bool
+    ):
+        """依匹配結果更新未匹配次數與學習區域"""
+        if found is None:
+            # 整個畫面也找不到時重新計數，之後繼續只搜尋區域
+            self._miss_streaks[template_name] = self._miss_streaks.get(template_name, 0) + 1 if regional else 0
+            return
+        
+        self._miss_streaks[template_name] = 0
+        if not self.learn_regions or template_name in self.search_regions:
+            return
+        
+        h, w = self.template_shape(template_name)
+        x0, y0 = found[0] - w // 2, found[1] - h // 2
+        x1, y1 = x0 + w, y0 + h
+        box = self._hit_boxes.get(template_name)
+        if box is None or not regional:
+            # 首次匹配，或在區域外找到（位置已改變）時重新學習
+            self._hit_boxes[template_name] = [x0, y0, x1, y1]
+        else:
+            box[0], box[1] = min(box[0], x0), min(box[1], y0)
+            box[2], box[3] = max(box[2], x1), max(box[3], y1)
+    
+    def _cache_key(self, frame: Any, template_name: str, method: int) -> tuple:
+        """結果快取的鍵（包含生效的閾值，修改閾值後不會取得舊結果）"""
+        threshold = self.templates[template_name].get('threshold', self.threshold)
+        return (frame, template_name, method, threshold)
+    
+    def _cache_result(self, key: tuple, found: Optional[Tuple[int, int, float]], complete: bool):
+        """
+        保存匹配結果
+        
+        只在搜尋區域內或只以鎖定比例搜尋而未找到時，同一影格的下次查詢
+        可能改為完整搜尋（未匹配次數達到上限），此時不保存。
+        """
+        if found is not None or complete:
+            self.result_cache.put(key, found)
+    
+    def _replay_state(self, template_name: str, found: Optional[Tuple[int, int, float]]):
+        """
+        快取命中時仍更新未匹配次數、學習區域與鎖定比例，與重新匹配同一影格的結果一致
+        """
+        self._update_region(template_name, found, self._search_rect(template_name) is not None)
+        self._update_scale(template_name, found)
+    
+    def _remember(
+        self,
+        seq: Optional[int],
+        key: Tuple[str, int],
+        found: Optional[Tuple[int, int, float]],
+        complete: bool
+    ):
+        """
+        保存可在畫面未變化時沿用的結果
+        
+        與 _cache_result() 相同，只在搜尋區域內或只以鎖定比例搜尋而未找到時不保存：
+        沿用這種結果會讓未匹配次數停止累計，永遠不會改為完整搜尋。
+        """
+        if seq is None or self.change_detector is None:
+            return
+        if found is not None or complete:
+            self._reuse_cache[key] = (seq, found)
+        else:
+            self._reuse_cache.pop(key, None)
+    
+    def _can_reuse(self, seq: Optional[int], key: Tuple[str, int], full_frame: bool = False) -> bool:
+        """判斷是否可以沿用上次的匹配結果（full_frame 時整個畫面都必須沒有變化）"""
+        detector = self.change_detector
+        if seq is None or detector is None or key not in self._reuse_cache:
+            return False
+        
+        cached_seq = self._reuse_cache[key][0]
+        # 偵測器必須已看過目前影格，且快取不可來自未來（例如擷取器重新啟動）
+        if cached_seq > seq or detector.last_seq < seq:
+            return False
+        
+        rect = None if full_frame else self._search_rect(key[0])
+        return not detector.changed_since(cached_seq, rect)
+    
+    @staticmethod
+    def _scale_list(scale_range: Optional[Sequence[float]], step: float) -> List[float]:
+        """產生縮放比例列表（包含 1.0）"""
+        if scale_range is None:
+            return [1.0]
+        low, high = scale_range
+        if low <= 0 or high < low or step <= 0:
+            raise ValueError(f"無效的縮放範圍: {scale_range} (step={step})")
+        scales = {round(float(v), 4) for v in np.arange(low, high + step / 2, step)}
+        scales.add(1.0)
+        return sorted(scales)
+    
+    @staticmethod
+    def _scaled_template(template_data: Dict[str, Any], scale: float) -> Dict[str, Any]:
+        """
+        取得縮放後的模板（每個比例只計算一次）
+        
+        Returns:
+            {'gray', 'shape'}，比例為 1.0 時回傳原始模板資料
+        """
+        if scale == 1.0:
+            return template_data
+        scaled = template_data.setdefault('scaled', {})
+        data = scaled.get(scale)
+        if data is None:
+            h, w = template_data['shape']
+            size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            gray = cv2.resize(template_data['gray'], size, interpolation=interpolation)
+            data = {'gray': gray, 'shape': gray.shape[:2]}
+            scaled[scale] = data
+        return data
+    
+    def template_shape(self, template_name: str) -> Tuple[int, int]:
+        """
+        取得模板在最近一次匹配比例下的大小
+        
+        Returns:
+            (height, width)
+        """
+        scale = self._match_scales.get(template_name, self.locked_scale or 1.0)
+        return self._scaled_template(self.templates[template_name], scale)['shape']
+    
+    def _search_scales(self, template_name: str) -> List[float]:
+        """
+        本次匹配要搜尋的比例
+        
+        已鎖定時只搜尋鎖定的比例；曾以鎖定比例匹配的模板連續未匹配達 scale_miss_limit 次時，
+        該模板重新搜尋所有比例一次。
+        """
+        if self.locked_scale is None:
+            return self.scales
+        if (template_name in self._scale_confirmed
+                and self._scale_misses.get(template_name, 0) >= self.scale_miss_limit):
+            return self.scales
+        return [self.locked_scale]
+    
+    def _scale_search_complete(self, template_name: str) -> bool:
+        """本次匹配未找到時，同一影格的下次匹配是否仍搜尋相同的比例（結果可以保存）"""
+        if len(self._search_scales(template_name)) == len(self.scales):
+            return True
+        return template_name not in self._scale_confirmed
+    
+    def _update_scale(self, template_name: str, found: Optional[Tuple[int, int, float]]):
+        """
+        依匹配結果鎖定比例或累計未匹配次數
+        
+        鎖定後只有未鎖定比例搜尋的模板（曾以鎖定比例匹配、重新搜尋所有比例）會找到其他比例，
+        因此從未匹配過的模板的誤判不會改變鎖定。
+        """
+        if len(self.scales) == 1:
+            return
+        
+        if found is not None:
+            self._scale_misses[template_name] = 0
+            scale = self._match_scales.get(template_name, 1.0)
+            if scale != self.locked_scale:
+                logger.info(f"🔒 鎖定模板縮放比例: {scale:.2f} ('{template_name}')")
+                self.locked_scale = scale
+                self._scale_confirmed = {template_name}
+                self._scale_misses = {}
             else:
-                match_loc = max_loc
-                confidence = max_val
+                self._scale_confirmed.add(template_name)
+        elif self.locked_scale is not None and template_name in self._scale_confirmed:
+            if self._scale_misses.get(template_name, 0) >= self.scale_miss_limit:
+                # 已重新搜尋所有比例仍未找到，維持鎖定並重新計數
+                self._scale_misses[template_name] = 0
+            else:
+                self._scale_misses[template_name] = self._scale_misses.get(template_name, 0) + 1
+    
+    def reset_scale(self):
+        """解除鎖定的比例（視窗大小改變時呼叫），下次匹配重新搜尋所有比例"""
+        self.locked_scale = None
+        self._scale_confirmed = set()
+        self._scale_misses = {}
+        self._match_scales.clear()
+    
+    def _gray_pyramid(self, screen: Any, screen_gray: np.ndarray) -> Optional[List[np.ndarray]]:
+        """
+        取得畫面的灰階金字塔（FramePacket 會快取，同一影格只建立一次）
+        
+        Returns:
+            [第 0 層, 第 1 層, ...]，停用金字塔匹配時回傳 None
+        """
+        if self.pyramid_levels <= 0:
+            return None
+        levels = self.pyramid_levels + 1
+        if hasattr(screen, 'pyramid'):
+            return screen.pyramid(levels)
+        return self._build_pyramid(screen_gray, levels)
+    
+    @staticmethod
+    def _build_pyramid(gray: np.ndarray, levels: int) -> List[np.ndarray]:
+        """逐層 pyrDown 建立金字塔（包含原始解析度的第 0 層）"""
+        pyramid = [gray]
+        while len(pyramid) < levels and min(pyramid[-1].shape[:2]) >= 2:
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+    
+    def _template_pyramid(self, template_data: Dict[str, Any]) -> List[np.ndarray]:
+        """
+        取得模板金字塔（縮小後邊長不小於 pyramid_min_size 的層級）
+        
+        Returns:
+            [第 0 層, 第 1 層, ...]，只有第 0 層表示模板太小，不使用金字塔匹配
+        """
+        pyramid = template_data.get('pyramid')
+        if pyramid is None or pyramid[0] is not template_data['gray']:
+            pyramid = [template_data['gray']]
+        
+        # 層數不足時補上（例如模板包以較少的層數編譯）；建立新列表再替換，
+        # match_many() 的工作執行緒同時讀取也不會看到建到一半的金字塔
+        levels = pyramid
+        while len(levels) <= self.pyramid_levels:
+            h, w = levels[-1].shape[:2]
+            if min(h // 2, w // 2) < self.pyramid_min_size:
+                break
+            levels = levels + [cv2.pyrDown(levels[-1])]
+        if levels is not template_data.get('pyramid'):
+            template_data['pyramid'] = levels
+        return levels[:self.pyramid_levels + 1]
+    
+    def _locate(
+        self,
+        screen_gray: np.ndarray,
+        template_data: Dict[str, Any],
+        method: int,
+        pyramid: Optional[List[np.ndarray]] = None,
+        coarse_to_fine: bool = True
+    ) -> Tuple[Tuple[int, int], float]:
+        """
+        找出最佳匹配位置
+        
+        Args:
+            coarse_to_fine: 是否允許金字塔匹配（小視窗直接完整匹配較快）
+        
+        Returns:
+            (左上角位置, 信心度)
+        """
+        template_gray = template_data['gray']
+        
+        # 金字塔匹配只支援以最大值為最佳的正規化方法
+        if coarse_to_fine and self.pyramid_levels > 0 and method in (cv2.TM_CCOEFF_NORMED, cv2.TM_CCORR_NORMED):
+            templates = self._template_pyramid(template_data)
+            if len(templates) > 1:
+                if pyramid is None or pyramid[0] is not screen_gray:
+                    pyramid = self._build_pyramid(screen_gray, len(templates))
+                level = min(len(templates), len(pyramid)) - 1
+                coarse = pyramid[level]
+                coarse_template = templates[level]
+                if (level > 0 and coarse.shape[0] >= coarse_template.shape[0]
+                        and coarse.shape[1] >= coarse_template.shape[1]):
+                    return self._locate_pyramid(screen_gray, template_gray, coarse, coarse_template, level, method)
+        
+        result = cv2.matchTemplate(screen_gray, template_gray, method)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        
+        # 根據方法選擇位置
+        if method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED]:
+            return min_loc, 1 - min_val
+        return max_loc, max_val
+    
+    def _locate_pyramid(
+        self,
+        screen_gray: np.ndarray,
+        template_gray: np.ndarray,
+        coarse: np.ndarray,
+        coarse_template: np.ndarray,
+        level: int,
+        method: int
+    ) -> Tuple[Tuple[int, int], float]:
+        """
+        在縮小層找出候選位置，再以原始解析度只匹配候選位置附近的小視窗
+        
+        原始解析度的匹配值與完整匹配相同，因此信心度不受縮小影響。
+        
+        Returns:
+            (左上角位置, 信心度)
+        """
+        with tracer.span('match.coarse', level=level):
+            result = cv2.matchTemplate(coarse, coarse_template, method)
+        
+        scale = 1 << level
+        radius = 2 * scale  # pyrDown 的位置誤差約為 scale 像素
+        th, tw = template_gray.shape[:2]
+        ch, cw = coarse_template.shape[:2]
+        max_x = screen_gray.shape[1] - tw
+        max_y = screen_gray.shape[0] - th
+        
+        best_loc, best_val = (0, 0), -1.0
+        for _ in range(self.pyramid_candidates):
+            _, coarse_val, _, (cx, cy) = cv2.minMaxLoc(result)
+            if coarse_val <= -1.0:
+                break
+            # 抑制同一個峰附近的候選
+            result[max(cy - ch // 2, 0):cy + ch // 2 + 1, max(cx - cw // 2, 0):cx + cw // 2 + 1] = -1.0
+            
+            x0 = min(max(cx * scale - radius, 0), max_x)
+            y0 = min(max(cy * scale - radius, 0), max_y)
+            x1 = min(cx * scale + radius, max_x)
+            y1 = min(cy * scale + radius, max_y)
+            window = screen_gray[y0:y1 + th, x0:x1 + tw]
+            
+            refined = cv2.matchTemplate(window, template_gray, method)
+            _, val, _, (rx, ry) = cv2.minMaxLoc(refined)
+            if val > best_val:
+                best_loc, best_val = (x0 + rx, y0 + ry), val
+        
+        return best_loc, best_val
+    
+    def _match_gray(
+        self,
+        screen_gray: np.ndarray,
+        template_name: str,
+        method: int,
+        pyramid: Optional[List[np.ndarray]] = None
+    ) -> Optional[Tuple[int, int, float]]:
+        """
+        在灰階影像上尋找模板
+        
+        Args:
+            screen_gray: 灰階影像
+            template_name: 模板名稱
+            method: 匹配方法
+            pyramid: screen_gray 的金字塔（None 表示需要時自行建立）
+        
+        Returns:
+            (x, y, confidence) 或 None
+        """
+        try:
+            template_data = self.templates[template_name]
+            
+            # 統計預篩：排除不可能達到閾值的比例，全部排除時不執行 matchTemplate
+            scales = self._search_scales(template_name)
+            threshold = template_data.get('threshold', self.threshold)
+            if self.prefilter_level > 0:
+                with tracer.span('match.prefilter', template=template_name):
+                    scales = self._prefilter(screen_gray, template_data, scales, method, threshold)
+                if not scales:
+                    logger.debug(f"模板 '{template_name}' 未通過統計預篩")
+                    return None
+            
+            # 模板匹配（多尺度時取信心度最高的比例）
+            best = None
+            with tracer.span('match.template', template=template_name):
+                for scale in scales:
+                    scaled = self._scaled_template(template_data, scale)
+                    h, w = scaled['shape']
+                    if h > screen_gray.shape[0] or w > screen_gray.shape[1]:
+                        continue
+                    loc, value = self._locate(screen_gray, scaled, method, pyramid)
+                    if best is None or value > best[1]:
+                        best = (loc, value, scale, scaled['shape'])
+            
+            if best is None:
+                logger.debug(f"模板 '{template_name}' 大於搜尋影像")
+                return None
+            match_loc, confidence, scale, (h, w) = best
+            self._match_scales[template_name] = scale
             
             # 檢查信心度
-            if confidence >= self.threshold:
+            if confidence >= threshold:
                 # 計算中心點
-                h, w = template_data['shape']
                 center_x = match_loc[0] + w // 2
                 center_y = match_loc[1] + h // 2
                 
-                logger.debug(
-                    f"✅ 找到模板 '{template_name}' "
-                    f"at ({center_x}, {center_y}), "
-                    f"confidence={confidence:.2f}"
-                )
+                with tracer.span('match.log'):
+                    logger.debug(
+                        f"✅ 找到模板 '{template_name}' "
+                        f"at ({center_x}, {center_y}), "
+                        f"confidence={confidence:.2f}"
+                    )
                 
                 return (center_x, center_y, confidence)
             else:
-                logger.debug(
-                    f"未找到模板 '{template_name}' "
-                    f"(confidence={confidence:.2f} < {self.threshold})"
-                )
+                with tracer.span('match.log'):
+                    logger.debug(
+                        f"未找到模板 '{template_name}' "
+                        f"(confidence={confidence:.2f} < {threshold})"
+                    )
                 return None
                 
         except Exception as e:
             logger.error(f"模板匹配失敗: {e}")
             return None
     
+    def _prefilter(
+        self,
+        screen_gray: np.ndarray,
+        template_data: Dict[str, Any],
+        scales: List[float],
+        method: int,
+        threshold: float
+    ) -> List[float]:
+        """
+        以視窗的像素總和與平方和排除不可能達到閾值的比例
+        
+        畫面每 f x f 像素分為一格，以格子總和的積分影像取得每組位置（左上角在同一格內的視窗）
+        的總和 S 與平方和 Q 的上下界：完整落在視窗內的格子為下界，視窗碰到的格子為上界
+        （像素值不為負）。由 Cauchy-Schwarz 不等式，模板與視窗的相關 sum(T * I) 不超過
+        sum(T) * S / n + sqrt(模板變異量 * 視窗變異量)，再依匹配方法換算為信心度的上界；
+        所有位置的上界都低於閾值時，matchTemplate 一定找不到匹配，因此不會排除真正的匹配。
+        
+        TM_CCOEFF 系列不受亮度與對比影響，信心度無法以總和與平方和限制，不執行預篩；
+        TM_CCORR_NORMED 的上界幾乎不會低於閾值，也不執行。
+        
+        Args:
+            screen_gray: 灰階搜尋影像
+            template_data: 模板資料
+            scales: 要搜尋的比例
+            method: 匹配方法
+            threshold: 模板的信心閾值
+        
+        Returns:
+            可能達到閾值的比例（大於搜尋影像的比例保留，由匹配時略過）
+        """
+        if method not in _PREFILTER_METHODS:
+            return scales
+        
+        factor = 2 ** self.prefilter_level
+        sums = squares = None
+        passed = []
+        for scale in scales:
+            scaled = self._scaled_template(template_data, scale)
+            h, w = scaled['shape']
+            if h > screen_gray.shape[0] or w > screen_gray.shape[1]:
+                passed.append(scale)
+                continue
+            if sums is None:
+                sums, squares = self._block_integrals(screen_gray, factor)
+            
+            s_low, s_high = self._window_bounds(sums, screen_gray.shape, h, w, factor)
+            q_low, q_high = self._window_bounds(squares, screen_gray.shape, h, w, factor)
+            signature = self._prefilter_signature(scaled)
+            if self._may_reach(signature, h * w, s_low, s_high, q_low, q_high, method, threshold).any():
+                passed.append(scale)
+        
+        with self._prefilter_lock:
+            self.prefilter_checks += 1
+            if not passed:
+                self.prefilter_rejects += 1
+        return passed
+    
+    @staticmethod
+    def _prefilter_signature(template_data: Dict[str, Any]) -> Tuple[float, float]:
+        """
+        模板的像素總和與平方和（統計預篩使用）
+        
+        載入模板時計算並保存在模板資料中；直接加入 templates 的模板在第一次預篩時計算。
+        """
+        signature = template_data.get('prefilter')
+        if signature is None:
+            gray = template_data['gray'].astype(np.float64)
+            signature = (float(gray.sum()), float((gray * gray).sum()))
+            template_data['prefilter'] = signature
+        return signature
+    
+    @staticmethod
+    def _may_reach(
+        signature: Tuple[float, float],
+        n: int,
+        s_low: np.ndarray,
+        s_high: np.ndarray,
+        q_low: np.ndarray,
+        q_high: np.ndarray,
+        method: int,
+        threshold: float
+    ) -> np.ndarray:
+        """
+        每組位置的信心度上界是否可能達到閾值
+        
+        Args:
+            signature: （縮放後的）模板的像素總和與平方和（_prefilter_signature()）
+            n: 模板像素數
+            s_low, s_high: 視窗總和的上下界
+            q_low, q_high: 視窗平方和的上下界
+        
+        Returns:
+            布林陣列
+        """
+        t_sum, t_squares = signature
+        
+        # sum(T * I) 的上界，兩種上界取較小者；另外保留浮點誤差（matchTemplate 以 float32 計算）
+        t_var = max(t_squares - t_sum * t_sum / n, 0.0)
+        i_var = np.maximum(q_high - s_low * s_low / n, 0.0)
+        cross = np.minimum(
+            t_sum * s_high / n + np.sqrt(t_var * i_var),
+            np.sqrt(t_squares * q_high)
+        ) * (1 + _PREFILTER_EPS)
+        q_low = q_low * (1 - _PREFILTER_EPS)
+        
+        if method == cv2.TM_CCORR:
+            return cross >= threshold
+        # 平方差 sum((T - I)^2) = sum(T^2) + Q - 2 * sum(T * I) 的下界
+        sqdiff = t_squares + q_low - 2 * cross
+        if method == cv2.TM_SQDIFF:
+            return 1 - sqdiff >= threshold
+        return sqdiff <= (1 - threshold + _PREFILTER_EPS) * np.sqrt(t_squares * q_high)
+    
+    @staticmethod
+    def _window_bounds(
+        integral: np.ndarray,
+        shape: Tuple[int, int],
+        h: int,
+        w: int,
+        factor: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        h x w 視窗總和的上下界（每組位置一個值，左上角在同一個 factor x factor 格子內的位置為一組）
+        
+        Args:
+            integral: 格子總和的積分影像（_block_integrals()）
+            shape: 搜尋影像大小 (高, 寬)
+        
+        Returns:
+            (下界, 上界)
+        """
+        groups_y = (shape[0] - h) // factor + 1
+        groups_x = (shape[1] - w) // factor + 1
+        
+        def box(offset: int, rows: int, cols: int) -> np.ndarray:
+            if rows <= 0 or cols <= 0:
+                return np.zeros((groups_y, groups_x))
+            y0, x0 = offset, offset
+            y1, x1 = y0 + rows, x0 + cols
+            return (
+                integral[y1:y1 + groups_y, x1:x1 + groups_x] - integral[y0:y0 + groups_y, x1:x1 + groups_x]
+                - integral[y1:y1 + groups_y, x0:x0 + groups_x] + integral[y0:y0 + groups_y, x0:x0 + groups_x]
+            )
+        
+        # 完整落在組內每個視窗中的格子，與組內任一視窗碰到的格子
+        inner = box(1, h // factor - 1, w // factor - 1)
+        outer = box(0, (h + factor - 2) // factor + 1, (w + factor - 2) // factor + 1)
+        # 縮小時的四捨五入誤差每個像素最多 1
+        slack = factor * factor
+        inner_blocks = max(h // factor - 1, 0) * max(w // factor - 1, 0)
+        outer_blocks = ((h + factor - 2) // factor + 1) * ((w + factor - 2) // factor + 1)
+        return np.maximum(inner - inner_blocks * slack, 0.0), outer + outer_blocks * slack
+    
+    @staticmethod
+    def _block_integrals(gray: np.ndarray, factor: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        每 factor x factor 格子的像素總和與平方和的積分影像
+        
+        影像以 0 補到 factor 的倍數再多一格（視窗碰到的格子不會超出範圍），
+        以 INTER_AREA 縮小取得格子平均後乘回像素數。
+        """
+        h, w = gray.shape[:2]
+        rows, cols = -(-h // factor) + 1, -(-w // factor) + 1
+        padded = cv2.copyMakeBorder(gray, 0, rows * factor - h, 0, cols * factor - w, cv2.BORDER_CONSTANT, value=0)
+        squares = cv2.LUT(padded, _SQUARE_LUT)
+        if factor > 1:
+            padded = cv2.resize(padded, (cols, rows), interpolation=cv2.INTER_AREA)
+            squares = cv2.resize(squares, (cols, rows), interpolation=cv2.INTER_AREA)
+        area = float(factor * factor)
+        return (
+            cv2.integral(padded, sdepth=cv2.CV_64F) * area,
+            cv2.integral(squares, sdepth=cv2.CV_64F) * area,
+        )
+    
+    @property
+    def prefilter_rejection_rate(self) -> float:
+        """統計預篩排除的比例"""
+        return self.prefilter_rejects / self.prefilter_checks if self.prefilter_checks else 0.0
+    
+    @tracer.traced('match_all')
     def match_all(
         self,
-        screen: np.ndarray,
+        screen: Any,
         template_name: str,
-        method: int = cv2.TM_CCOEFF_NORMED
+        method: int = cv2.TM_CCOEFF_NORMED,
+        iou_threshold: float = 0.3,
+        min_distance: Optional[int] = None,
+        top_k: Optional[int] = None
     ) -> List[Tuple[int, int, float]]:
         """
         在螢幕上尋找所有匹配的模板位置
         
+        只取匹配結果的局部最大值，再以非極大值抑制（NMS）合併重疊的位置，
+        每個物件只回傳一個結果。
+        
         Args:
-            screen: 螢幕截圖（BGR 格式）
+            screen: 螢幕截圖（FramePacket 或 BGR 格式）
             template_name: 模板名稱
             method: 匹配方法
+            iou_threshold: 與已保留結果的外框 IoU 超過此值時捨棄
+            min_distance: 提供時改以中心點距離抑制：與已保留結果的距離小於此值（像素）時捨棄
+            top_k: 最多回傳的數量，None 表示不限制
             
         Returns:
-            [(x, y, confidence), ...] 列表
+            [(x, y, confidence), ...] 列表（依信心度由高到低）
         """
         if template_name not in self.templates:
             logger.error(f"模板不存在: {template_name}")
             return []
         
+        # 同一影格以相同參數查詢過時直接回傳
+        scale = self.locked_scale or 1.0
+        cache_key = self._cache_key(frame_key(screen, self.cache_by_content), template_name, method) + (
+            'all', scale, iou_threshold, min_distance, top_k
+        )
+        matches = self.result_cache.get(cache_key)
+        if matches is not MISSING:
+            return list(matches)
+        
         try:
-            template_data = self.templates[template_name]
-            template_gray = template_data['gray']
-            h, w = template_data['shape']
-            
-            # 轉換螢幕截圖為灰階
-            screen_gray = cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)
+            # 已鎖定比例時使用該比例的模板
+            threshold = self.templates[template_name].get('threshold', self.threshold)
+            h, w = self._scaled_template(self.templates[template_name], scale)['shape']
+            result = self.response_map(screen, template_name, method)
             
-            # 模板匹配
-            result = cv2.matchTemplate(screen_gray, template_gray, method)
+            with tracer.span('match_all.peaks'):
+                if min_distance:
+                    radius = min_distance
+                else:
+                    # 鄰域內的候選與中心外框的 IoU 必定超過閾值，一定會被抑制
+                    ratio = 2 * iou_threshold / (1 + iou_threshold)
+                    radius = int(min(w, h) * (1 - ratio ** 0.5))
+                xs, ys, scores = self._find_peaks(result, method, radius, threshold)
+                keep = self._nms(xs, ys, w, h, iou_threshold, min_distance, top_k)
             
-            # 找出所有超過閾值的位置
-            locations = np.where(result >= self.threshold)
+            offset_x, offset_y = getattr(screen, 'offset', (0, 0))
+            matches = [
+                (int(xs[i]) + w // 2 + offset_x, int(ys[i]) + h // 2 + offset_y, float(scores[i]))
+                for i in keep
+            ]
             
-            matches = []
-            for pt in zip(*locations[::-1]):
-                center_x = pt[0] + w // 2
-                center_y = pt[1] + h // 2
-                confidence = result[pt[1], pt[0]]
-                matches.append((center_x, center_y, float(confidence)))
-            
-            logger.debug(f"找到 {len(matches)} 個匹配的 '{template_name}'")
+            logger.debug(f"找到 {len(matches)} 個匹配的 '{template_name}'（候選 {len(xs)} 個）")
             
+            self.result_cache.put(cache_key, tuple(matches))
             return matches
             
         except Exception as e:
             logger.error(f"批量模板匹配失敗: {e}")
             return []
     
+    def response_map(
+        self,
+        screen: Any,
+        template_name: str,
+        method: int = cv2.TM_CCOEFF_NORMED
+    ) -> Optional[np.ndarray]:
+        """
+        取得整個畫面的匹配分數圖（已鎖定比例時使用該比例的模板）
+        
+        keep_response_maps > 0 時保留最近的分數圖，同一影格不重複計算。
+        
+        Args:
+            screen: 螢幕截圖（FramePacket 或 BGR 格式）
+            template_name: 模板名稱
+            method: 匹配方法
+            
+        Returns:
+            cv2.matchTemplate 的結果（唯讀），模板不存在時為 None
+        """
+        if template_name not in self.templates:
+            logger.error(f"模板不存在: {template_name}")
+            return None
+        
+        scale = self.locked_scale or 1.0
+        key = (frame_key(screen, self.cache_by_content), template_name, method, scale)
+        result = self.response_maps.get(key)
+        if result is not MISSING:
+            return result
+        
+        template_data = self._scaled_template(self.templates[template_name], scale)
+        
+        # 取得灰階影像（FramePacket 已快取時不重複轉換）
+        with tracer.span('match.gray'):
+            screen_gray = self._to_gray(screen)
+        
+        # 模板匹配
+        with tracer.span('match.template', template=template_name):
+            result = cv2.matchTemplate(screen_gray, template_data['gray'], method)
+        
+        result.flags.writeable = False
+        self.response_maps.put(key, result)
+        return result
+    
+    def _find_peaks(
+        self,
+        result: np.ndarray,
+        method: int,
+        radius: int = 1,
+        threshold: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        找出匹配結果中超過閾值的局部最大值
+        
+        Args:
+            result: cv2.matchTemplate 的結果
+            method: 匹配方法
+            radius: 局部最大值的鄰域半徑（像素）
+            threshold: 分數閾值，None 表示使用 self.threshold
+        
+        Returns:
+            (xs, ys, scores)，依分數由高到低排序
+        """
+        scores = 1.0 - result if method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED) else result
+        
+        # 與鄰域最大值相等的位置即為局部最大值
+        size = 2 * max(radius, 1) + 1
+        local_max = cv2.dilate(scores, np.ones((size, size), dtype=np.uint8))
+        if threshold is None:
+            threshold = self.threshold
+        ys, xs = np.nonzero((scores >= threshold) & (scores >= local_max))
+        
+        values = scores[ys, xs]
+        order = np.argsort(-values, kind='stable')
+        return xs[order], ys[order], values[order]
+    
+    @staticmethod
+    def _nms(
+        xs: np.ndarray,
+        ys: np.ndarray,
+        w: int,
+        h: int,
+        iou_threshold: float = 0.3,
+        min_distance: Optional[int] = None,
+        top_k: Optional[int] = None
+    ) -> List[int]:
+        """
+        非極大值抑制（候選需已依分數由高到低排序，外框大小皆為模板大小）
+        
+        每次保留剩餘候選中分數最高者，並一次捨棄所有與其重疊的候選，
+        迴圈次數等於保留的數量。
+        
+        Returns:
+            保留的候選索引
+        """
+        keep = []
+        remaining = np.arange(len(xs))
+        while remaining.size and (top_k is None or len(keep) < top_k):
+            i = remaining[0]
+            keep.append(int(i))
+            rest = remaining[1:]
+            dx = np.abs(xs[rest] - xs[i])
+            dy = np.abs(ys[rest] - ys[i])
+            if min_distance:
+                suppress = dx * dx + dy * dy < min_distance * min_distance
+            else:
+                inter = np.clip(w - dx, 0, None) * np.clip(h - dy, 0, None)
+                suppress = inter > iou_threshold * (2 * w * h - inter)
+            remaining = rest[~suppress]
+        return keep
+    
     def visualize_match(
         self,
-        screen: np.ndarray,
+        screen: Any,
         template_name: str,
         output_path: Optional[str] = None
     ) -> Optional[np.ndarray]:
@@ -212,25 +1541,28 @@ class TemplateMatcher:
         視覺化匹配結果
         
         Args:
-            screen: 螢幕截圖
+            screen: 螢幕截圖（FramePacket 或 BGR 格式）
             template_name: 模板名稱
             output_path: 輸出圖片路徑（None 表示不儲存）
             
         Returns:
             標記後的圖片或 None
         """
+        # 同一影格已 match() 過時直接取得快取的結果
         match = self.match(screen, template_name)
         
         if match is None:
             logger.warning(f"未找到匹配: {template_name}")
             return None
         
+        # 在子區域影像上繪製時換回子區域座標
+        offset_x, offset_y = getattr(screen, 'offset', (0, 0))
         x, y, confidence = match
-        template_data = self.templates[template_name]
-        h, w = template_data['shape']
+        x, y = x - offset_x, y - offset_y
+        h, w = self.template_shape(template_name)
         
         # 複製圖片
-        result_img = screen.copy()
+        result_img = self._to_bgr(screen).copy()
         
         # 繪製矩形
         top_left = (x - w // 2, y - h // 2)
@@ -259,10 +1591,21 @@ class TemplateMatcher:
         
         return result_img
     
+    def clear_result_cache(self):
+        """清除匹配結果與分數圖快取（修改閾值等設定後使用）"""
+        self.result_cache.clear()
+        self.response_maps.clear()
+    
     def get_template_names(self) -> List[str]:
         """取得所有已載入的模板名稱"""
         return list(self.templates.keys())
     
+    def close(self):
+        """關閉 match_many() 使用的執行緒池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+    
     def __repr__(self) -> str:
         return f"TemplateMatcher(templates={len(self.templates)}, threshold={self.threshold})"
 
@@ -0,0 +1,250 @@
+"""
+模板包模組
+
+將模板目錄編譯為單一檔案：BGR / 灰階影像、金字塔、預先縮放的模板、
+統計值（灰階的平均與標準差，載入時換算為統計預篩使用的總和與平方和）與中繼資料（閾值、搜尋區域）。
+
+載入時以 memmap 映射整個檔案，模板影像都是檔案內容的唯讀 view：
+不需解碼 PNG、不需重新計算衍生影像，多個 bot 行程也共用相同的記憶體分頁。
+標頭記錄編譯時模板目錄的檔案清單（大小與修改時間），目錄有變動時 is_template_pack_stale() 回傳 True。
+
+檔案格式：
+    magic 'TPAK' | 版本 uint32 | 標頭長度 uint64 | JSON 標頭 | 影像資料（每個陣列對齊 64 位元組）
+
+使用方式：
+    build_template_pack('data/templates', 'data/templates.tpak', pyramid_levels=2)
+    if not is_template_pack_stale('data/templates.tpak', 'data/templates'):
+        matcher.load_template_pack('data/templates.tpak')
+"""
+
+import json
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+_MAGIC = b'TPAK'
+_VERSION = 1
+_ALIGN = 64
+_PREFIX = struct.Struct('<4sIQ')
+
+
+def _stats(gray: np.ndarray) -> Dict[str, float]:
+    """灰階影像的平均與標準差"""
+    return {"mean": float(gray.mean()), "std": float(gray.std())}
+
+
+def _signature(stats: Dict[str, float], shape: Sequence[int]) -> Tuple[float, float]:
+    """由平均與標準差換算像素總和與平方和（TemplateMatcher 統計預篩的模板簽章）"""
+    n = shape[0] * shape[1]
+    mean, std = stats["mean"], stats["std"]
+    return (mean * n, (std * std + mean * mean) * n)
+
+
+class _PackWriter:
+    """收集陣列並記錄其在資料區的位置"""
+
+    def __init__(self):
+        self.chunks: List[np.ndarray] = []
+        self.size = 0
+
+    def add(self, array: np.ndarray) -> Dict[str, Any]:
+        """加入陣列（uint8），回傳 {"offset", "shape"}（offset 相對於資料區開頭）"""
+        array = np.ascontiguousarray(array, dtype=np.uint8)
+        offset = -(-self.size // _ALIGN) * _ALIGN
+        if offset > self.size:
+            self.chunks.append(np.zeros(offset - self.size, dtype=np.uint8))
+        self.chunks.append(array.reshape(-1))
+        self.size = offset + array.nbytes
+        return {"offset": offset, "shape": list(array.shape)}
+
+
+def _source_manifest(directory: str) -> Dict[str, List[int]]:
+    """模板目錄的檔案清單：{檔名: [大小, 修改時間 (ns)]}（*.png 與 regions.yaml）"""
+    dir_path = Path(directory)
+    files = list(dir_path.glob("*.png")) + [dir_path / "regions.yaml"]
+    manifest = {}
+    for path in files:
+        if path.is_file():
+            stat = path.stat()
+            manifest[path.name] = [stat.st_size, stat.st_mtime_ns]
+    return manifest
+
+
+def build_template_pack(
+    directory: str,
+    output: str,
+    pyramid_levels: int = 2,
+    pyramid_min_size: int = 8,
+    scale_range: Optional[Sequence[float]] = None,
+    scale_step: float = 0.05
+) -> Dict[str, Any]:
+    """
+    編譯模板目錄為模板包
+
+    衍生影像由 TemplateMatcher 以相同參數計算，與直接載入目錄時完全一致。
+
+    Args:
+        directory: 模板目錄（*.png，可附 regions.yaml）
+        output: 輸出檔案路徑
+        pyramid_levels: 預先計算的金字塔層數
+        pyramid_min_size: 金字塔縮小後模板的最小邊長
+        scale_range: 預先縮放的比例範圍 (最小, 最大)，None 表示只有原始大小
+        scale_step: 縮放比例的間隔
+
+    Returns:
+        模板包標頭（不含陣列位置以外的影像資料）
+    """
+    from .template_matcher import TemplateMatcher
+
+    matcher = TemplateMatcher(
+        pyramid_levels=pyramid_levels,
+        pyramid_min_size=pyramid_min_size,
+        scale_range=scale_range,
+        scale_step=scale_step
+    )
+    sources = _source_manifest(directory)
+    if matcher.load_templates_from_dir(directory) == 0:
+        raise ValueError(f"目錄中沒有模板: {directory}")
+
+    writer = _PackWriter()
+    templates = {}
+    for name, data in matcher.templates.items():
+        gray = data['gray']
+        entry = {
+            "shape": list(data['shape']),
+            "threshold": data.get('threshold'),
+            "region": matcher.search_regions.get(name),
+            "stats": _stats(gray),
+            "image": writer.add(data['image']),
+            "gray": writer.add(gray),
+            "pyramid": [],
+            "scaled": [],
+        }
+        if pyramid_levels > 0:
+            entry["pyramid"] = [writer.add(level) for level in matcher._template_pyramid(data)[1:]]
+
+        for scale in matcher.scales:
+            if scale == 1.0:
+                continue
+            scaled = matcher._scaled_template(data, scale)
+            pyramid = matcher._template_pyramid(scaled)[1:] if pyramid_levels > 0 else []
+            entry["scaled"].append({
+                "scale": scale,
+                "stats": _stats(scaled['gray']),
+                "gray": writer.add(scaled['gray']),
+                "pyramid": [writer.add(level) for level in pyramid],
+            })
+        templates[name] = entry
+
+    header = {
+        "version": _VERSION,
+        "created": time.time(),
+        "pyramid_levels": pyramid_levels,
+        "pyramid_min_size": pyramid_min_size,
+        "scales": matcher.scales,
+        "sources": sources,
+        "templates": templates,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    data_start = -(-(_PREFIX.size + len(header_bytes)) // _ALIGN) * _ALIGN
+
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(_PREFIX.pack(_MAGIC, _VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (data_start - _PREFIX.size - len(header_bytes)))
+        for chunk in writer.chunks:
+            f.write(chunk.tobytes())
+
+    return header
+
+
+def _map_pack(path: str) -> Tuple[np.memmap, Dict[str, Any], int]:
+    """映射模板包並解析標頭，回傳 (映射, 標頭, 資料區開頭位置)"""
+    mm = np.memmap(path, dtype=np.uint8, mode='r')
+    if mm.size < _PREFIX.size:
+        raise ValueError(f"不是模板包: {path}")
+    magic, version, header_len = _PREFIX.unpack(mm[:_PREFIX.size].tobytes())
+    if magic != _MAGIC:
+        raise ValueError(f"不是模板包: {path}")
+    if version != _VERSION:
+        raise ValueError(f"不支援的模板包版本: {version}")
+
+    header_end = _PREFIX.size + header_len
+    header = json.loads(mm[_PREFIX.size:header_end].tobytes().decode('utf-8'))
+    data_start = -(-header_end // _ALIGN) * _ALIGN
+    return mm, header, data_start
+
+
+def is_template_pack_stale(path: str, directory: str) -> bool:
+    """
+    模板包是否與模板目錄不一致
+
+    比較編譯時記錄的檔案清單與目前目錄的檔案大小、修改時間：
+    新增、刪除或編輯了模板圖片或 regions.yaml 都視為過期。
+    沒有檔案清單（舊版工具產生）或無法讀取的模板包也視為過期。
+
+    Args:
+        path: 模板包路徑
+        directory: 編譯模板包的模板目錄
+
+    Returns:
+        是否需要重新編譯
+    """
+    try:
+        _, header, _ = _map_pack(path)
+    except (OSError, ValueError):
+        return True
+    if not Path(directory).exists():
+        # 只部署了模板包
+        return False
+    return header.get("sources") != _source_manifest(directory)
+
+
+def read_template_pack(path: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    映射模板包
+
+    Args:
+        path: 模板包路徑
+
+    Returns:
+        (標頭, {模板名稱: 模板資料})。模板資料的格式與 TemplateMatcher.templates 相同，
+        影像為檔案內容的唯讀 view
+    """
+    mm, header, data_start = _map_pack(path)
+
+    def view(spec: Dict[str, Any]) -> np.ndarray:
+        return np.ndarray(tuple(spec["shape"]), dtype=np.uint8, buffer=mm, offset=data_start + spec["offset"])
+
+    templates = {}
+    for name, entry in header["templates"].items():
+        gray = view(entry["gray"])
+        data = {
+            'image': view(entry["image"]),
+            'gray': gray,
+            'shape': tuple(entry["shape"]),
+            'stats': entry["stats"],
+            'prefilter': _signature(entry["stats"], gray.shape),
+            'scaled': {},
+        }
+        if entry["pyramid"]:
+            data['pyramid'] = [gray] + [view(level) for level in entry["pyramid"]]
+        if entry.get("threshold") is not None:
+            data['threshold'] = entry["threshold"]
+        for scaled in entry["scaled"]:
+            scaled_gray = view(scaled["gray"])
+            item = {'gray': scaled_gray, 'shape': scaled_gray.shape[:2]}
+            if "stats" in scaled:
+                item['prefilter'] = _signature(scaled["stats"], scaled_gray.shape)
+            if scaled["pyramid"]:
+                item['pyramid'] = [scaled_gray] + [view(level) for level in scaled["pyramid"]]
+            data['scaled'][float(scaled["scale"])] = item
+        templates[name] = data
+
+    return header, templates
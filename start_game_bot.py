@@ -8,8 +8,8 @@ from loguru import logger
 # 添加 src 到路徑
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from capture import ScreenCapture
-from vision import TemplateMatcher
+from capture import ScreenCapture, ADBScreenCapture, ADBStreamCapture, ThreadedCapture, ChangeDetector
+from vision import TemplateMatcher, is_template_pack_stale
 from automation import ADBController
 
 def run_bot():
@@ -25,7 +25,12 @@ def run_bot():
             resize = config['capture'].get('resize')
             if resize:
                 resize = tuple(resize)
+            zero_copy = config['capture'].get('zero_copy', False)
+            threaded = config['capture'].get('threaded', False)
+            change_detection = config['capture'].get('change_detection', False)
+            backend = config['capture'].get('backend', 'mss')
             adb_config = config['automation']['adb']
+            matching_config = config.get('vision', {}).get('template_matching') or {}
     except Exception as e:
         logger.error(f"❌ 無法讀取配置: {e}")
         return
@@ -42,12 +47,36 @@ def run_bot():
         logger.error("❌ 無法連接 ADB，請檢查模擬器")
         return
     
-    # 螢幕擷取
-    capturer = ScreenCapture(region=region, resize=resize)
+    # 螢幕擷取（背景執行緒模式下，主迴圈不必等待擷取）
+    # 畫面靜止時（例如停在選單）沿用上次的匹配結果，不重新匹配
+    change_detector = ChangeDetector() if change_detection else None
+    capture_kwargs = dict(resize=resize, zero_copy=zero_copy, change_detector=change_detector)
+    if backend == 'adb_stream':
+        # screenrecord 串流，本身就在背景執行緒解碼
+        capturer = ADBStreamCapture(adb, resize=resize, change_detector=change_detector)
+    else:
+        if backend == 'adb':
+            # 直接擷取設備畫面，模擬器視窗可被遮蔽或最小化
+            factory = lambda: ADBScreenCapture(adb, **capture_kwargs)
+        else:
+            factory = lambda: ScreenCapture(region=region, **capture_kwargs)
+        capturer = ThreadedCapture(factory) if threaded else factory()
     
-    # 視覺識別
-    matcher = TemplateMatcher(threshold=0.8)
-    matcher.load_template('button_start', 'data/templates/button_start.png')
+    # 視覺識別（視窗大小 / DPI 與模板不同時，多尺度匹配找出並鎖定縮放比例）
+    matcher = TemplateMatcher(
+        threshold=0.8,
+        change_detector=change_detector,
+        scale_range=matching_config.get('scale_range'),
+        scale_step=matching_config.get('scale_step', 0.05)
+    )
+    template_pack = matching_config.get('template_pack')
+    use_pack = bool(template_pack) and Path(template_pack).exists()
+    if use_pack and is_template_pack_stale(template_pack, 'data/templates'):
+        logger.warning(f"⚠️  模板包 {template_pack} 與 data/templates 不一致，改從目錄載入"
+                       "（請執行 python tool_build_template_pack.py 重新編譯）")
+        use_pack = False
+    if not (use_pack and matcher.load_template_pack(template_pack)):
+        matcher.load_template('button_start', 'data/templates/button_start.png')
     
     logger.success("✅ 系統就緒，開始監控畫面...")
     logger.info("按 Ctrl+C 停止")
@@ -55,7 +84,7 @@ def run_bot():
     try:
         while True:
             # 抓取畫面
-            frame = capturer.capture()
+            frame = capturer.capture_packet()
             
             # 尋找開始按鈕
             match = matcher.match(frame, 'button_start')
@@ -68,14 +97,13 @@ def run_bot():
                 # 注意：wm size 顯示 1280x720，但直立模式下座標系應為 720x1280
                 # 我們假設模擬器是 720x1280 (DPI 可能不同，但邏輯座標通常是這樣)
                 
-                # 視窗 (Capture) 解析度
-                win_w = 545
-                win_h = 970
-                
                 # 模擬器目標解析度
                 target_w = 720
                 target_h = 1280
                 
+                # 視窗 (Capture) 解析度：以實際擷取的畫面大小換算，視窗縮放後仍正確
+                win_w, win_h = frame.width, frame.height
+                
                 # 計算映射後的座標
                 # 先減去 Crop 的偏移量 (因為 x, y 是相對於 Crop 區域的)
                 # 但我們的 x, y 已經是 Crop 區域內的點
@@ -0,0 +1,117 @@
+"""
+金字塔模板匹配效能測試
+
+比較完整匹配與金字塔匹配在 545x970 畫面上的耗時，以及兩者結果的一致性。
+畫面為平滑雜訊背景，隨機貼上 data/templates 的模板（部分畫面不含模板）。
+
+執行方式：
+    python tests/bench_pyramid_matching.py [--levels 2] [--frames 50]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from loguru import logger
+from vision import TemplateMatcher
+
+FRAME_SIZE = (545, 970)  # (width, height)
+TEMPLATES_DIR = Path(__file__).parent.parent / "data" / "templates"
+
+
+def make_frames(templates, count, seed=0):
+    """
+    產生測試畫面
+
+    Returns:
+        [(畫面, {模板名稱: 中心點 或 None}), ...]
+    """
+    rng = np.random.default_rng(seed)
+    width, height = FRAME_SIZE
+    frames = []
+    for _ in range(count):
+        noise = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+        frame = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+        truth = {}
+        for name, image in templates.items():
+            if rng.random() < 0.3:
+                truth[name] = None
+                continue
+            h, w = image.shape[:2]
+            x = int(rng.integers(0, width - w))
+            y = int(rng.integers(0, height - h))
+            frame[y:y + h, x:x + w] = image
+            truth[name] = (x + w // 2, y + h // 2)
+        frames.append((frame, truth))
+    return frames
+
+
+def run(matcher, frames):
+    """逐一匹配所有模板，回傳 (每幀平均毫秒, 結果列表)"""
+    results = []
+    start = time.perf_counter()
+    for frame, _ in frames:
+        results.append({name: matcher.match(frame, name) for name in matcher.get_template_names()})
+    elapsed = time.perf_counter() - start
+    return elapsed / len(frames) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="金字塔模板匹配效能測試")
+    parser.add_argument("--levels", type=int, default=2, help="金字塔縮小層數")
+    parser.add_argument("--frames", type=int, default=50, help="測試畫面數")
+    args = parser.parse_args()
+
+    logger.remove()
+
+    exhaustive = TemplateMatcher(threshold=0.8)
+    pyramid = TemplateMatcher(threshold=0.8, pyramid_levels=args.levels)
+    for matcher in (exhaustive, pyramid):
+        matcher.load_templates_from_dir(str(TEMPLATES_DIR))
+    if not exhaustive.templates:
+        print(f"找不到模板: {TEMPLATES_DIR}")
+        return
+
+    templates = {name: data['image'] for name, data in exhaustive.templates.items()}
+    frames = make_frames(templates, args.frames)
+
+    # 暖機
+    run(exhaustive, frames[:2])
+    run(pyramid, frames[:2])
+
+    full_ms, full_results = run(exhaustive, frames)
+    pyr_ms, pyr_results = run(pyramid, frames)
+
+    total = agree = 0
+    correct = {"full": 0, "pyramid": 0}
+    max_diff = 0.0
+    for (_, truth), full, pyr in zip(frames, full_results, pyr_results):
+        for name in truth:
+            total += 1
+            a, b = full[name], pyr[name]
+            if (a is None) == (b is None) and (a is None or a[:2] == b[:2]):
+                agree += 1
+            if a is not None and b is not None:
+                max_diff = max(max_diff, abs(a[2] - b[2]))
+            # 模板可能互相覆蓋，與實際貼上位置比對只作參考
+            expected = truth[name]
+            for key, found in (("full", a), ("pyramid", b)):
+                if (found is None) == (expected is None) and (found is None or found[:2] == expected):
+                    correct[key] += 1
+
+    print(f"畫面: {FRAME_SIZE[0]}x{FRAME_SIZE[1]}，模板: {len(templates)} 個，{len(frames)} 幀")
+    print(f"完整匹配:   {full_ms:7.2f} ms/幀")
+    print(f"金字塔匹配: {pyr_ms:7.2f} ms/幀 (levels={args.levels}, {full_ms / pyr_ms:.1f}x)")
+    print(f"結果一致:   {agree}/{total}，信心度最大差異 {max_diff:.2e}")
+    print(f"符合貼上位置: 完整 {correct['full']}/{total}，金字塔 {correct['pyramid']}/{total}")
+
+
+if __name__ == "__main__":
+    main()
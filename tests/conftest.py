@@ -0,0 +1,97 @@
+"""
+測試共用的輔助函式與 fixture
+
+smooth_noise() 產生模板匹配測試用的平滑雜訊影像；fake_mss 以 FakeMSS 取代 mss.mss()，
+不需要實際的螢幕；record_calls 包裝 TemplateMatcher 的內部方法並記錄每次呼叫。
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+
+def smooth_noise(shape, seed, cell=6, low=0, high=256):
+    """
+    平滑雜訊（縮放後仍保有特徵）
+
+    Args:
+        shape: (高, 寬) 或 (高, 寬, 通道數)
+        seed: 亂數種子
+        cell: 雜訊格子的邊長（像素），越大越平滑
+        low, high: 像素值範圍 [low, high)
+    """
+    rng = np.random.default_rng(seed)
+    height, width = shape[:2]
+    small = rng.integers(low, high, (height // cell + 1, width // cell + 1) + tuple(shape[2:]), dtype=np.uint8)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+
+
+class FakeShot:
+    """模擬 mss ScreenShot（raw 為 BGRA bytearray）"""
+
+    def __init__(self, raw: bytearray, width: int, height: int):
+        self.raw = raw
+        self.size = (width, height)
+
+    @property
+    def __array_interface__(self):
+        return {
+            "version": 3,
+            "shape": (self.size[1], self.size[0], 4),
+            "typestr": "|u1",
+            "data": self.raw,
+        }
+
+
+class FakeMSS:
+    """模擬 mss.mss()，像素值 B = x, G = y, R = x ^ y（螢幕絕對座標）"""
+
+    def __init__(self):
+        self.monitors = [{}, {"left": 0, "top": 0, "width": 400, "height": 300}]
+        self.grabs = []
+
+    def grab(self, region):
+        self.grabs.append(dict(region))
+        ys, xs = np.mgrid[
+            region["top"]:region["top"] + region["height"],
+            region["left"]:region["left"] + region["width"]
+        ]
+        bgra = np.empty((region["height"], region["width"], 4), dtype=np.uint8)
+        bgra[..., 0] = xs % 256
+        bgra[..., 1] = ys % 256
+        bgra[..., 2] = (xs ^ ys) % 256
+        bgra[..., 3] = 255
+        return FakeShot(bytearray(bgra.tobytes()), region["width"], region["height"])
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_mss(monkeypatch):
+    from capture import screen_capture
+
+    monkeypatch.setattr(screen_capture.mss, "mss", FakeMSS)
+
+
+@pytest.fixture
+def record_calls(monkeypatch):
+    """
+    包裝物件的方法，每次呼叫時記錄 key(*args, **kwargs) 的值
+
+    使用方式：
+        matcher.located = record_calls(matcher, "_locate", lambda screen_gray, template_data, *_, **__: ...)
+    """
+
+    def record(obj, method_name, key):
+        calls = []
+        original = getattr(obj, method_name)
+
+        def recording(*args, **kwargs):
+            calls.append(key(*args, **kwargs))
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(obj, method_name, recording)
+        return calls
+
+    return record
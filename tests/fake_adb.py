@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+假的 adb 執行檔（測試用）
+
+模擬 ADBController 會用到的 adb 指令，不需要真實的模擬器。
+以環境變數調整行為：
+
+    FAKE_ADB_SIZE    畫面大小 "寬x高"（預設 72x128）
+    FAKE_ADB_FORMAT  screencap 像素格式代碼（預設 1 = RGBA_8888）
+    FAKE_ADB_HEADER  screencap 標頭長度 12 或 16（預設 16）
+    FAKE_ADB_H264    screenrecord 輸出的 H.264 (Annex B) 檔案路徑
+
+screencap 輸出的像素為固定圖樣：R = x, G = y, B = x + y, A = 255（皆取 256 餘數）。
+"""
+
+import os
+import struct
+import sys
+
+import numpy as np
+
+
+def frame_size():
+    width, height = os.environ.get("FAKE_ADB_SIZE", "72x128").split("x")
+    return int(width), int(height)
+
+
+def pattern(width, height):
+    """產生 RGBA 測試圖樣"""
+    ys, xs = np.mgrid[0:height, 0:width]
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[..., 0] = xs % 256
+    rgba[..., 1] = ys % 256
+    rgba[..., 2] = (xs + ys) % 256
+    rgba[..., 3] = 255
+    return rgba
+
+
+def screencap():
+    width, height = frame_size()
+    pixel_format = int(os.environ.get("FAKE_ADB_FORMAT", "1"))
+    header_size = int(os.environ.get("FAKE_ADB_HEADER", "16"))
+
+    rgba = pattern(width, height)
+    if pixel_format == 5:
+        rgba = rgba[..., [2, 1, 0, 3]]
+
+    out = sys.stdout.buffer
+    out.write(struct.pack("<3I", width, height, pixel_format))
+    if header_size == 16:
+        out.write(struct.pack("<I", 0))
+    out.write(np.ascontiguousarray(rgba).tobytes())
+    out.flush()
+
+
+def screenrecord():
+    """以預先錄製的 H.264 檔案模擬 screenrecord --output-format=h264 -"""
+    path = os.environ.get("FAKE_ADB_H264")
+    if not path:
+        print("fake adb: FAKE_ADB_H264 not set", file=sys.stderr)
+        return 1
+
+    out = sys.stdout.buffer
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(4096)
+            if not chunk:
+                break
+            out.write(chunk)
+            out.flush()
+    return 0
+
+
+def main(argv):
+    # 略過 -s <device>
+    if len(argv) >= 2 and argv[0] == "-s":
+        argv = argv[2:]
+    if not argv:
+        return 1
+
+    command = argv[0]
+    if command == "connect":
+        print(f"connected to {argv[1]}")
+    elif command == "disconnect":
+        print(f"disconnected {argv[1]}")
+    elif command == "devices":
+        print("List of devices attached")
+        print("127.0.0.1:5555\tdevice")
+    elif command == "exec-out" and argv[1:2] == ["screencap"]:
+        screencap()
+    elif command == "exec-out" and argv[1:2] == ["screenrecord"]:
+        return screenrecord()
+    elif command == "shell" and argv[1:3] == ["wm", "size"]:
+        width, height = frame_size()
+        print(f"Physical size: {width}x{height}")
+    elif command == "shell":
+        pass
+    else:
+        print(f"fake adb: unsupported command {argv}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,68 @@
+"""
+ADB 擷取測試
+
+以 tests/fake_adb.py 取代真實 adb，驗證 screencap 原始輸出的解析與擷取後端。
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from automation import ADBController
+from capture import ADBScreenCapture
+
+FAKE_ADB = str(Path(__file__).parent / "fake_adb.py")
+
+
+def expected_rgb(width=72, height=128):
+    ys, xs = np.mgrid[0:height, 0:width]
+    return np.stack([xs % 256, ys % 256, (xs + ys) % 256], axis=-1).astype(np.uint8)
+
+
+@pytest.fixture
+def adb():
+    controller = ADBController(port=5555, adb_path=FAKE_ADB)
+    assert controller.connect()
+    return controller
+
+
+@pytest.mark.parametrize("header", ["12", "16"])
+@pytest.mark.parametrize("pixel_format, image_format", [("1", "RGBA"), ("5", "BGRA")])
+def test_screencap_raw(monkeypatch, adb, header, pixel_format, image_format):
+    monkeypatch.setenv("FAKE_ADB_HEADER", header)
+    monkeypatch.setenv("FAKE_ADB_FORMAT", pixel_format)
+
+    image, fmt = adb.screencap_raw()
+    assert fmt == image_format
+    assert image.shape == (128, 72, 4)
+
+    rgb = image[..., :3] if fmt == "RGBA" else image[..., 2::-1]
+    np.testing.assert_array_equal(rgb, expected_rgb())
+
+
+def test_capture_backend_region_and_conversion(adb):
+    region = {"left": 10, "top": 20, "width": 30, "height": 40}
+    with ADBScreenCapture(adb, region=region, fps_limit=1000) as capturer:
+        packet = capturer.capture_packet()
+
+    expected = expected_rgb()[20:60, 10:40]
+    np.testing.assert_array_equal(packet.rgb, expected)
+    np.testing.assert_array_equal(packet.bgr, expected[..., ::-1])
+    assert packet.seq == 1
+
+
+def test_zero_copy_reuses_raw_buffer(adb):
+    capturer = ADBScreenCapture(adb, fps_limit=1000, zero_copy=True)
+
+    first = capturer.capture_packet()
+    source = first.source
+    capturer.capture_packet()
+    assert capturer.get_alloc_stats()["last_frame_bytes"] == 0
+
+    second = capturer.capture_packet()
+    assert np.shares_memory(second.source, source)
@@ -0,0 +1,103 @@
+"""
+ADB 串流擷取測試
+
+以 PyAV 錄製一段 H.264 檔案，由 tests/fake_adb.py 模擬 screenrecord 串流，
+驗證逐步解碼、最新影格 API 與重新連線統計。
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+av = pytest.importorskip("av")
+
+from automation import ADBController
+from capture import ADBStreamCapture
+
+FAKE_ADB = str(Path(__file__).parent / "fake_adb.py")
+NUM_FRAMES = 20
+
+
+def frame_color(index):
+    """第 index 幀的 BGR 顏色"""
+    return np.array([10 * index % 256, 200 - 5 * index, 60], dtype=np.uint8)
+
+
+@pytest.fixture
+def h264_file(tmp_path):
+    """錄製一段 64x48、每幀顏色不同的 H.264 (Annex B) 檔案"""
+    path = tmp_path / "record.h264"
+    with av.open(str(path), "w", format="h264") as container:
+        stream = container.add_stream("libx264", rate=30)
+        stream.width, stream.height = 64, 48
+        stream.pix_fmt = "yuv420p"
+        stream.options = {"bf": "0", "tune": "zerolatency"}
+        for index in range(NUM_FRAMES):
+            image = np.empty((48, 64, 3), dtype=np.uint8)
+            image[:] = frame_color(index)
+            frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return path
+
+
+@pytest.fixture
+def adb(monkeypatch, h264_file):
+    monkeypatch.setenv("FAKE_ADB_H264", str(h264_file))
+    controller = ADBController(port=5555, adb_path=FAKE_ADB)
+    assert controller.connect()
+    return controller
+
+
+def drain(capturer):
+    """讀取影格直到串流結束，回傳所有取得的影格"""
+    frames = []
+    seq = 0
+    while True:
+        frame = capturer.wait_next(seq, timeout=5.0)
+        if frame is None:
+            return frames
+        frames.append(frame)
+        seq = frame.seq
+
+
+def test_stream_decodes_to_latest_frame(adb):
+    capturer = ADBStreamCapture(adb, max_reconnects=0)
+    frames = drain(capturer)
+    stats = capturer.get_stats()
+    capturer.close()
+
+    assert frames
+    seqs = [frame.seq for frame in frames]
+    assert seqs == sorted(set(seqs))
+    assert stats["decoded_frames"] == NUM_FRAMES, stats
+    assert stats["decoded_frames"] == frames[-1].seq + stats["dropped_frames"], stats
+    assert stats["decode_latency_max"] >= stats["decode_latency_avg"] >= 0
+
+    # 最後一幀必須是錄製的最後一幀（允許壓縮誤差）
+    last = frames[-1].bgr.astype(int)
+    assert np.abs(last - frame_color(NUM_FRAMES - 1)).max() <= 6
+
+
+def test_stream_reconnects_after_end(adb):
+    capturer = ADBStreamCapture(adb, max_reconnects=2, reconnect_delay=0.0)
+    drain(capturer)
+    stats = capturer.get_stats()
+    capturer.close()
+
+    assert stats["reconnects"] == 2
+    assert stats["decoded_frames"] == NUM_FRAMES * 3
+
+
+def test_resize_and_close_while_streaming(adb):
+    with ADBStreamCapture(adb, resize=(32, 24), reconnect_delay=0.0) as capturer:
+        packet = capturer.capture_packet(timeout=5.0)
+        assert packet.bgr.shape == (24, 32, 3)
+        assert packet.gray.shape == (24, 32)
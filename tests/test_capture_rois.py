@@ -0,0 +1,109 @@
+"""
+子區域擷取測試
+
+以假的 mss（像素值由螢幕絕對座標決定）驗證子區域擷取與完整影格裁切一致、
+聯集 / 分開擷取的選擇，以及匹配結果換算回影格座標。
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ScreenCapture, ThreadedCapture
+from vision import TemplateMatcher
+
+REGION = {"left": 10, "top": 20, "width": 200, "height": 160}
+
+
+def test_rois_match_full_frame_crops(fake_mss):
+    capturer = ScreenCapture(region=REGION, fps_limit=0)
+    capturer.add_roi("button", (20, 30, 40, 20))
+    capturer.add_roi("bar", (50, 40, 30, 30))
+
+    full = capturer.capture_packet().bgr
+    rois = capturer.capture_rois()
+
+    assert set(rois) == {"button", "bar"}
+    for name, packet in rois.items():
+        x, y, w, h = capturer.rois[name]
+        assert packet.offset == (x, y)
+        assert packet.roi == name
+        np.testing.assert_array_equal(packet.bgr, full[y:y + h, x:x + w])
+
+
+def test_nearby_rois_grab_union_once(fake_mss):
+    capturer = ScreenCapture(region=REGION, fps_limit=0)
+    capturer.add_roi("a", (0, 0, 50, 20))
+    capturer.add_roi("b", (60, 0, 50, 20))
+
+    capturer.sct.grabs.clear()
+    capturer.capture_rois()
+
+    assert capturer.sct.grabs == [{"left": 10, "top": 20, "width": 110, "height": 20}]
+
+
+def test_distant_rois_grab_separately(fake_mss):
+    capturer = ScreenCapture(region=REGION, fps_limit=0)
+    capturer.roi_grab_overhead = 100
+    capturer.add_roi("top", (0, 0, 20, 10))
+    capturer.add_roi("bottom", (180, 150, 20, 10))
+
+    plan = capturer.plan_roi_grabs(["top", "bottom"])
+    assert len(plan) == 2
+
+    capturer.sct.grabs.clear()
+    rois = capturer.capture_rois()
+    assert len(capturer.sct.grabs) == 2
+    assert rois["bottom"].bgr[0, 0].tolist() == [190 % 256, 170, (190 ^ 170) % 256]
+
+
+def test_rois_with_resize_use_frame_coordinates(fake_mss):
+    capturer = ScreenCapture(region=REGION, resize=(100, 80), fps_limit=0)
+    capturer.add_roi("button", (10, 20, 30, 10))
+
+    full = capturer.capture_packet().bgr
+    packet = capturer.capture_rois()["button"]
+
+    assert packet.offset == (10, 20)
+    assert packet.bgr.shape == (10, 30, 3)
+    assert capturer.sct.grabs[-1] == {"left": 30, "top": 60, "width": 60, "height": 20}
+    diff = np.abs(packet.bgr.astype(int) - full[20:30, 10:40].astype(int))
+    assert diff.max() <= 2
+
+
+def test_unknown_roi_raises(fake_mss):
+    capturer = ScreenCapture(region=REGION, fps_limit=0)
+    with pytest.raises(KeyError):
+        capturer.capture_rois(["missing"])
+    with pytest.raises(ValueError):
+        capturer.add_roi("bad", (0, 0, 0, 10))
+
+
+def test_match_on_roi_returns_frame_coordinates(fake_mss):
+    capturer = ScreenCapture(region=REGION, fps_limit=0)
+    capturer.add_roi("area", (40, 30, 80, 60))
+    full = capturer.capture_packet()
+
+    matcher = TemplateMatcher(threshold=0.99)
+    template = full.gray[50:70, 70:100].copy()
+    matcher.templates["target"] = {"image": None, "gray": template, "shape": template.shape}
+
+    expected = matcher.match(full, "target")
+    found = matcher.match(capturer.capture_rois()["area"], "target")
+
+    assert expected is not None and found is not None
+    assert found[:2] == expected[:2] == (85, 60)
+
+
+def test_threaded_rois_are_views_of_latest_frame(fake_mss):
+    with ThreadedCapture(region=REGION, fps_limit=0) as capturer:
+        capturer.add_roi("button", (20, 30, 40, 20))
+        packet = capturer.capture_rois()["button"]
+
+    assert packet.offset == (20, 30)
+    assert packet.bgr[0, 0].tolist() == [30, 50, 30 ^ 50]
@@ -0,0 +1,50 @@
+"""
+零複製擷取測試
+
+以假的 mss 取代真實螢幕，驗證零複製模式的輸出與一般模式一致，
+且穩定狀態下每幀不再配置像素緩衝區。
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ScreenCapture
+
+
+REGION = {"left": 0, "top": 0, "width": 64, "height": 48}
+
+
+@pytest.mark.parametrize("resize", [None, (32, 24)])
+def test_zero_copy_matches_default(fake_mss, resize):
+    normal = ScreenCapture(region=REGION, resize=resize, fps_limit=1000)
+    fast = ScreenCapture(region=REGION, resize=resize, fps_limit=1000, zero_copy=True)
+
+    for _ in range(3):
+        np.testing.assert_array_equal(normal.capture(), fast.capture())
+
+
+def test_zero_copy_steady_state_allocates_nothing(fake_mss):
+    capturer = ScreenCapture(region=REGION, resize=(32, 24), fps_limit=1000, zero_copy=True)
+
+    first = capturer.capture()
+    assert capturer.get_alloc_stats()["last_frame_bytes"] > 0
+
+    for _ in range(5):
+        frame = capturer.capture()
+        assert capturer.get_alloc_stats()["last_frame_bytes"] == 0
+        # 輸出緩衝區重複使用
+        assert frame is first
+
+
+def test_bgra_view_is_read_only(fake_mss):
+    capturer = ScreenCapture(region=REGION, fps_limit=1000, zero_copy=True)
+    view = capturer._bgra_view(capturer.sct.grab(REGION))
+
+    assert view.shape == (48, 64, 4)
+    assert not view.flags.writeable
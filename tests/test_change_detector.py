@@ -0,0 +1,97 @@
+"""
+畫面變化偵測測試
+
+驗證區塊指紋的全域與區域查詢，以及 TemplateMatcher 在畫面靜止時沿用結果。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ChangeDetector, FramePacket
+from vision import TemplateMatcher
+
+
+def make_frame(seed=0, width=320, height=240):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def test_static_frames_report_no_change():
+    detector = ChangeDetector()
+    frame = make_frame()
+
+    assert detector.update(frame, 1)
+    for seq in range(2, 6):
+        assert not detector.update(frame.copy(), seq)
+
+    assert not detector.changed_since(1)
+    assert detector.get_stats()["changed_frames"] == 1
+
+
+def test_local_change_is_localized():
+    detector = ChangeDetector(tile_size=32)
+    frame = make_frame()
+    detector.update(frame, 1)
+
+    changed = frame.copy()
+    changed[200:220, 250:270] = 255 - changed[200:220, 250:270]
+    assert detector.update(changed, 2)
+
+    assert detector.changed_since(1)
+    assert detector.changed_since(1, (240, 190, 40, 40))
+    assert not detector.changed_since(1, (0, 0, 100, 100))
+    assert not detector.changed_since(2)
+
+
+def test_slow_drift_accumulates():
+    detector = ChangeDetector(threshold=4.0)
+    base = np.full((64, 64), 100, dtype=np.uint8)
+    detector.update(base, 1)
+
+    # 每幀只變化 2，但與參考值的累積差異最終會超過閾值
+    results = [detector.update(base + step * 2, step + 1) for step in range(1, 5)]
+    assert results == [False, False, True, False]
+
+
+def test_unknown_sequence_counts_as_changed():
+    detector = ChangeDetector()
+    assert detector.changed_since(0)
+
+    detector.update(make_frame(), 5)
+    assert detector.changed_since(6)
+
+
+def test_matcher_reuses_result_on_static_screen():
+    detector = ChangeDetector()
+    matcher = TemplateMatcher(threshold=0.9, change_detector=detector)
+
+    frame = make_frame(seed=1)
+    template = np.ascontiguousarray(frame[50:80, 60:100])
+    matcher.templates['patch'] = {
+        'image': template,
+        'gray': cv2.cvtColor(template, cv2.COLOR_BGR2GRAY),
+        'shape': template.shape[:2],
+    }
+
+    results = []
+    for seq in range(1, 6):
+        packet = FramePacket(frame, seq=seq, source_format='BGR')
+        detector.update(packet, seq)
+        results.append(matcher.match(packet, 'patch'))
+
+    assert matcher.reuse_hits == 4
+    assert all(result == results[0] for result in results)
+
+    # 畫面變化後重新匹配
+    moved = np.roll(frame, 10, axis=1)
+    packet = FramePacket(moved, seq=6, source_format='BGR')
+    detector.update(packet, 6)
+    x, y, _ = matcher.match(packet, 'patch')
+    assert matcher.reuse_hits == 4
+    assert (x, y) == (results[0][0] + 10, results[0][1])
@@ -0,0 +1,133 @@
+"""
+物件偵測器測試
+
+驗證 YOLO 輸出解碼、依類別分開的非極大值抑制，以及 ONNX Runtime 推論的
+letterbox 座標換算、子區域 offset 與批次推論（以 onnx 建立的小模型模擬 YOLOv8 輸出）。
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FramePacket
+from vision.detector import decode_predictions, nms
+
+CLASSES = ["player", "enemy", "health_bar", "skill_icon", "button"]
+
+
+def yolov8_output(detections, anchors=8):
+    """產生 YOLOv8 格式的輸出 (4 + 類別數, 候選數)，detections 為 [(cx, cy, w, h, 類別, 分數), ...]"""
+    output = np.zeros((4 + len(CLASSES), anchors), dtype=np.float32)
+    for i, (cx, cy, w, h, class_id, score) in enumerate(detections):
+        output[:4, i] = (cx, cy, w, h)
+        output[4 + class_id, i] = score
+    return output
+
+
+def test_decode_layouts():
+    output = yolov8_output([(32, 32, 16, 8, 1, 0.9), (10, 10, 4, 4, 0, 0.3)])
+    boxes, scores, class_ids = decode_predictions(output, len(CLASSES), 0.5)
+    assert boxes.tolist() == [[24, 28, 40, 36]]
+    assert scores.tolist() == [pytest.approx(0.9)]
+    assert class_ids.tolist() == [1]
+
+    # 轉置的 YOLOv8 輸出與 YOLOv5 格式（物件分數 x 類別分數）
+    assert decode_predictions(output.T, len(CLASSES), 0.5)[0].tolist() == [[24, 28, 40, 36]]
+    v5 = np.zeros((3, 5 + len(CLASSES)), dtype=np.float32)
+    v5[0, :5] = (32, 32, 16, 8, 0.9)
+    v5[0, 5 + 2] = 0.8
+    boxes, scores, class_ids = decode_predictions(v5, len(CLASSES), 0.5)
+    assert class_ids.tolist() == [2]
+    assert scores.tolist() == [pytest.approx(0.72)]
+
+    with pytest.raises(ValueError):
+        decode_predictions(np.zeros((7, 3)), len(CLASSES), 0.5)
+
+
+def test_nms_per_class():
+    boxes = np.array([
+        [0, 0, 10, 10],
+        [1, 1, 11, 11],   # 與第 0 個重疊、同類別
+        [1, 1, 11, 11],   # 與第 0 個重疊、不同類別
+        [50, 50, 60, 60],
+    ], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.6])
+    class_ids = np.array([0, 0, 1, 0])
+    assert nms(boxes, scores, class_ids, 0.45) == [0, 2, 3]
+    assert nms(boxes, scores, class_ids, 0.45, max_detections=2) == [0, 2]
+    assert nms(boxes[:0], scores[:0], class_ids[:0]) == []
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    """
+    64x64 輸入的小模型：固定輸出兩個候選，
+    第 1 個候選（enemy）的分數為輸入影像的平均亮度，可區分批次中的不同影格
+    """
+    pytest.importorskip("onnxruntime")
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper, numpy_helper
+
+    base = yolov8_output([(32, 32, 16, 8, 0, 0.9), (8, 40, 8, 8, 1, 0.0)], anchors=4)[None]
+    mask = np.zeros_like(base)
+    mask[0, 4 + 1, 1] = 1.0
+
+    graph = helper.make_graph(
+        [
+            helper.make_node("Flatten", ["images"], ["pixels"], axis=1),
+            helper.make_node("ReduceMean", ["pixels"], ["mean"], axes=[1], keepdims=1),
+            helper.make_node("Unsqueeze", ["mean", "axis"], ["mean3d"]),
+            helper.make_node("Mul", ["mean3d", "mask"], ["scores"]),
+            helper.make_node("Add", ["base", "scores"], ["output0"]),
+        ],
+        "fake_yolo",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, 64, 64])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, ["batch", 9, 4])],
+        [
+            numpy_helper.from_array(base, "base"),
+            numpy_helper.from_array(mask, "mask"),
+            numpy_helper.from_array(np.array([2], dtype=np.int64), "axis"),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    helper.set_model_props(model, {"names": str(dict(enumerate(CLASSES)))})
+    path = tmp_path / "fake_yolo.onnx"
+    onnx.save(model, str(path))
+    return path
+
+
+def test_detect_frame_coordinates(model_path):
+    from vision import YOLODetector
+
+    detector = YOLODetector(str(model_path), conf_threshold=0.5, batch_size=2)
+    assert detector.class_names == CLASSES
+    assert detector.input_size == (64, 64)
+
+    # 320x180 畫面縮放 0.2 倍後置於畫布中央（上方邊框 14）
+    frame = np.zeros((180, 320, 3), dtype=np.uint8)
+    assert detector.detect(frame) == [("player", pytest.approx(0.9), (120, 70, 200, 110))]
+
+    # 子區域封包加上 offset
+    packet = FramePacket(np.zeros((200, 400, 3), dtype=np.uint8), seq=1, source_format='BGR')
+    roi = packet.crop((40, 10, 320, 180), roi="battle")
+    assert detector.detect(roi)[0][2] == (160, 80, 240, 120)
+
+
+def test_detect_batch(model_path):
+    from vision import YOLODetector
+
+    detector = YOLODetector(str(model_path), class_names=CLASSES, conf_threshold=0.5, batch_size=2)
+    dark = np.zeros((64, 64, 3), dtype=np.uint8)
+    bright = np.full((64, 64, 3), 255, dtype=np.uint8)
+
+    results = detector.detect_batch([dark, bright, bright])
+    assert [len(r) for r in results] == [1, 2, 2]
+    assert [name for name, _, _ in results[1]] == ["enemy", "player"]
+    assert results[1][0][2] == (4, 36, 12, 44)
+    assert detector.get_stats()['frames'] == 3
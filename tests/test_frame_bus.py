@@ -0,0 +1,110 @@
+"""
+共享記憶體影格匯流排測試
+
+驗證跨行程讀取的影格完整（seqlock 不會讀到寫到一半的影格）、
+零複製 view 與覆寫偵測，以及訂閱者結束不會刪除共享記憶體。
+"""
+
+import multiprocessing
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FrameBusPublisher, FrameBusSubscriber, FramePacket
+
+SIZE = (64, 48)
+
+
+def frame_for(seq):
+    """整張影像為 seq 的低 8 位元"""
+    return np.full((SIZE[1], SIZE[0], 3), seq % 256, dtype=np.uint8)
+
+
+def subscriber_process(name, count, results):
+    """在另一個行程讀取影格並檢查每一幀是否完整"""
+    subscriber = FrameBusSubscriber(name)
+    seqs, torn = [], 0
+    last = 0
+    while len(seqs) < count:
+        packet = subscriber.wait_next(last, timeout=5.0, copy=True)
+        if packet is None:
+            break
+        image = packet.bgr
+        if not (image == packet.seq % 256).all():
+            torn += 1
+        seqs.append(packet.seq)
+        last = packet.seq
+    subscriber.close()
+    results.put((seqs, torn))
+
+
+def test_cross_process_frames_are_consistent():
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    with FrameBusPublisher(SIZE, slots=4) as publisher:
+        process = ctx.Process(target=subscriber_process, args=(publisher.name, 20, results))
+        process.start()
+
+        seq = 0
+        while process.is_alive() and seq < 200000:
+            seq += 1
+            publisher.publish(frame_for(seq), seq=seq)
+
+        seqs, torn = results.get(timeout=10)
+        process.join(5)
+
+    assert torn == 0
+    assert len(seqs) == 20
+    assert seqs == sorted(set(seqs))
+
+
+def test_zero_copy_view_and_overwrite_detection():
+    with FrameBusPublisher(SIZE, slots=2) as publisher:
+        subscriber = FrameBusSubscriber(publisher.name)
+        assert subscriber.latest() is None
+
+        publisher.publish(FramePacket(frame_for(1), seq=1, timestamp=0.0, source_format='BGR'))
+        packet = subscriber.capture_packet(timeout=1.0)
+        assert packet.seq == 1
+        assert packet.timestamp == 0.0
+        assert not packet.source.flags.writeable
+        assert subscriber.valid(packet)
+
+        # 下一幀寫入另一個槽位，原本的 view 仍有效
+        publisher.publish(frame_for(2))
+        assert subscriber.valid(packet)
+        assert (packet.bgr == 1).all()
+
+        # 再下一幀覆寫同一個槽位
+        publisher.publish(frame_for(3))
+        assert not subscriber.valid(packet)
+
+        assert subscriber.capture_packet(timeout=1.0).seq == 3
+        with pytest.raises(TimeoutError):
+            subscriber.capture_packet(timeout=0.01)
+        del packet
+        subscriber.close()
+
+
+def test_publish_validates_size_and_order():
+    with FrameBusPublisher(SIZE) as publisher:
+        with pytest.raises(ValueError):
+            publisher.publish(np.zeros((10, 10, 3), dtype=np.uint8))
+        publisher.publish(frame_for(5), seq=5)
+        with pytest.raises(ValueError):
+            publisher.publish(frame_for(5), seq=5)
+
+
+def test_subscriber_close_keeps_segment():
+    with FrameBusPublisher(SIZE) as publisher:
+        publisher.publish(frame_for(1))
+        FrameBusSubscriber(publisher.name).close()
+
+        subscriber = FrameBusSubscriber(publisher.name)
+        assert subscriber.latest(copy=True).seq == 1
+        subscriber.close()
@@ -0,0 +1,86 @@
+"""
+影格封包測試
+
+驗證 FramePacket 的衍生影像與逐步轉換結果一致、只計算一次，
+且 TemplateMatcher 可以直接使用封包。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FramePacket
+from vision import TemplateMatcher
+
+
+def make_bgra(width=80, height=60, seed=0):
+    rng = np.random.default_rng(seed)
+    bgra = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    bgra.flags.writeable = False
+    return bgra
+
+
+def test_views_match_two_step_conversion():
+    bgra = make_bgra()
+    packet = FramePacket(bgra, seq=7)
+    bgr = cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR)
+
+    np.testing.assert_array_equal(packet.bgr, bgr)
+    np.testing.assert_array_equal(packet.gray, cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY))
+    np.testing.assert_array_equal(packet.rgb, cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB))
+    assert packet.seq == 7
+    assert packet.shape == (60, 80, 3)
+
+
+def test_views_are_cached():
+    packet = FramePacket(make_bgra())
+
+    assert packet.gray is packet.gray
+    assert packet.rgb is packet.rgb
+    assert packet.resized((40, 30)) is packet.resized((40, 30))
+    assert packet.resized((40, 30), gray=True).shape == (30, 40)
+
+
+def test_output_size_and_pyramid():
+    packet = FramePacket(make_bgra(), size=(40, 30))
+    assert packet.bgr.shape == (30, 40, 3)
+    assert packet.gray.shape == (30, 40)
+
+    levels = packet.pyramid(3)
+    assert [level.shape for level in levels] == [(30, 40), (15, 20), (8, 10)]
+    assert levels[0] is packet.gray
+    assert packet.pyramid(2)[1] is levels[1]
+
+
+def test_pool_reuses_buffers():
+    pool = {}
+    first = FramePacket(make_bgra(seed=1), pool=pool)
+    gray = first.gray
+    assert first.alloc_bytes == gray.nbytes
+
+    second = FramePacket(make_bgra(seed=2), pool=pool)
+    assert second.gray is gray
+    assert second.alloc_bytes == 0
+
+
+def test_matcher_accepts_packet():
+    bgra = make_bgra(seed=3)
+    packet = FramePacket(bgra)
+
+    matcher = TemplateMatcher(threshold=0.9)
+    template = np.ascontiguousarray(packet.bgr[20:40, 30:50])
+    matcher.templates['patch'] = {
+        'image': template,
+        'gray': cv2.cvtColor(template, cv2.COLOR_BGR2GRAY),
+        'shape': template.shape[:2],
+    }
+
+    assert matcher.match(packet, 'patch') == matcher.match(packet.bgr, 'patch')
+    x, y, confidence = matcher.match(packet, 'patch')
+    assert (x, y) == (40, 30)
+    assert confidence > 0.99
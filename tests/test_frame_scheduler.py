@@ -0,0 +1,123 @@
+"""
+影格排程測試
+
+驗證截止時間排程不會累積漂移、落後時跳過影格，以及計時直方圖的百分位數。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import BaseCapture, FrameScheduler
+from profiling import TimingHistogram
+
+
+class StubCapture(BaseCapture):
+    """回傳固定影像的擷取來源"""
+
+    def __init__(self, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.image = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    def _grab(self, pool):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.image, 'BGR'
+
+
+def test_histogram_percentiles():
+    hist = TimingHistogram(window=100)
+    for value in range(1, 101):
+        hist.add(value / 1000)
+
+    summary = hist.summary()
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == pytest.approx(50.5)
+    assert summary["p99_ms"] == pytest.approx(99.01)
+    assert summary["max_ms"] == pytest.approx(100.0)
+
+
+def test_histogram_keeps_only_window():
+    hist = TimingHistogram(window=4)
+    for value in [10.0, 10.0, 1.0, 1.0, 1.0, 1.0]:
+        hist.add(value)
+
+    assert hist.count == 6
+    assert hist.values().tolist() == [1.0] * 4
+    assert hist.mean() == 1.0
+
+
+def test_no_drift_over_many_frames():
+    scheduler = FrameScheduler(fps=200)
+    start = time.perf_counter()
+    for _ in range(41):
+        scheduler.wait()
+    elapsed = time.perf_counter() - start
+
+    # 40 個間隔 = 200ms；逐幀 sleep 的誤差不應累積
+    assert elapsed == pytest.approx(0.2, abs=0.015)
+    assert scheduler.fps == pytest.approx(200, rel=0.1)
+
+
+def test_skips_frames_when_behind():
+    scheduler = FrameScheduler(fps=100)
+    scheduler.wait()
+    time.sleep(0.055)
+    skipped = scheduler.wait()
+
+    assert skipped >= 4
+    assert scheduler.skipped_frames == skipped
+
+    # 跳過後仍維持原本的相位：下一幀在 10ms 內
+    start = time.perf_counter()
+    scheduler.wait()
+    assert time.perf_counter() - start < 0.011
+
+
+def test_unlimited_records_intervals():
+    scheduler = FrameScheduler(fps=None)
+    for _ in range(5):
+        scheduler.wait()
+
+    stats = scheduler.get_stats()
+    assert stats["target_fps"] == 0.0
+    assert stats["interval"]["count"] == 4
+    assert stats["skipped_frames"] == 0
+
+
+def test_capture_reports_timing_stats():
+    with StubCapture(delay=0.002, fps_limit=100) as capturer:
+        for _ in range(10):
+            capturer.capture()
+        stats = capturer.get_timing_stats()
+
+    assert stats["capture"]["count"] == 10
+    assert stats["capture"]["p50_ms"] >= 2.0
+    assert stats["interval"]["p50_ms"] == pytest.approx(10.0, abs=1.5)
+    assert capturer.get_fps() == pytest.approx(100, abs=15)
+
+
+def test_spin_margin_is_capped(monkeypatch):
+    scheduler = FrameScheduler(fps=100)
+    # 負載高時量測到的睡眠超時：不應整段改為忙碌等待
+    scheduler._oversleep = 0.008
+    sleeps = []
+    real_sleep = time.sleep
+
+    def record_sleep(seconds):
+        sleeps.append(seconds)
+        real_sleep(seconds)
+
+    monkeypatch.setattr(time, "sleep", record_sleep)
+    scheduler._sleep_until(time.perf_counter() + 0.01, 0.01)
+
+    # 先睡到截止時間前 2ms 內，忙碌等待時每次迴圈都讓出 CPU
+    assert sleeps[0] >= 0.0079
+    assert all(seconds == 0 for seconds in sleeps[1:])
@@ -0,0 +1,89 @@
+"""
+match_all 局部最大值與 NMS 測試
+
+驗證每個物件只回傳一個結果、IoU / 距離抑制與 top_k，
+以及低閾值時結果數量不會隨候選像素暴增。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FramePacket
+from vision import TemplateMatcher
+
+ICON = cv2.resize(
+    np.random.default_rng(0).integers(0, 256, (5, 5), dtype=np.uint8), (20, 20),
+    interpolation=cv2.INTER_CUBIC
+)
+POSITIONS = [(10, 10), (60, 15), (120, 80), (40, 140), (45, 160)]
+
+
+@pytest.fixture
+def scene():
+    rng = np.random.default_rng(1)
+    small = rng.integers(0, 256, (40, 40), dtype=np.uint8)
+    screen = cv2.resize(small, (200, 240), interpolation=cv2.INTER_CUBIC)
+    for x, y in POSITIONS:
+        screen[y:y + 20, x:x + 20] = ICON
+    return cv2.cvtColor(screen, cv2.COLOR_GRAY2BGR)
+
+
+@pytest.fixture
+def matcher():
+    matcher = TemplateMatcher(threshold=0.95)
+    matcher.templates["icon"] = {"image": None, "gray": ICON, "shape": ICON.shape}
+    return matcher
+
+
+def centers(matches):
+    return sorted((x, y) for x, y, _ in matches)
+
+
+def test_one_result_per_object(matcher, scene):
+    matches = matcher.match_all(scene, "icon")
+
+    assert centers(matches) == sorted((x + 10, y + 10) for x, y in POSITIONS)
+    confidences = [c for _, _, c in matches]
+    assert confidences == sorted(confidences, reverse=True)
+    assert all(c > 0.99 for c in confidences)
+
+
+def test_distance_and_top_k(matcher, scene):
+    # (40, 140) 與 (45, 160) 的中心相距約 20.6 像素
+    assert len(matcher.match_all(scene, "icon", min_distance=21)) == 4
+    assert len(matcher.match_all(scene, "icon", min_distance=20)) == 5
+    assert len(matcher.match_all(scene, "icon", top_k=2)) == 2
+
+
+def test_roi_offset_and_sqdiff(matcher, scene):
+    roi = FramePacket(scene, source_format='BGR').crop((100, 60, 100, 100), roi="area")
+    assert centers(matcher.match_all(roi, "icon")) == [(130, 90)]
+
+    matches = matcher.match_all(scene, "icon", method=cv2.TM_SQDIFF_NORMED)
+    assert centers(matches) == sorted((x + 10, y + 10) for x, y in POSITIONS)
+
+
+def test_low_threshold_stays_bounded(matcher, scene):
+    matcher.threshold = -1.0
+    matches = matcher.match_all(scene, "icon", top_k=50)
+    assert len(matches) == 50
+
+    # 沒有 top_k 時，結果數量受外框重疊限制，遠小於候選像素數
+    result_pixels = (240 - 19) * (200 - 19)
+    matches = matcher.match_all(scene, "icon", iou_threshold=0.0)
+    assert len(matches) < result_pixels / 100
+
+
+def test_nms_iou():
+    xs = np.array([0, 5, 30])
+    ys = np.array([0, 0, 0])
+    # 10x10 外框平移 5 像素：IoU = 50 / 150
+    assert TemplateMatcher._nms(xs, ys, 10, 10, iou_threshold=0.3) == [0, 2]
+    assert TemplateMatcher._nms(xs, ys, 10, 10, iou_threshold=0.4) == [0, 1, 2]
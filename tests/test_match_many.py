@@ -0,0 +1,109 @@
+"""
+批次模板匹配測試
+
+驗證 match_many() 的結果與逐一呼叫 match() 相同、灰階影像只轉換一次，
+以及找到第一個匹配即停止。
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ChangeDetector, FramePacket
+from vision import TemplateMatcher
+
+
+@pytest.fixture
+def screen():
+    rng = np.random.default_rng(1)
+    return rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+
+
+def make_matcher(screen, workers=4, **kwargs):
+    """從畫面切出模板：hit_* 在畫面中，miss_* 為隨機雜訊"""
+    matcher = TemplateMatcher(threshold=0.95, workers=workers, **kwargs)
+    gray = FramePacket(screen, seq=1, source_format='BGR').gray
+    rng = np.random.default_rng(2)
+    for index in range(6):
+        x, y = 10 + index * 20, 10 + index * 15
+        template = gray[y:y + 20, x:x + 24].copy()
+        matcher.templates[f"hit_{index}"] = {"image": None, "gray": template, "shape": template.shape}
+        noise = rng.integers(0, 256, (20, 24), dtype=np.uint8)
+        matcher.templates[f"miss_{index}"] = {"image": None, "gray": noise, "shape": noise.shape}
+    return matcher
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_matches_same_as_serial(screen, workers):
+    matcher = make_matcher(screen, workers=workers)
+    packet = FramePacket(screen, seq=1, source_format='BGR')
+
+    results = matcher.match_many(packet)
+    expected = {name: matcher.match(packet, name) for name in matcher.get_template_names()}
+    matcher.close()
+
+    assert results == expected
+    assert results["hit_2"][:2] == (50 + 12, 40 + 10)
+    assert results["miss_0"] is None
+
+
+def test_unknown_template_and_offset(screen):
+    matcher = make_matcher(screen)
+    roi = FramePacket(screen, seq=1, source_format='BGR').crop((20, 15, 100, 80), roi="area")
+
+    results = matcher.match_many(roi, ["hit_1", "missing"])
+    matcher.close()
+
+    assert results["missing"] is None
+    assert results["hit_1"][:2] == (30 + 12, 25 + 10)
+
+
+def test_gray_prepared_once(screen, monkeypatch):
+    matcher = make_matcher(screen)
+    calls = []
+    original = TemplateMatcher._to_gray
+
+    def counting(image):
+        calls.append(1)
+        return original(image)
+
+    monkeypatch.setattr(TemplateMatcher, "_to_gray", staticmethod(counting))
+    matcher.match_many(screen)
+    matcher.close()
+
+    assert len(calls) == 1
+
+
+def test_stop_on_first(screen):
+    matcher = make_matcher(screen, workers=1)
+    results = matcher.match_many(screen, ["miss_0", "hit_3", "hit_4", "miss_1"], stop_on_first=True)
+
+    assert list(results) == ["miss_0", "hit_3"]
+    assert results["hit_3"] is not None
+
+    matcher = make_matcher(screen, workers=4)
+    results = matcher.match_many(screen, stop_on_first=True)
+    matcher.close()
+    assert any(match is not None for match in results.values())
+
+
+def test_reuses_unchanged_results(screen):
+    detector = ChangeDetector(tile_size=16, cell_size=4)
+    matcher = make_matcher(screen, change_detector=detector)
+
+    first = FramePacket(screen, seq=1, source_format='BGR')
+    detector.update(first, 1)
+    matcher.match_many(first)
+
+    second = FramePacket(screen.copy(), seq=2, source_format='BGR')
+    detector.update(second, 2)
+    results = matcher.match_many(second)
+    matcher.close()
+
+    assert matcher.reuse_hits == len(matcher.templates)
+    assert results["hit_0"] is not None
@@ -0,0 +1,94 @@
+"""
+多實例擷取測試
+
+以假的 mss（像素值由螢幕絕對座標決定）驗證每個 tick 只擷取聯集一次，
+且各實例畫面是聯集影像的 view、座標相對於實例視窗。
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ChangeDetector, MultiInstanceCapture
+from capture.multi_instance import union_region
+
+REGIONS = {
+    "emu_1": {"left": 100, "top": 50, "width": 60, "height": 80},
+    "emu_2": {"left": 170, "top": 40, "width": 60, "height": 80},
+}
+
+
+def test_union_region():
+    assert union_region(REGIONS) == {"left": 100, "top": 40, "width": 130, "height": 90}
+    with pytest.raises(ValueError):
+        union_region({})
+
+
+def test_instances_are_views_of_single_grab(fake_mss):
+    # 限制 FPS，確保取得的影格仍留在環形緩衝區內
+    with MultiInstanceCapture(REGIONS, fps_limit=50) as service:
+        first = service.instance("emu_1")
+        second = service.instance("emu_2")
+
+        a = first.capture_packet()
+        b = second.capture_packet()
+        union_a = service.ring.get(a.seq)
+        union_b = service.ring.get(b.seq)
+        grabs = list(service._source.sct.grabs)
+
+    assert all(grab == service.union for grab in grabs)
+
+    # 實例畫面是聯集影像的 view（不複製像素）
+    assert np.shares_memory(a.source, union_a.source)
+    assert np.shares_memory(b.source, union_b.source)
+
+    # 座標相對於各自的視窗：左上角像素為視窗的螢幕絕對座標
+    assert a.bgr.shape == (80, 60, 3)
+    assert a.bgr[0, 0, :2].tolist() == [100, 50]
+    assert b.bgr[0, 0, :2].tolist() == [170, 40]
+    assert a.offset == (0, 0)
+
+
+def test_each_consumer_sees_every_new_frame_once(fake_mss):
+    with MultiInstanceCapture(REGIONS, fps_limit=200) as service:
+        consumers = [service.instance(name) for name in REGIONS]
+        seqs = {name: [] for name in REGIONS}
+
+        def consume(consumer):
+            for _ in range(5):
+                seqs[consumer.name].append(consumer.capture_packet().seq)
+
+        threads = [threading.Thread(target=consume, args=(c,)) for c in consumers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+    for values in seqs.values():
+        assert len(values) == 5
+        assert values == sorted(set(values))
+
+
+def test_instance_resize_and_change_detector(fake_mss):
+    with MultiInstanceCapture(REGIONS, fps_limit=0) as service:
+        detector = ChangeDetector(tile_size=16, cell_size=4)
+        consumer = service.instance("emu_2", resize=(30, 40), change_detector=detector)
+        packet = consumer.capture_packet()
+        stats = service.get_stats()
+
+    assert packet.bgr.shape == (40, 30, 3)
+    assert detector.last_seq == packet.seq
+    assert stats["union_pixels"] == 130 * 90
+    assert stats["instance_pixels"] == 2 * 60 * 80
+
+
+def test_unknown_instance_raises(fake_mss):
+    with MultiInstanceCapture(REGIONS, fps_limit=0) as service:
+        with pytest.raises(KeyError):
+            service.instance("emu_3")
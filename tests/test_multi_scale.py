@@ -0,0 +1,117 @@
+"""
+多尺度模板匹配測試
+
+驗證畫面縮放後仍能找到模板、找到後鎖定比例只做單一比例匹配，
+以及連續未匹配後重新搜尋所有比例。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from vision import TemplateMatcher
+from conftest import smooth_noise
+
+
+TEMPLATE = smooth_noise((40, 60), seed=2)
+
+
+def make_screen(scale, x, y, seed=1):
+    """模板依 scale 縮放後貼在 (x, y)"""
+    screen = smooth_noise((300, 240), seed)
+    scaled = cv2.resize(TEMPLATE, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+    h, w = scaled.shape
+    screen[y:y + h, x:x + w] = scaled
+    return cv2.cvtColor(screen, cv2.COLOR_GRAY2BGR), (x + w // 2, y + h // 2)
+
+
+@pytest.fixture
+def matcher(record_calls):
+    matcher = TemplateMatcher(threshold=0.9, scale_range=(0.6, 1.4), scale_step=0.1, scale_miss_limit=3)
+    matcher.templates["button"] = {"image": None, "gray": TEMPLATE, "shape": TEMPLATE.shape}
+
+    # 記錄每次匹配實際使用的比例
+    matcher.located = record_calls(
+        matcher, "_locate", lambda screen_gray, template_data, *args, **kwargs: template_data['shape']
+    )
+    return matcher
+
+
+def test_scale_list():
+    assert TemplateMatcher._scale_list(None, 0.1) == [1.0]
+    assert TemplateMatcher._scale_list((0.8, 1.2), 0.1) == [0.8, 0.9, 1.0, 1.1, 1.2]
+    assert 1.0 in TemplateMatcher._scale_list((0.75, 1.35), 0.2)
+    with pytest.raises(ValueError):
+        TemplateMatcher._scale_list((1.2, 0.8), 0.1)
+
+
+def test_finds_scaled_template_and_locks(matcher):
+    screen, center = make_screen(0.8, 50, 70)
+
+    found = matcher.match(screen, "button")
+    assert found is not None
+    assert abs(found[0] - center[0]) <= 1 and abs(found[1] - center[1]) <= 1
+    assert matcher.locked_scale == 0.8
+    assert len(matcher.located) == len(matcher.scales)
+    assert matcher.template_shape("button") == (32, 48)
+
+    # 鎖定後只匹配單一比例
+    matcher.located.clear()
+    assert matcher.match(screen, "button") is not None
+    assert matcher.located == [(32, 48)]
+
+    # 縮放後的模板快取在模板資料中
+    assert set(matcher.templates["button"]["scaled"]) == set(matcher.scales) - {1.0}
+
+
+def test_miss_streak_rescans_and_relocks(matcher):
+    screen, _ = make_screen(0.8, 50, 70)
+    matcher.match(screen, "button")
+
+    moved, center = make_screen(1.3, 30, 100, seed=3)
+    for _ in range(3):
+        matcher.located.clear()
+        assert matcher.match(moved, "button") is None
+        assert len(matcher.located) == 1
+
+    # 第 4 次重新搜尋所有比例，找到新比例並重新鎖定
+    matcher.located.clear()
+    found = matcher.match(moved, "button")
+    assert found is not None
+    assert len(matcher.located) == len(matcher.scales)
+    assert matcher.locked_scale == 1.3
+
+    matcher.reset_scale()
+    assert matcher.locked_scale is None
+
+
+def test_single_scale_by_default():
+    matcher = TemplateMatcher(threshold=0.9)
+    matcher.templates["button"] = {"image": None, "gray": TEMPLATE, "shape": TEMPLATE.shape}
+    screen, center = make_screen(1.0, 20, 30)
+
+    assert matcher.match(screen, "button")[:2] == center
+    assert matcher.locked_scale is None
+    assert "scaled" not in matcher.templates["button"]
+
+
+def test_absent_template_does_not_trigger_rescans(matcher):
+    other = smooth_noise((30, 30), seed=5)
+    matcher.templates["other"] = {"image": None, "gray": other, "shape": other.shape}
+    screen, _ = make_screen(0.8, 50, 70)
+    assert matcher.match(screen, "button") is not None
+
+    # 從未匹配過的模板只以鎖定比例搜尋，未匹配次數也不影響其他模板
+    for _ in range(10):
+        matcher.located.clear()
+        assert matcher.match(screen, "other") is None
+        assert matcher.located == [(24, 24)]
+    matcher.located.clear()
+    assert matcher.match(screen, "button") is not None
+    assert matcher.located == [(32, 48)]
+    assert matcher.locked_scale == 0.8
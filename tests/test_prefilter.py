@@ -0,0 +1,160 @@
+"""
+統計預篩測試
+
+驗證預篩由閾值與匹配方法推導信心度上界：與模板像素相同的畫面在任何位置、大小與縮小層數下
+都不會被排除，亮度平移與對比縮放後的匹配結果與停用預篩時相同，TM_CCOEFF_NORMED 不執行預篩，
+統計差異明顯的模板在 matchTemplate 之前被排除，以及模板的總和與平方和在載入時計算。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from vision import TemplateMatcher
+from conftest import smooth_noise
+
+
+# 暗色的戰鬥畫面與亮色的對話框按鈕
+BACKGROUND = smooth_noise((360, 640), seed=1, cell=30, low=0, high=90)
+BUTTON = smooth_noise((40, 96), seed=2, cell=8, low=180, high=256)
+ENEMY = smooth_noise((30, 36), seed=3, cell=5, low=0, high=90)
+
+
+def make_matcher(threshold=0.9, **kwargs):
+    matcher = TemplateMatcher(threshold=threshold, prefilter_level=2, **kwargs)
+    for name, gray in [("button", BUTTON), ("enemy", ENEMY)]:
+        matcher.templates[name] = {"image": None, "gray": gray, "shape": gray.shape}
+    return matcher
+
+
+def place(template, x, y, screen=BACKGROUND):
+    screen = screen.copy()
+    h, w = template.shape
+    screen[y:y + h, x:x + w] = template
+    return screen
+
+
+def adjust(template, gain=1.0, bias=0.0):
+    """亮度平移與對比縮放"""
+    return np.clip(template * gain + bias, 0, 255).astype(np.uint8)
+
+
+def test_exact_occurrence_is_never_rejected():
+    rng = np.random.default_rng(0)
+    for trial in range(200):
+        h, w = (int(v) for v in rng.integers(6, 60, 2))
+        template = smooth_noise((h, w), seed=100 + trial, cell=int(rng.integers(1, 8)))
+        matcher = TemplateMatcher(threshold=0.999, prefilter_level=int(rng.integers(1, 4)))
+        matcher.templates["t"] = {"image": None, "gray": template, "shape": template.shape}
+
+        x, y = int(rng.integers(0, 640 - w)), int(rng.integers(0, 360 - h))
+        screen = place(template, x, y, smooth_noise((360, 640), seed=trial, cell=20))
+        passed = matcher._prefilter(screen, matcher.templates["t"], [1.0], cv2.TM_SQDIFF_NORMED, 0.999)
+        assert passed == [1.0], (h, w, x, y)
+
+    assert matcher.prefilter_rejects == 0
+
+
+def test_signature_computed_at_load(tmp_path):
+    cv2.imwrite(str(tmp_path / "button.png"), cv2.cvtColor(BUTTON, cv2.COLOR_GRAY2BGR))
+    matcher = TemplateMatcher(prefilter_level=2, scale_range=(0.9, 1.1), scale_step=0.1)
+    assert matcher.load_templates_from_dir(str(tmp_path)) == 1
+
+    data = matcher.templates["button"]
+    expected = BUTTON.astype(np.float64)
+    assert data["prefilter"] == (expected.sum(), (expected * expected).sum())
+    for scale in (0.9, 1.1):
+        scaled = data["scaled"][scale]["gray"].astype(np.float64)
+        assert data["scaled"][scale]["prefilter"] == (scaled.sum(), (scaled * scaled).sum())
+
+
+def test_rejects_before_correlation(record_calls):
+    matcher = make_matcher()
+    located = record_calls(
+        matcher, "_locate", lambda screen_gray, template_data, *args, **kwargs: template_data['shape']
+    )
+
+    screen = place(ENEMY, 300, 200)
+    results = matcher.match_many(screen, ["button", "enemy"], method=cv2.TM_SQDIFF_NORMED)
+    assert results["button"] is None
+    assert results["enemy"][:2] == (318, 215)
+    assert located == [ENEMY.shape]
+    assert (matcher.prefilter_checks, matcher.prefilter_rejects) == (2, 1)
+    assert matcher.prefilter_rejection_rate == 0.5
+
+
+def test_ccoeff_normed_is_not_prefiltered():
+    # TM_CCOEFF_NORMED 不受亮度與對比影響：變暗或對比降低的按鈕仍然匹配
+    matcher = make_matcher()
+    for gain, bias in [(1.0, -25), (0.75, 0), (0.5, -60)]:
+        screen = place(adjust(BUTTON, gain, bias), 270, 147)
+        assert matcher.match(screen, "button")[:2] == (318, 167)
+    assert matcher.prefilter_checks == 0
+
+
+@pytest.mark.parametrize("method", [cv2.TM_SQDIFF_NORMED, cv2.TM_CCORR_NORMED, cv2.TM_CCOEFF_NORMED])
+@pytest.mark.parametrize("gain, bias", [(1.0, -25), (1.0, 30), (0.75, 0), (1.2, -40), (0.6, 50)])
+def test_brightness_and_contrast_results_unchanged(method, gain, bias):
+    screens = [
+        place(adjust(BUTTON, gain, bias), 270, 147),
+        place(adjust(ENEMY, gain, bias), 31, 17, place(adjust(BUTTON, gain, bias), 517, 3)),
+        adjust(BACKGROUND, gain, bias),
+    ]
+    for threshold in (0.7, 0.9, 0.97):
+        baseline = make_matcher(threshold)
+        baseline.prefilter_level = 0
+        matcher = make_matcher(threshold)
+        for screen in screens:
+            for name in ("button", "enemy"):
+                assert matcher.match(screen, name, method) == baseline.match(screen, name, method)
+
+
+def test_random_changes_results_unchanged():
+    rng = np.random.default_rng(7)
+    methods = [cv2.TM_SQDIFF_NORMED, cv2.TM_SQDIFF, cv2.TM_CCORR]
+    for trial in range(150):
+        method = methods[trial % len(methods)]
+        h, w = (int(v) for v in rng.integers(4, 50, 2))
+        template = smooth_noise((h, w), seed=300 + trial, cell=int(rng.integers(1, 8)))
+        screen = smooth_noise((160, 200), seed=trial, cell=int(rng.integers(1, 30)))
+        x, y = int(rng.integers(0, 200 - w)), int(rng.integers(0, 160 - h))
+        screen = place(adjust(template, rng.uniform(0.5, 1.3), rng.uniform(-60, 60)), x, y, screen)
+        if method == cv2.TM_SQDIFF_NORMED:
+            threshold = float(rng.uniform(0.5, 0.99))
+        else:
+            # 未正規化的方法以原始值比較（平方差 0 的信心度為 1）
+            threshold = float(rng.choice([1.0, -1e5, 1e5, 1e6]))
+
+        baseline = TemplateMatcher(threshold=threshold)
+        matcher = TemplateMatcher(threshold=threshold, prefilter_level=int(rng.integers(1, 4)))
+        for m in (baseline, matcher):
+            m.templates["t"] = {"image": None, "gray": template, "shape": template.shape}
+        assert matcher.match(screen, "t", method) == baseline.match(screen, "t", method), trial
+
+
+@pytest.mark.parametrize("scale_range", [None, (0.8, 1.2)])
+def test_results_unchanged(scale_range):
+    rng = np.random.default_rng(5)
+    screens = [BACKGROUND, place(BUTTON, 100, 200), place(ENEMY, 31, 17), place(BUTTON, 517, 3)]
+    # 壓縮雜訊與亮度微小變化
+    noisy = place(ENEMY, 400, 90, place(BUTTON, 250, 300)).astype(np.int16) + 3
+    noisy += rng.integers(-4, 5, noisy.shape)
+    screens.append(np.clip(noisy, 0, 255).astype(np.uint8))
+
+    baseline = make_matcher(scale_range=scale_range, scale_step=0.1)
+    baseline.prefilter_level = 0
+    matcher = make_matcher(scale_range=scale_range, scale_step=0.1)
+    for screen in screens:
+        screen = cv2.cvtColor(screen, cv2.COLOR_GRAY2BGR)
+        for name in ("button", "enemy"):
+            expected = baseline.match(screen, name, cv2.TM_SQDIFF_NORMED)
+            assert matcher.match(screen, name, cv2.TM_SQDIFF_NORMED) == expected
+
+    assert matcher.prefilter_rejects > 0
+    assert baseline.prefilter_checks == 0
@@ -0,0 +1,88 @@
+"""
+金字塔模板匹配測試
+
+驗證金字塔匹配的位置與信心度與完整匹配相同、小模板自動改用完整匹配，
+以及 FramePacket 的金字塔只建立一次。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FramePacket
+from vision import TemplateMatcher
+from conftest import smooth_noise
+
+
+@pytest.fixture
+def scene():
+    screen = smooth_noise((300, 200), seed=1)
+    template = smooth_noise((48, 64), seed=2)
+    screen[123:171, 57:121] = template
+    return cv2.cvtColor(screen, cv2.COLOR_GRAY2BGR), template
+
+
+def add_template(matcher, name, gray):
+    matcher.templates[name] = {"image": None, "gray": gray, "shape": gray.shape}
+
+
+@pytest.mark.parametrize("levels", [1, 2, 3])
+def test_pyramid_matches_exhaustive(scene, levels):
+    screen, template = scene
+    exhaustive = TemplateMatcher(threshold=0.9)
+    pyramid = TemplateMatcher(threshold=0.9, pyramid_levels=levels)
+    for matcher in (exhaustive, pyramid):
+        add_template(matcher, "target", template)
+        add_template(matcher, "absent", smooth_noise((48, 64), seed=3))
+
+    expected = exhaustive.match(screen, "target")
+    found = pyramid.match(screen, "target")
+
+    assert found[:2] == expected[:2] == (57 + 32, 123 + 24)
+    assert found[2] == pytest.approx(expected[2], abs=1e-5)
+    assert pyramid.match(screen, "absent") is None
+    # 48x64 的模板縮小 3 次後邊長小於 8，最多只用 2 層
+    assert len(pyramid._template_pyramid(pyramid.templates["target"])) == min(levels, 2) + 1
+
+
+def test_small_template_uses_exhaustive(scene, monkeypatch):
+    screen, _ = scene
+    matcher = TemplateMatcher(threshold=0.9, pyramid_levels=2, pyramid_min_size=8)
+    add_template(matcher, "small", cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY)[10:22, 20:40].copy())
+
+    calls = []
+    monkeypatch.setattr(matcher, "_locate_pyramid", lambda *args: calls.append(args))
+    assert matcher.match(screen, "small")[:2] == (30, 16)
+    assert calls == []
+    assert len(matcher._template_pyramid(matcher.templates["small"])) == 1
+
+
+def test_packet_pyramid_shared_by_match_many(scene):
+    screen, template = scene
+    matcher = TemplateMatcher(threshold=0.9, pyramid_levels=2, workers=2)
+    add_template(matcher, "target", template)
+    add_template(matcher, "flipped", template[:, ::-1].copy())
+
+    packet = FramePacket(screen, seq=1, source_format='BGR')
+    results = matcher.match_many(packet)
+    matcher.close()
+
+    assert results["target"][:2] == (89, 147)
+    assert len(packet._pyramid) == 3
+    assert packet._pyramid[0] is packet.gray
+
+
+def test_load_template_precomputes_pyramid(scene, tmp_path):
+    _, template = scene
+    path = tmp_path / "target.png"
+    cv2.imwrite(str(path), cv2.cvtColor(template, cv2.COLOR_GRAY2BGR))
+
+    matcher = TemplateMatcher(pyramid_levels=2)
+    assert matcher.load_template("target", str(path))
+    pyramid = matcher.templates["target"]["pyramid"]
+    assert [level.shape for level in pyramid] == [(48, 64), (24, 32), (12, 16)]
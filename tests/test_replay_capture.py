@@ -0,0 +1,144 @@
+"""
+回放擷取測試
+
+驗證記錄目錄、圖片目錄與影片檔的回放，以及 realtime / fast / step 模式與循環播放。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ChangeDetector, ReplayCapture, SessionRecorder
+from vision import TemplateMatcher
+
+
+def make_frame(index, width=64, height=48):
+    """第 index 幀：灰色背景上的移動白色方塊"""
+    frame = np.full((height, width, 3), 40, dtype=np.uint8)
+    x = 4 * index % (width - 8)
+    frame[10:18, x:x + 8] = 255
+    return frame
+
+
+@pytest.fixture
+def session_dir(tmp_path):
+    path = tmp_path / "session"
+    with SessionRecorder(str(path)) as recorder:
+        for index in range(10):
+            recorder.write(make_frame(index), timestamp=index * 0.02)
+    return path
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    path = tmp_path / "images"
+    path.mkdir()
+    for index in range(5):
+        cv2.imwrite(str(path / f"frame_{index:03d}.png"), make_frame(index))
+    return path
+
+
+def read_all(capturer):
+    frames = []
+    while True:
+        try:
+            frames.append(capturer.capture())
+        except EOFError:
+            return frames
+
+
+def test_session_replay_fast_is_identical(session_dir):
+    with ReplayCapture(str(session_dir), mode='fast') as capturer:
+        frames = read_all(capturer)
+        assert capturer.get_stats()["position"] == 10
+
+    assert len(frames) == 10
+    for index, frame in enumerate(frames):
+        np.testing.assert_array_equal(frame, make_frame(index))
+
+
+def test_image_directory_replay(image_dir):
+    with ReplayCapture(str(image_dir), mode='fast', resize=(32, 24)) as capturer:
+        assert capturer.source_type == 'images'
+        frames = read_all(capturer)
+
+    assert len(frames) == 5
+    assert frames[0].shape == (24, 32, 3)
+
+
+def test_video_replay(tmp_path):
+    path = tmp_path / "clip.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("OpenCV 無法寫入 MJPG 影片")
+    for index in range(6):
+        writer.write(make_frame(index))
+    writer.release()
+
+    with ReplayCapture(str(path), mode='fast') as capturer:
+        assert capturer.source_type == 'video'
+        frames = read_all(capturer)
+
+    assert len(frames) == 6
+    assert np.abs(frames[3].astype(int) - make_frame(3)).mean() < 8
+
+
+def test_realtime_follows_recorded_timestamps(session_dir):
+    with ReplayCapture(str(session_dir), mode='realtime') as capturer:
+        start = time.perf_counter()
+        read_all(capturer)
+        elapsed = time.perf_counter() - start
+
+    # 10 幀間隔 0.02 秒 = 0.18 秒
+    assert 0.16 <= elapsed < 0.4
+
+
+def test_step_mode_only_advances_on_step(session_dir):
+    with ReplayCapture(str(session_dir), mode='step') as capturer:
+        first = capturer.capture().copy()
+        np.testing.assert_array_equal(capturer.capture(), first)
+
+        capturer.step(2)
+        np.testing.assert_array_equal(capturer.capture(), make_frame(2))
+        assert capturer.position == 3
+
+
+def test_loop_restarts_from_beginning(image_dir):
+    with ReplayCapture(str(image_dir), mode='fast', loop=True) as capturer:
+        frames = [capturer.capture().copy() for _ in range(12)]
+        assert capturer.loops == 2
+
+    np.testing.assert_array_equal(frames[5], frames[0])
+    np.testing.assert_array_equal(frames[11], frames[1])
+
+
+def test_matcher_runs_headless_on_replay(image_dir):
+    matcher = TemplateMatcher(threshold=0.9, change_detector=ChangeDetector(tile_size=16, cell_size=4))
+    template = make_frame(0)[6:22, 0:16]
+    matcher.templates["block"] = {
+        "image": template,
+        "gray": cv2.cvtColor(template, cv2.COLOR_BGR2GRAY),
+        "shape": template.shape[:2],
+    }
+
+    with ReplayCapture(
+        str(image_dir), mode='fast', change_detector=matcher.change_detector
+    ) as capturer:
+        found = matcher.match(capturer.capture_packet(), "block")
+
+    assert found is not None
+    assert found[:2] == (8, 14)
+
+
+def test_missing_source_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ReplayCapture(str(tmp_path / "missing"))
+    with pytest.raises(ValueError):
+        ReplayCapture(str(tmp_path), mode='slow')
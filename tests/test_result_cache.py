@@ -0,0 +1,199 @@
+"""
+匹配結果快取測試
+
+驗證同一影格的重複查詢不重新匹配、不同影格與修改閾值後重新匹配、
+一般陣列只在啟用內容雜湊時快取、快取命中仍更新匹配狀態、快取大小上限、
+多實例擷取的各實例畫面不共用結果，
+以及 match_all() 共用保留的匹配分數圖。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FramePacket, MultiInstanceCapture
+from vision import TemplateMatcher
+from vision.result_cache import ResultCache, MISSING, frame_key
+from conftest import smooth_noise
+
+
+TARGET = smooth_noise((20, 24), seed=2)
+
+
+def make_screen(*positions):
+    screen = smooth_noise((200, 300), seed=1)
+    for x, y in positions:
+        screen[y:y + 20, x:x + 24] = TARGET
+    return cv2.cvtColor(screen, cv2.COLOR_GRAY2BGR)
+
+
+@pytest.fixture
+def matcher(record_calls):
+    matcher = TemplateMatcher(threshold=0.9, result_cache_size=4, keep_response_maps=2)
+    matcher.templates["button"] = {"image": None, "gray": TARGET, "shape": TARGET.shape}
+
+    # 記錄實際執行的匹配
+    matcher.matched = record_calls(matcher, "_match_gray", lambda screen_gray, name, *args, **kwargs: name)
+    return matcher
+
+
+def test_repeated_queries_on_same_frame(matcher):
+    packet = FramePacket(make_screen((40, 50)), seq=7, timestamp=12.5, source_format='BGR')
+    found = matcher.match(packet, "button")
+    assert found[:2] == (52, 60)
+
+    assert matcher.match(packet, "button") == found
+    assert matcher.match_many(packet, ["button"]) == {"button": found}
+    assert matcher.visualize_match(packet, "button") is not None
+    assert len(matcher.matched) == 1
+    assert matcher.result_cache.hits == 3
+
+    # 擷取器產生的封包以序號與時間識別，同一影格的另一個封包也命中
+    again = FramePacket(packet.source, seq=7, timestamp=12.5, source_format='BGR')
+    assert matcher.match(again, "button") == found
+    assert len(matcher.matched) == 1
+
+
+def test_new_frames_and_threshold_change(matcher):
+    # 一般陣列預設視為新的影格
+    screen = make_screen((40, 50))
+    matcher.match(screen, "button")
+    matcher.match(screen, "button")
+    assert len(matcher.matched) == 2
+
+    # 啟用內容雜湊時，內容相同的陣列命中快取
+    matcher.matched.clear()
+    matcher.cache_by_content = True
+    matcher.match(screen, "button")
+    matcher.match(screen.copy(), "button")
+    assert len(matcher.matched) == 1
+
+    # 不同序號或不同內容視為新影格
+    matcher.match(FramePacket(screen, seq=1, source_format='BGR'), "button")
+    matcher.match(FramePacket(screen, seq=2, source_format='BGR'), "button")
+    assert matcher.match(make_screen((80, 50)), "button")[:2] == (92, 60)
+    assert len(matcher.matched) == 4
+
+    # 修改閾值後不取得舊結果
+    matcher.threshold = 1.01
+    assert matcher.match(screen, "button") is None
+    assert len(matcher.matched) == 5
+
+
+def test_cache_is_bounded():
+    cache = ResultCache(max_size=2)
+    cache.put(("a", "x"), 1)
+    cache.put(("b", "x"), None)
+    assert cache.get(("a", "x")) == 1
+    cache.put(("c", "y"), 3)
+
+    # 最久未使用的 b 被移除，結果為 None 也能快取
+    assert len(cache) == 2
+    assert cache.get(("b", "x")) is MISSING
+    cache.discard("x")
+    assert cache.get(("a", "x")) is MISSING
+    assert cache.get(("c", "y")) == 3
+
+    assert frame_key(FramePacket(make_screen(), seq=3, timestamp=1.0, source_format='BGR'))[0] == 'frame'
+    assert frame_key(FramePacket(make_screen(), seq=3, source_format='BGR')) is None
+    assert frame_key(make_screen()) is None
+    assert frame_key(make_screen(), content=True) == frame_key(make_screen(), content=True)
+    assert frame_key(make_screen(), content=True) != frame_key(make_screen((10, 10)), content=True)
+    assert frame_key("not an image", content=True) is None
+
+
+def test_regional_miss_is_not_cached():
+    matcher = TemplateMatcher(
+        threshold=0.9, learn_regions=True, region_margin=4, region_miss_limit=2, cache_by_content=True
+    )
+    matcher.templates["button"] = {"image": None, "gray": TARGET, "shape": TARGET.shape}
+    matcher.match(make_screen((40, 50)), "button")
+
+    # 目標移出學習區域：同一影格連續查詢仍會在達到上限後搜尋整個畫面
+    moved = make_screen((200, 120))
+    assert matcher.match(moved, "button") is None
+    assert matcher.match(moved, "button") is None
+    assert matcher.match(moved, "button")[:2] == (212, 130)
+    assert matcher.match(moved, "button")[:2] == (212, 130)
+
+
+def test_cache_hit_updates_miss_streak():
+    matcher = TemplateMatcher(threshold=0.9, learn_regions=True, region_margin=4, region_miss_limit=3)
+    matcher.templates["button"] = {"image": None, "gray": TARGET, "shape": TARGET.shape}
+    matcher.match(FramePacket(make_screen((40, 50)), seq=1, timestamp=1.0, source_format='BGR'), "button")
+
+    # 連續 3 次區域內未匹配後完整搜尋一次並快取結果；命中時與重新匹配相同，累計區域內的未匹配次數
+    moved = make_screen((200, 120))
+    for seq in range(2, 5):
+        matcher.match(FramePacket(moved, seq=seq, timestamp=float(seq), source_format='BGR'), "button")
+    packet = FramePacket(make_screen(), seq=5, timestamp=5.0, source_format='BGR')
+    assert matcher.match(packet, "button") is None
+    assert matcher._miss_streaks["button"] == 0
+    assert matcher.match(packet, "button") is None
+    assert matcher.match_many(packet, ["button"]) == {"button": None}
+    assert matcher.result_cache.hits == 2
+    assert matcher._miss_streaks["button"] == 2
+
+
+class StillSource:
+    """每次擷取都回傳同一張影像的擷取來源"""
+
+    def __init__(self, image):
+        self.image = image
+
+    def capture(self):
+        return self.image
+
+    def close(self):
+        pass
+
+
+def test_instances_do_not_share_results():
+    # 兩個並排的同尺寸實例，目標只出現在 emu_1
+    regions = {
+        "emu_1": {"left": 0, "top": 0, "width": 150, "height": 200},
+        "emu_2": {"left": 150, "top": 0, "width": 150, "height": 200},
+    }
+    screen = make_screen((30, 40))
+    with MultiInstanceCapture(regions, fps_limit=0, source_factory=lambda union: StillSource(screen)) as service:
+        frame = service.wait_next(0, 5.0)
+        # 同一次擷取切出的兩個實例畫面：序號與擷取時間相同
+        a = service.instance("emu_1")._view(frame)
+        b = service.instance("emu_2")._view(frame)
+
+    assert (a.seq, a.timestamp, a.offset) == (b.seq, b.timestamp, b.offset)
+    shared = TemplateMatcher(threshold=0.9)
+    shared.templates["button"] = {"image": None, "gray": TARGET, "shape": TARGET.shape}
+    assert shared.match(a, "button")[:2] == (42, 50)
+    assert shared.match(b, "button") is None
+    assert shared.result_cache.hits == 0
+
+
+def test_match_all_shares_response_map(matcher, monkeypatch):
+    calls = []
+    original = cv2.matchTemplate
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(cv2, "matchTemplate", counting)
+    packet = FramePacket(make_screen((40, 50), (200, 120)), seq=1, timestamp=3.0, source_format='BGR')
+
+    assert len(matcher.match_all(packet, "button")) == 2
+    assert len(matcher.match_all(packet, "button", top_k=1)) == 1
+    assert len(matcher.match_all(packet, "button")) == 2
+    response = matcher.response_map(packet, "button")
+    assert len(calls) == 1
+    assert response.shape == (181, 277)
+    assert not response.flags.writeable
+
+    # 模板重新載入後分數圖失效
+    matcher._forget("button")
+    matcher.match_all(packet, "button")
+    assert len(calls) == 2
@@ -0,0 +1,120 @@
+"""
+畫面狀態分類測試
+
+驗證感知雜湊索引能辨識帶有雜訊的畫面、拒絕未知畫面、
+從已分類的截圖目錄建立並存取索引，以及 match_screen() 只匹配該畫面相關的模板。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FramePacket
+from vision import ScreenStateIndex, TemplateMatcher
+from conftest import smooth_noise
+
+
+SCREENS = {
+    "lobby": smooth_noise((640, 360, 3), seed=1, cell=40),
+    "battle": smooth_noise((640, 360, 3), seed=2, cell=40),
+    "result": smooth_noise((640, 360, 3), seed=3, cell=40),
+}
+
+
+def live(screen, seed):
+    """加上雜訊與小幅亮度變化的即時畫面"""
+    rng = np.random.default_rng(seed)
+    noisy = screen.astype(np.int16) + rng.integers(-12, 13, screen.shape) + 8
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+@pytest.fixture
+def screenshot_dir(tmp_path):
+    directory = tmp_path / "screenshots"
+    for state, screen in SCREENS.items():
+        (directory / state).mkdir(parents=True)
+        for i in range(2):
+            cv2.imwrite(str(directory / state / f"{i}.png"), live(screen, seed=100 + i))
+    # 未分類的截圖不會加入索引
+    cv2.imwrite(str(directory / "demo_1.png"), SCREENS["lobby"])
+    (directory / "states.yaml").write_text(
+        "lobby: [button_start]\n"
+        "battle: [enemy, skill]\n",
+        encoding="utf-8"
+    )
+    return directory
+
+
+def test_classify_noisy_frames():
+    index = ScreenStateIndex()
+    for state, screen in SCREENS.items():
+        index.add(state, screen)
+
+    for seed, (state, screen) in enumerate(SCREENS.items()):
+        found, distance = index.classify(live(screen, seed))
+        assert found == state
+        assert 0 <= distance <= index.max_distance
+
+    # FramePacket 與灰階影像結果相同
+    packet = FramePacket(live(SCREENS["battle"], 7), seq=1, source_format='BGR')
+    assert index.classify(packet)[0] == "battle"
+    assert index.classify(cv2.cvtColor(SCREENS["battle"], cv2.COLOR_BGR2GRAY))[0] == "battle"
+
+
+def test_unknown_screen():
+    index = ScreenStateIndex()
+    assert index.classify(SCREENS["lobby"]) == (None, -1)
+
+    index.add("lobby", SCREENS["lobby"])
+    state, distance = index.classify(smooth_noise((640, 360, 3), seed=9, cell=40))
+    assert state is None
+    assert distance > index.max_distance
+
+
+def test_build_save_load(screenshot_dir, tmp_path):
+    index = ScreenStateIndex.build_from_dir(str(screenshot_dir))
+    assert len(index) == 6
+    assert index.states == ["battle", "lobby", "result"]
+    assert index.templates == {"lobby": ["button_start"], "battle": ["enemy", "skill"]}
+
+    path = tmp_path / "states.npz"
+    index.save(str(path))
+    loaded = ScreenStateIndex.load(str(path))
+    assert loaded.labels == index.labels
+    assert loaded.anchors == index.anchors
+    assert loaded.max_distance == index.max_distance
+    assert loaded.templates == index.templates
+    assert np.array_equal(loaded.signatures, index.signatures)
+    assert loaded.classify(live(SCREENS["result"], 5))[0] == "result"
+
+    with pytest.raises(ValueError):
+        ScreenStateIndex.build_from_dir(str(tmp_path / "screenshots" / "lobby"))
+
+
+def test_match_screen_limits_templates(screenshot_dir):
+    matcher = TemplateMatcher(
+        threshold=0.9,
+        state_index=ScreenStateIndex.build_from_dir(str(screenshot_dir))
+    )
+    for name, seed in [("button_start", 11), ("enemy", 12), ("skill", 13), ("other", 14)]:
+        gray = cv2.cvtColor(smooth_noise((40, 40, 3), seed, cell=40), cv2.COLOR_BGR2GRAY)
+        matcher.templates[name] = {"image": None, "gray": gray, "shape": gray.shape}
+
+    state, results = matcher.match_screen(live(SCREENS["battle"], 1))
+    assert state == matcher.last_state == "battle"
+    assert set(results) == {"enemy", "skill"}
+
+    # 沒有對應模板清單的畫面與未知畫面匹配所有模板
+    state, results = matcher.match_screen(live(SCREENS["result"], 1))
+    assert state == "result"
+    assert set(results) == {"button_start", "enemy", "skill", "other"}
+
+    state, results = matcher.match_screen(smooth_noise((640, 360, 3), seed=9, cell=40))
+    assert state is None
+    assert len(results) == 4
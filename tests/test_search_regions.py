@@ -0,0 +1,113 @@
+"""
+模板搜尋區域測試
+
+驗證宣告與學習的搜尋區域只匹配區域內的像素、結果為畫面座標，
+以及連續未匹配後改為搜尋整個畫面。
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ChangeDetector, FramePacket
+from vision import TemplateMatcher
+
+TEMPLATE_SIZE = (24, 20)  # (w, h)
+
+
+def make_screen(x, y, seed=1):
+    """隨機雜訊背景，模板 (固定圖樣) 貼在 (x, y)"""
+    rng = np.random.default_rng(seed)
+    screen = rng.integers(0, 256, (200, 300, 3), dtype=np.uint8)
+    screen[y:y + TEMPLATE_SIZE[1], x:x + TEMPLATE_SIZE[0]] = PATTERN
+    return screen
+
+
+PATTERN = np.random.default_rng(0).integers(0, 256, (TEMPLATE_SIZE[1], TEMPLATE_SIZE[0], 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def matcher(record_calls):
+    matcher = TemplateMatcher(threshold=0.95, learn_regions=True, region_margin=8, region_miss_limit=3)
+    gray = FramePacket(PATTERN, source_format='BGR').gray.copy()
+    matcher.templates["button"] = {"image": None, "gray": gray, "shape": gray.shape}
+
+    # 記錄每次匹配的搜尋影像大小
+    matcher.searched = record_calls(matcher, "_match_gray", lambda screen_gray, *args, **kwargs: screen_gray.shape)
+    return matcher
+
+
+def test_declared_region_limits_search(matcher):
+    matcher.set_search_region("button", (90, 50, 60, 50))
+    found = matcher.match(make_screen(100, 60), "button")
+
+    assert found[:2] == (100 + 12, 60 + 10)
+    assert matcher.searched == [(50, 60)]
+
+    with pytest.raises(ValueError):
+        matcher.set_search_region("button", (0, 0, 0, 10))
+
+
+def test_learned_region_and_roi_packet(matcher):
+    screen = make_screen(100, 60)
+    assert matcher.match(screen, "button")[:2] == (112, 70)
+    assert matcher._search_rect("button") == (92, 52, 40, 36)
+
+    # 學習後只搜尋匹配外框加邊界
+    assert matcher.match(screen, "button")[:2] == (112, 70)
+    assert matcher.searched[-1] == (36, 40)
+
+    # 子區域封包：搜尋區域換算為封包座標，結果仍為畫面座標
+    roi = FramePacket(screen, source_format='BGR').crop((80, 40, 120, 100), roi="area")
+    assert matcher.match(roi, "button")[:2] == (112, 70)
+    assert matcher.searched[-1] == (36, 40)
+
+
+def test_miss_streak_falls_back_to_full_frame(matcher):
+    matcher.match(make_screen(100, 60), "button")
+
+    moved = make_screen(200, 150)
+    for _ in range(3):
+        assert matcher.match(moved, "button") is None
+    assert matcher.searched[-1] == (36, 40)
+
+    # 第 4 次搜尋整個畫面，在新位置找到並重新學習
+    assert matcher.match(moved, "button")[:2] == (212, 160)
+    assert matcher.searched[-1] == (200, 300)
+    assert matcher._search_rect("button") == (192, 142, 40, 36)
+
+
+def test_manifest_and_match_many(matcher, tmp_path):
+    manifest = tmp_path / "regions.yaml"
+    manifest.write_text("button: [90, 50, 60, 50]\nbad: [1, 2]\n", encoding="utf-8")
+    assert matcher.load_search_regions(str(manifest)) == 1
+
+    results = matcher.match_many(make_screen(100, 60), ["button"])
+    assert results["button"][:2] == (112, 70)
+    assert matcher.searched == [(50, 60)]
+
+
+def test_regional_miss_is_not_reused_with_change_detector():
+    # 區域內未匹配的結果不可沿用，否則未匹配次數停止累計，永遠不會搜尋整個畫面
+    detector = ChangeDetector()
+    matcher = TemplateMatcher(
+        threshold=0.95, change_detector=detector, learn_regions=True, region_margin=8, region_miss_limit=3
+    )
+    gray = FramePacket(PATTERN, source_format='BGR').gray.copy()
+    matcher.templates["button"] = {"image": None, "gray": gray, "shape": gray.shape}
+
+    def feed(screen, seq):
+        packet = FramePacket(screen, seq=seq, source_format='BGR')
+        detector.update(packet, seq)
+        return matcher.match(packet, "button")
+
+    assert feed(make_screen(100, 60), 1)[:2] == (112, 70)
+    moved = make_screen(200, 150)
+    results = [feed(moved, seq) for seq in range(2, 8)]
+    assert results[-1][:2] == (212, 160)
+    assert matcher._search_rect("button") == (192, 142, 40, 36)
@@ -0,0 +1,116 @@
+"""
+影格記錄測試
+
+驗證記錄的影格可無損還原、只寫入變化的 tile、定期寫入關鍵影格，
+以及分段容量限制與佇列滿時丟棄影格。
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FramePacket, SessionRecorder, SessionReader
+
+
+def make_frames(count, width=100, height=70):
+    """產生移動小方塊的畫面序列（寬高不是 tile 的倍數）"""
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for index in range(count):
+        frame = background.copy()
+        x = (index * 7) % (width - 10)
+        frame[20:30, x:x + 10] = (index * 13) % 256
+        frames.append(frame)
+    return frames
+
+
+def test_roundtrip_is_lossless(tmp_path):
+    frames = make_frames(30)
+    with SessionRecorder(str(tmp_path), tile_size=16, keyframe_interval=10) as recorder:
+        for index, frame in enumerate(frames):
+            packet = FramePacket(frame, seq=index + 1, timestamp=index / 30, source_format='BGR')
+            assert recorder.write(packet)
+
+    stats = recorder.get_stats()
+    assert stats["frames_written"] == 30
+    assert stats["keyframes"] == 3
+    # 只有方塊經過的 tile 會變化
+    assert 0 < stats["avg_tiles"] <= 6
+
+    reader = SessionReader(str(tmp_path))
+    decoded = list(reader)
+    assert len(reader) == len(decoded) == 30
+    for index, (seq, timestamp, image) in enumerate(decoded):
+        assert seq == index + 1
+        assert timestamp == pytest.approx(index / 30)
+        np.testing.assert_array_equal(image, frames[index])
+
+
+def test_delta_is_smaller_than_keyframes(tmp_path):
+    frames = make_frames(20)
+    with SessionRecorder(str(tmp_path), keyframe_interval=1000) as recorder:
+        for frame in frames:
+            recorder.write(frame)
+
+    # 隨機背景幾乎無法壓縮，節省的容量來自只寫入變化的 tile
+    keyframe_bytes = len(np.concatenate(frames).tobytes())
+    assert recorder.get_stats()["bytes_written"] < keyframe_bytes / 3
+
+
+def test_chunks_start_with_keyframe_and_respect_max_bytes(tmp_path):
+    frames = make_frames(40)
+    with SessionRecorder(
+        str(tmp_path), chunk_frames=10, keyframe_interval=1000, max_bytes=1
+    ) as recorder:
+        for frame in frames:
+            recorder.write(frame)
+
+    stats = recorder.get_stats()
+    assert stats["keyframes"] == 4
+    assert stats["chunks_deleted"] == 3
+
+    # 只剩最新的分段，仍可單獨解碼
+    reader = SessionReader(str(tmp_path))
+    assert len(reader.chunks) == 1
+    decoded = list(reader)
+    assert len(decoded) == 10
+    np.testing.assert_array_equal(decoded[-1][2], frames[-1])
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    release = threading.Event()
+    original = SessionRecorder._encode
+
+    def slow_encode(self, *args):
+        release.wait(5)
+        original(self, *args)
+
+    monkeypatch.setattr(SessionRecorder, "_encode", slow_encode)
+    recorder = SessionRecorder(str(tmp_path), queue_size=2)
+    results = [recorder.write(frame) for frame in make_frames(10)]
+    release.set()
+    recorder.close()
+
+    assert results.count(False) == recorder.frames_dropped > 0
+    assert recorder.frames_written == results.count(True)
+
+
+def test_truncated_chunk_is_read_up_to_last_complete_frame(tmp_path):
+    frames = make_frames(5)
+    with SessionRecorder(str(tmp_path)) as recorder:
+        for frame in frames:
+            recorder.write(frame)
+
+    chunk = SessionReader(str(tmp_path)).chunks[0]
+    data = chunk.read_bytes()
+    chunk.write_bytes(data[:-3])
+
+    decoded = list(SessionReader(str(tmp_path)))
+    assert len(decoded) == 4
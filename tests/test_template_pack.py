@@ -0,0 +1,144 @@
+"""
+模板包測試
+
+驗證模板包載入後的影像、金字塔與縮放模板與直接從目錄載入完全相同、
+影像為檔案的唯讀映射、閾值與搜尋區域中繼資料、統計值換算的預篩簽章，
+以及模板目錄變動後判定為過期。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from vision import TemplateMatcher, build_template_pack, read_template_pack, is_template_pack_stale
+from conftest import smooth_noise
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    directory = tmp_path / "templates"
+    directory.mkdir()
+    cv2.imwrite(str(directory / "button_start.png"), smooth_noise((48, 96, 3), seed=1))
+    cv2.imwrite(str(directory / "button_mode.png"), smooth_noise((40, 44, 3), seed=2))
+    (directory / "regions.yaml").write_text(
+        "button_start: [10, 20, 200, 100]\n"
+        "button_mode: {threshold: 0.9}\n",
+        encoding="utf-8"
+    )
+    return directory
+
+
+def make_matcher():
+    return TemplateMatcher(threshold=0.8, pyramid_levels=2, scale_range=(0.9, 1.1), scale_step=0.1)
+
+
+def test_pack_matches_directory(template_dir, tmp_path):
+    pack = tmp_path / "templates.tpak"
+    header = build_template_pack(
+        str(template_dir), str(pack), pyramid_levels=2, scale_range=(0.9, 1.1), scale_step=0.1
+    )
+    assert set(header["templates"]) == {"button_start", "button_mode"}
+    assert header["scales"] == [0.9, 1.0, 1.1]
+
+    from_dir = make_matcher()
+    from_dir.load_templates_from_dir(str(template_dir))
+    from_pack = make_matcher()
+    assert from_pack.load_template_pack(str(pack)) == 2
+
+    for name, expected in from_dir.templates.items():
+        data = from_pack.templates[name]
+        assert data['shape'] == expected['shape']
+        assert np.array_equal(data['image'], expected['image'])
+        assert np.array_equal(data['gray'], expected['gray'])
+        assert len(data['pyramid']) == len(expected['pyramid'])
+        for level, expected_level in zip(data['pyramid'], expected['pyramid']):
+            assert np.array_equal(level, expected_level)
+        assert set(data['scaled']) == set(expected['scaled'])
+        for scale, scaled in data['scaled'].items():
+            assert np.array_equal(scaled['gray'], expected['scaled'][scale]['gray'])
+
+    assert from_pack.search_regions == from_dir.search_regions == {"button_start": (10, 20, 200, 100)}
+    assert from_pack.templates["button_mode"]["threshold"] == 0.9
+    assert "threshold" not in from_pack.templates["button_start"]
+
+
+def test_pack_stats_feed_prefilter_signature(template_dir, tmp_path):
+    pack = tmp_path / "templates.tpak"
+    build_template_pack(str(template_dir), str(pack), pyramid_levels=0, scale_range=(0.9, 1.1), scale_step=0.1)
+
+    from_dir = make_matcher()
+    from_dir.load_templates_from_dir(str(template_dir))
+    _, templates = read_template_pack(str(pack))
+
+    for name, expected in from_dir.templates.items():
+        assert templates[name]["prefilter"] == pytest.approx(expected["prefilter"], rel=1e-9)
+        for scale, scaled in templates[name]["scaled"].items():
+            assert scaled["prefilter"] == pytest.approx(expected["scaled"][scale]["prefilter"], rel=1e-9)
+
+
+def test_pack_arrays_are_readonly_file_views(template_dir, tmp_path):
+    pack = tmp_path / "templates.tpak"
+    build_template_pack(str(template_dir), str(pack), pyramid_levels=1)
+
+    _, templates = read_template_pack(str(pack))
+    gray = templates["button_start"]["gray"]
+    assert not gray.flags.writeable
+    assert isinstance(gray.base, np.memmap)
+    assert templates["button_start"]["pyramid"][0] is gray
+    assert gray.ctypes.data % 64 == 0
+
+
+def test_matching_with_pack(template_dir, tmp_path):
+    pack = tmp_path / "templates.tpak"
+    build_template_pack(str(template_dir), str(pack), pyramid_levels=2)
+
+    screen = smooth_noise((300, 240, 3), seed=5)
+    screen[130:170, 60:104] = cv2.imread(str(template_dir / "button_mode.png"))
+
+    matcher = TemplateMatcher(threshold=0.8, pyramid_levels=2)
+    matcher.load_template_pack(str(pack))
+    assert matcher.match(screen, "button_mode")[:2] == (82, 150)
+
+    # 模板包的閾值優先於匹配器的閾值
+    matcher.templates["button_mode"]["threshold"] = 1.01
+    assert matcher.match(screen, "button_mode") is None
+
+
+def test_pack_becomes_stale_when_directory_changes(template_dir, tmp_path):
+    pack = tmp_path / "templates.tpak"
+    build_template_pack(str(template_dir), str(pack), pyramid_levels=0)
+    assert not is_template_pack_stale(str(pack), str(template_dir))
+
+    # 編輯模板圖片
+    cv2.imwrite(str(template_dir / "button_mode.png"), smooth_noise((40, 46, 3), seed=3))
+    assert is_template_pack_stale(str(pack), str(template_dir))
+
+    build_template_pack(str(template_dir), str(pack), pyramid_levels=0)
+    assert not is_template_pack_stale(str(pack), str(template_dir))
+
+    # 新增模板、修改 regions.yaml
+    cv2.imwrite(str(template_dir / "button_new.png"), smooth_noise((20, 20, 3), seed=4))
+    assert is_template_pack_stale(str(pack), str(template_dir))
+    build_template_pack(str(template_dir), str(pack), pyramid_levels=0)
+    (template_dir / "regions.yaml").write_text("button_start: [0, 0, 100, 100]\n", encoding="utf-8")
+    assert is_template_pack_stale(str(pack), str(template_dir))
+
+    # 無法讀取的模板包需要重新編譯；只部署模板包（沒有模板目錄）時直接使用
+    assert is_template_pack_stale(str(tmp_path / "missing.tpak"), str(template_dir))
+    assert not is_template_pack_stale(str(pack), str(tmp_path / "missing_dir"))
+
+
+def test_invalid_pack(tmp_path):
+    path = tmp_path / "bad.tpak"
+    path.write_bytes(b"not a pack at all")
+    matcher = TemplateMatcher()
+    assert matcher.load_template_pack(str(path)) == 0
+    assert matcher.load_template_pack(str(tmp_path / "missing.tpak")) == 0
+    with pytest.raises(ValueError):
+        build_template_pack(str(tmp_path), str(tmp_path / "empty.tpak"))
@@ -0,0 +1,114 @@
+"""
+背景擷取測試
+
+以假的擷取來源驗證生產者執行緒、影格序號與最新影格 API。
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ThreadedCapture, FrameRing, FramePacket
+
+
+class FakeSource:
+    """每次 capture 回傳以序號填滿的影像，並記錄建立與使用的執行緒"""
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.count = 0
+        self.owner_thread = threading.get_ident()
+        self.capture_threads = set()
+        self.closed = False
+        self.buffer = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    def capture(self):
+        time.sleep(self.interval)
+        self.count += 1
+        self.capture_threads.add(threading.get_ident())
+        # 模擬零複製模式：每次回傳同一個緩衝區
+        self.buffer[:] = self.count % 256
+        return self.buffer
+
+    def get_fps(self):
+        return 0
+
+    def close(self):
+        self.closed = True
+
+
+def test_producer_owns_source():
+    sources = []
+
+    def factory():
+        sources.append(FakeSource())
+        return sources[0]
+
+    with ThreadedCapture(factory) as capturer:
+        capturer.capture()
+
+    source = sources[0]
+    assert source.owner_thread != threading.get_ident()
+    assert source.capture_threads == {source.owner_thread}
+    assert source.closed
+
+
+def test_sequence_numbers_and_wait_next():
+    with ThreadedCapture(FakeSource, ring_size=3) as capturer:
+        first = capturer.wait_next(0, timeout=1.0)
+        assert first is not None and first.seq >= 1
+
+        second = capturer.wait_next(first.seq, timeout=1.0)
+        assert second.seq > first.seq
+        assert second.timestamp >= first.timestamp
+
+        latest = capturer.latest()
+        assert latest.seq >= second.seq
+
+
+def test_ring_slots_are_independent_copies():
+    with ThreadedCapture(FakeSource, ring_size=4) as capturer:
+        frame = capturer.wait_next(0, timeout=1.0)
+        value = frame.image[0, 0, 0]
+        nxt = capturer.wait_next(frame.seq, timeout=1.0)
+
+        # 下一個影格寫入不同槽位，不會覆寫目前持有的影格
+        assert nxt.image is not frame.image
+        assert frame.image[0, 0, 0] == value
+
+
+def test_capture_never_returns_same_frame_twice():
+    with ThreadedCapture(FakeSource) as capturer:
+        seqs = []
+        for _ in range(5):
+            capturer.capture()
+            seqs.append(capturer._last_returned_seq)
+        assert seqs == sorted(set(seqs))
+
+
+def test_factory_error_is_raised():
+    def factory():
+        raise OSError("no display")
+
+    with pytest.raises(RuntimeError):
+        ThreadedCapture(factory)
+
+
+def test_frame_ring_wait_times_out():
+    ring = FrameRing(2)
+    assert ring.wait_next(0, timeout=0.01) is None
+
+    ring.publish(FramePacket(np.zeros((2, 2, 3), np.uint8), seq=1, source_format='BGR'))
+    assert ring.wait_next(0, timeout=0.01).seq == 1
+    assert ring.wait_next(1, timeout=0.01) is None
+    assert ring.get(1).seq == 1
+
+    ring.publish(FramePacket(np.zeros((2, 2, 3), np.uint8), seq=3, source_format='BGR'))
+    assert ring.get(1) is None
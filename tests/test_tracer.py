@@ -0,0 +1,122 @@
+"""
+熱路徑計時測試
+
+驗證停用時不記錄任何資料、啟用時各階段 span 寫入直方圖，
+以及 Chrome trace JSON 的格式。
+"""
+
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import BaseCapture
+from profiling import Tracer, tracer
+from profiling.tracer import _NULL_SPAN
+from vision import TemplateMatcher
+
+
+class StubCapture(BaseCapture):
+    """回傳固定影像的擷取來源"""
+
+    def __init__(self, image, **kwargs):
+        super().__init__(**kwargs)
+        self.image = image
+
+    def _grab(self, pool):
+        return self.image, 'BGR'
+
+
+@pytest.fixture
+def global_tracer():
+    tracer.reset()
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+    tracer.reset()
+
+
+def test_disabled_tracer_records_nothing():
+    t = Tracer()
+    assert t.span('a') is _NULL_SPAN
+
+    @t.traced('b')
+    def work(x):
+        return x * 2
+
+    with t.span('a'):
+        assert work(3) == 6
+    assert t.get_stats() == {}
+    assert t.chrome_trace()["traceEvents"] == []
+
+
+def test_enabled_tracer_builds_histograms():
+    t = Tracer(enabled=True)
+    for _ in range(5):
+        with t.span('outer'):
+            with t.span('outer.inner', size=3):
+                time.sleep(0.001)
+
+    stats = t.get_stats()
+    assert stats['outer']['count'] == 5
+    assert stats['outer.inner']['p50_ms'] >= 1.0
+    assert stats['outer']['total_ms'] >= stats['outer.inner']['total_ms']
+    assert 'outer.inner' in t.report()
+
+    t.reset()
+    assert t.get_stats() == {}
+
+
+def test_chrome_trace_json(tmp_path):
+    t = Tracer(enabled=True)
+
+    def worker():
+        with t.span('worker.step', index=1):
+            pass
+
+    thread = threading.Thread(target=worker, name='trace-worker')
+    thread.start()
+    thread.join()
+    with t.span('main.step'):
+        pass
+
+    path = tmp_path / "out" / "trace.json"
+    count = t.dump_chrome_trace(str(path))
+    trace = json.loads(path.read_text(encoding='utf-8'))
+
+    events = trace["traceEvents"]
+    assert len(events) == count
+    complete = [e for e in events if e["ph"] == "X"]
+    assert {e["name"] for e in complete} == {"worker.step", "main.step"}
+    assert all(e["dur"] >= 0 and e["ts"] >= 0 for e in complete)
+    worker_event = next(e for e in complete if e["name"] == "worker.step")
+    assert worker_event["cat"] == "worker"
+    assert worker_event["args"] == {"index": "1"}
+    assert len([e for e in events if e["ph"] == "M"]) == 2
+
+
+def test_capture_and_match_spans(global_tracer):
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    capturer = StubCapture(image, fps_limit=0)
+
+    matcher = TemplateMatcher(threshold=0.9)
+    template = np.ascontiguousarray(image[10:30, 20:50, 0])
+    matcher.templates["target"] = {"image": None, "gray": template, "shape": template.shape}
+
+    packet = capturer.capture_packet()
+    matcher.match(packet, "target")
+    matcher.match_all(packet, "target")
+
+    stats = global_tracer.get_stats()
+    for name in ("capture", "capture.wait", "capture.grab", "match", "match.gray",
+                 "match.template", "match_all"):
+        assert name in stats, name
+    assert stats["match.template"]["count"] == 2
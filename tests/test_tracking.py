@@ -0,0 +1,117 @@
+"""
+模板追蹤測試
+
+驗證找到模板後只在預測視窗內匹配、速度預測可追上快速移動的目標，
+以及視窗內找不到時逐步擴大並改為完整搜尋（不受學習到的搜尋區域限制）。
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import FramePacket
+from vision import TemplateMatcher
+from conftest import smooth_noise
+
+
+TARGET = smooth_noise((24, 30), seed=2)
+BACKGROUND = smooth_noise((400, 300), seed=1)
+
+
+def frame(seq, x, y):
+    """目標左上角在 (x, y) 的影格"""
+    screen = BACKGROUND.copy()
+    if x is not None:
+        screen[y:y + 24, x:x + 30] = TARGET
+    return FramePacket(cv2.cvtColor(screen, cv2.COLOR_GRAY2BGR), seq=seq, source_format='BGR')
+
+
+@pytest.fixture
+def matcher(record_calls):
+    matcher = TemplateMatcher(threshold=0.9, track_radius=8, track_widen_steps=2)
+    matcher.templates["enemy"] = {"image": None, "gray": TARGET, "shape": TARGET.shape}
+
+    # 記錄每次匹配的搜尋影像大小
+    matcher.searched = record_calls(matcher, "_locate", lambda screen_gray, *args, **kwargs: screen_gray.shape)
+    return matcher
+
+
+def test_tracks_moving_target_in_small_window(matcher):
+    found = matcher.track(frame(1, 50, 60), "enemy")
+    assert found == (65, 72, pytest.approx(1.0, abs=1e-4), False)
+    assert matcher.searched[-1] == (400, 300)
+
+    # 每幀移動 (12, 9)：速度估計後預測視窗都能涵蓋目標
+    for step in range(2, 12):
+        x, y = 50 + 12 * (step - 1), 60 + 9 * (step - 1)
+        found = matcher.track(frame(step, x, y), "enemy")
+        assert found[:2] == (x + 15, y + 12)
+        assert found[3] is True
+
+    assert matcher.track_searches == 1
+    assert matcher.track_hits == 10
+    # 穩定後只匹配預測位置周圍的小視窗
+    h, w = matcher.searched[-1]
+    assert h * w < 400 * 300 / 20
+
+
+def test_skipped_frames_scale_prediction(matcher):
+    matcher.track(frame(1, 50, 60), "enemy")
+    matcher.track(frame(2, 60, 60), "enemy")
+    matcher.track(frame(3, 70, 60), "enemy")
+
+    # 跳過 3 幀，預測位置依經過的幀數外推
+    found = matcher.track(frame(6, 100, 60), "enemy")
+    assert found[:2] == (115, 72)
+    assert found[3] is True
+
+
+def test_widen_then_full_search_then_lost(matcher):
+    matcher.track(frame(1, 50, 60), "enemy")
+
+    # 跳到預測視窗外：視窗擴大 2 次仍找不到，改為完整搜尋
+    matcher.searched.clear()
+    found = matcher.track(frame(2, 220, 300), "enemy")
+    assert found[:2] == (235, 312)
+    assert found[3] is False
+    assert len(matcher.searched) == 4
+    assert matcher.searched[0][0] < matcher.searched[1][0] < matcher.searched[2][0]
+
+    # 目標消失：追蹤狀態清除，下次直接完整搜尋
+    assert matcher.track(frame(3, None, None), "enemy") is None
+    matcher.searched.clear()
+    matcher.track(frame(4, 100, 100), "enemy")
+    assert matcher.searched == [(400, 300)]
+
+
+def test_full_search_ignores_learned_region(matcher):
+    # 先以 match() 學習到搜尋區域，之後的 match() 只搜尋該區域
+    matcher.learn_regions = True
+    matcher.match(frame(1, 50, 60), "enemy")
+    assert matcher._search_rect("enemy") is not None
+    matcher.track(frame(2, 50, 60), "enemy")
+
+    # 跳到追蹤半徑與學習區域之外：完整搜尋仍找得到
+    assert matcher.match(frame(3, 220, 300), "enemy") is None
+    matcher.searched.clear()
+    found = matcher.track(frame(4, 220, 300), "enemy")
+    assert found[:2] == (235, 312)
+    assert found[3] is False
+    assert matcher.searched[-1] == (400, 300)
+
+
+def test_roi_packet_and_reset(matcher):
+    full = frame(1, 120, 150)
+    roi = full.crop((100, 100, 150, 150), roi="area")
+    assert matcher.track(roi, "enemy")[:2] == (135, 162)
+    found = matcher.track(full, "enemy")
+    assert found[:2] == (135, 162)
+    assert found[3] is True
+
+    matcher.reset_track()
+    assert matcher.track(full, "enemy")[3] is False
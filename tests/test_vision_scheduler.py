@@ -0,0 +1,119 @@
+"""
+視覺排程測試
+
+驗證偵測間隔內以局部模板匹配追蹤移動的物件、偵測間隔依偵測耗時與移動速度調整，
+以及換場景與追蹤失敗時立即重新偵測（以依物件實際位置回傳外框的假偵測器模擬）。
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from capture import ChangeDetector, FramePacket
+from vision import VisionScheduler
+
+SPRITE = np.random.default_rng(1).integers(0, 256, (24, 24, 3), dtype=np.uint8)
+
+
+class FakeDetector:
+    """回傳物件實際位置的偵測器，可設定每次偵測的耗時"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.position = (0, 0)
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        x, y = self.position
+        return [("enemy", 0.9, (x, y, x + 24, y + 24))]
+
+
+def make_frame(detector, x, y, seq, background=None):
+    frame = np.full((240, 320, 3), 40, dtype=np.uint8) if background is None else background.copy()
+    frame[y:y + 24, x:x + 24] = SPRITE
+    detector.position = (x, y)
+    return FramePacket(frame, seq=seq, source_format='BGR')
+
+
+def test_tracks_between_detections():
+    detector = FakeDetector()
+    scheduler = VisionScheduler(detector, min_interval=5, max_interval=5, detect_budget_ms=0)
+
+    for seq in range(1, 11):
+        x, y = 20 + 3 * seq, 30 + 2 * seq
+        results = scheduler.update(make_frame(detector, x, y, seq))
+        assert results == [("enemy", 0.9, (x, y, x + 24, y + 24))]
+
+    # 10 幀只偵測 2 次，其餘影格追蹤
+    assert detector.calls == 2
+    stats = scheduler.get_stats()
+    assert stats["tracked_frames"] == 8
+    assert stats["track_losses"] == 0
+    assert scheduler.motion > 0
+
+
+def test_interval_adapts_to_latency_and_motion():
+    # 偵測約 20 ms、每幀預算 5 ms：至少每 4 幀偵測一次
+    detector = FakeDetector(latency=0.02)
+    scheduler = VisionScheduler(detector, max_interval=10, detect_budget_ms=5.0, motion_tolerance=12.0)
+    for seq in range(1, 8):
+        scheduler.update(make_frame(detector, 100, 100, seq))
+    assert 4 <= scheduler.interval <= 10
+    assert scheduler.age < scheduler.interval
+
+    # 物件快速移動時縮短間隔（不低於偵測耗時需要的間隔）
+    detector = FakeDetector()
+    fast = VisionScheduler(detector, max_interval=10, detect_budget_ms=0, motion_tolerance=12.0)
+    for seq in range(1, 30):
+        fast.update(make_frame(detector, 10 + 8 * seq, 100, seq))
+    assert fast.interval < 10
+
+    # 靜止畫面沿用到最大間隔
+    detector = FakeDetector()
+    still = VisionScheduler(detector, max_interval=10, detect_budget_ms=0)
+    for seq in range(1, 30):
+        still.update(make_frame(detector, 100, 100, seq))
+    assert still.interval == 10
+    assert detector.calls == 3  # 第 1、11、21 幀
+
+
+def test_scene_change_and_track_loss_force_detection():
+    change_detector = ChangeDetector()
+    detector = FakeDetector()
+    scheduler = VisionScheduler(
+        detector, change_detector=change_detector, min_interval=10, max_interval=10, detect_budget_ms=0
+    )
+
+    def feed(packet):
+        change_detector.update(packet, packet.seq)
+        return scheduler.update(packet)
+
+    feed(make_frame(detector, 100, 100, 1))
+    feed(make_frame(detector, 100, 100, 2))
+    assert detector.calls == 1
+
+    # 換場景：整個背景改變
+    background = np.random.default_rng(2).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    feed(make_frame(detector, 100, 100, 3, background))
+    assert detector.calls == 2
+    assert scheduler.get_stats()["scene_changes"] == 1
+
+    # 物件瞬間移到追蹤半徑外：追蹤失敗，下一幀重新偵測
+    feed(make_frame(detector, 250, 180, 4, background))
+    assert scheduler.track_losses == 1
+    assert feed(make_frame(detector, 250, 180, 5, background)) == [("enemy", 0.9, (250, 180, 274, 204))]
+    assert detector.calls == 3
+
+
+def test_invalid_interval_range():
+    with pytest.raises(ValueError):
+        VisionScheduler(FakeDetector(), min_interval=5, max_interval=2)
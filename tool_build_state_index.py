@@ -0,0 +1,88 @@
+"""
+畫面狀態索引建立工具
+
+從已分類的截圖（data/screenshots/<狀態>/*.png）建立感知雜湊索引，
+目錄中的 states.yaml（{狀態: [模板名稱, ...]}）指定各畫面要匹配的模板。
+
+使用方式：
+    python tool_build_state_index.py
+    python tool_build_state_index.py --screenshots data/screenshots --output data/screen_states.npz
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import cv2
+
+from config import get_config
+from vision import ScreenStateIndex
+
+
+def parse_args(state_config):
+    parser = argparse.ArgumentParser(description="建立畫面狀態索引")
+    parser.add_argument("--screenshots", default="data/screenshots", help="已分類的截圖目錄")
+    parser.add_argument(
+        "--output",
+        default=state_config.get('index') or "data/screen_states.npz",
+        help="輸出檔案"
+    )
+    parser.add_argument(
+        "--max-distance", type=int,
+        default=state_config.get('max_distance'),
+        help="漢明距離超過此值視為未知畫面（預設為總位元數的 1/4）"
+    )
+    return parser.parse_args()
+
+
+def main():
+    try:
+        state_config = get_config().get('vision.screen_state') or {}
+    except Exception:
+        state_config = {}
+    args = parse_args(state_config)
+
+    print("=" * 60)
+    print("🗂️  畫面狀態索引建立工具")
+    print("=" * 60)
+
+    if not Path(args.screenshots).is_dir():
+        print(f"❌ 截圖目錄不存在: {args.screenshots}")
+        sys.exit(1)
+
+    try:
+        index = ScreenStateIndex.build_from_dir(args.screenshots, max_distance=args.max_distance)
+    except ValueError as e:
+        print(f"❌ {e}")
+        print("   請將截圖依畫面分類放入子目錄，例如 data/screenshots/lobby/*.png")
+        sys.exit(1)
+
+    index.save(args.output)
+    print(f"✅ 已輸出: {args.output}")
+    for state, count in sorted(Counter(index.labels).items()):
+        templates = index.templates.get(state)
+        suffix = f"，模板: {', '.join(templates)}" if templates else "（匹配所有模板）"
+        print(f"   {state}: {count} 張{suffix}")
+
+    # 以範例本身驗證分類結果，並量測分類時間
+    root = Path(args.screenshots)
+    images = [
+        (state_dir.name, cv2.imread(str(path)))
+        for state_dir in sorted(p for p in root.iterdir() if p.is_dir())
+        for path in sorted(state_dir.glob("*.png"))
+    ]
+    images = [(state, image) for state, image in images if image is not None]
+
+    start = time.perf_counter()
+    correct = sum(1 for state, image in images if index.classify(image)[0] == state)
+    elapsed_us = (time.perf_counter() - start) / len(images) * 1e6
+    print(f"   範例分類正確: {correct}/{len(images)}，平均 {elapsed_us:.0f} µs/張")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+模板包編譯工具
+
+將模板目錄（*.png 與 regions.yaml）編譯為單一模板包檔案，
+金字塔與縮放參數預設讀取 configs/config.yaml 的 vision.template_matching。
+
+使用方式：
+    python tool_build_template_pack.py
+    python tool_build_template_pack.py --templates data/templates --output data/templates.tpak
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from loguru import logger
+
+from config import get_config
+from vision import TemplateMatcher, build_template_pack
+
+
+def parse_args(matching_config):
+    parser = argparse.ArgumentParser(description="編譯模板包")
+    parser.add_argument("--templates", default="data/templates", help="模板目錄")
+    parser.add_argument(
+        "--output",
+        default=matching_config.get('template_pack') or "data/templates.tpak",
+        help="輸出檔案"
+    )
+    parser.add_argument(
+        "--pyramid-levels", type=int,
+        default=matching_config.get('pyramid_levels', 2),
+        help="預先計算的金字塔層數"
+    )
+    parser.add_argument(
+        "--scale-range", type=float, nargs=2, metavar=("MIN", "MAX"),
+        default=matching_config.get('scale_range'),
+        help="預先縮放的比例範圍"
+    )
+    parser.add_argument(
+        "--scale-step", type=float,
+        default=matching_config.get('scale_step', 0.05),
+        help="縮放比例的間隔"
+    )
+    return parser.parse_args()
+
+
+def main():
+    try:
+        matching_config = get_config().get('vision.template_matching') or {}
+    except Exception:
+        matching_config = {}
+    args = parse_args(matching_config)
+
+    print("=" * 60)
+    print("📦 模板包編譯工具")
+    print("=" * 60)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    try:
+        header = build_template_pack(
+            args.templates,
+            args.output,
+            pyramid_levels=args.pyramid_levels,
+            scale_range=args.scale_range,
+            scale_step=args.scale_step
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    size = Path(args.output).stat().st_size
+    print(f"✅ 已輸出: {args.output} ({size / 1024:.1f} KB)")
+    print(f"   模板: {len(header['templates'])} 個")
+    print(f"   金字塔層數: {header['pyramid_levels']}，縮放比例: {len(header['scales'])} 個")
+
+    # 比較載入時間（以相同設定從目錄載入，同樣預先計算金字塔與縮放模板）
+    def make_matcher():
+        return TemplateMatcher(
+            pyramid_levels=args.pyramid_levels,
+            scale_range=args.scale_range,
+            scale_step=args.scale_step
+        )
+
+    matcher = make_matcher()
+    start = time.perf_counter()
+    matcher.load_templates_from_dir(args.templates)
+    dir_ms = (time.perf_counter() - start) * 1000
+
+    matcher = make_matcher()
+    start = time.perf_counter()
+    matcher.load_template_pack(args.output)
+    pack_ms = (time.perf_counter() - start) * 1000
+
+    print(f"   載入時間: 目錄 {dir_ms:.1f} ms -> 模板包 {pack_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+統計預篩檢查工具
+
+回放記錄的影格（SessionRecorder 目錄、圖片目錄或影片），分別以啟用與停用統計預篩的
+匹配器匹配所有模板，回報預篩排除的比例、匹配耗時，以及預篩是否漏掉任何匹配。
+預篩只排除信心度上界低於閾值的位置，不應漏掉匹配；有漏掉的匹配時以結束碼 1 結束。
+只有 TM_SQDIFF、TM_SQDIFF_NORMED 與 TM_CCORR 可以預篩（bot 使用的 TM_CCOEFF_NORMED
+不受亮度與對比影響，無法以視窗的總和與平方和限制信心度）。
+
+使用方式：
+    python tool_check_prefilter.py --replay data/sessions/session_20250101_120000 --method sqdiff_normed
+    python tool_check_prefilter.py --replay data/screenshots --level 3 --method sqdiff_normed
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import cv2
+from loguru import logger
+
+from capture import ReplayCapture
+from config import get_config
+from vision import TemplateMatcher
+
+METHODS = {
+    "sqdiff_normed": cv2.TM_SQDIFF_NORMED,
+    "ccorr": cv2.TM_CCORR,
+    "sqdiff": cv2.TM_SQDIFF,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="檢查統計預篩是否漏掉匹配")
+    parser.add_argument("--replay", required=True, help="記錄目錄、圖片目錄或影片檔")
+    parser.add_argument("--templates", default="data/templates", help="模板目錄（沒有模板包時使用）")
+    parser.add_argument(
+        "--level", type=int,
+        default=2,
+        help="預篩縮小層數"
+    )
+    parser.add_argument("--method", choices=list(METHODS), default="sqdiff_normed", help="匹配方法")
+    parser.add_argument("--threshold", type=float, default=0.8, help="匹配信心閾值")
+    return parser.parse_args()
+
+
+def make_matcher(args, matching_config, prefilter_level):
+    matcher = TemplateMatcher(
+        threshold=args.threshold,
+        workers=1,
+        pyramid_levels=matching_config.get('pyramid_levels', 0),
+        scale_range=matching_config.get('scale_range'),
+        scale_step=matching_config.get('scale_step', 0.05),
+        scale_miss_limit=matching_config.get('scale_miss_limit', 50),
+        prefilter_level=prefilter_level
+    )
+    template_pack = matching_config.get('template_pack')
+    if template_pack and Path(template_pack).exists():
+        matcher.load_template_pack(template_pack)
+    else:
+        matcher.load_templates_from_dir(args.templates)
+    return matcher
+
+
+def main():
+    try:
+        matching_config = get_config().get('vision.template_matching') or {}
+    except Exception:
+        matching_config = {}
+    args = parse_args()
+
+    print("=" * 60)
+    print("🔍 統計預篩檢查工具")
+    print("=" * 60)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    baseline = make_matcher(args, matching_config, prefilter_level=0)
+    matcher = make_matcher(args, matching_config, prefilter_level=args.level)
+    if not matcher.templates:
+        print("❌ 沒有載入任何模板")
+        sys.exit(1)
+
+    capturer = ReplayCapture(args.replay, mode='fast')
+    frames = 0
+    found = 0
+    baseline_time = 0.0
+    prefilter_time = 0.0
+    missed = []
+    try:
+        while True:
+            try:
+                packet = capturer.capture_packet()
+            except EOFError:
+                break
+            frames += 1
+
+            start = time.perf_counter()
+            expected = baseline.match_many(packet, method=METHODS[args.method])
+            baseline_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = matcher.match_many(packet, method=METHODS[args.method])
+            prefilter_time += time.perf_counter() - start
+
+            for name, match in expected.items():
+                if match is None:
+                    continue
+                found += 1
+                if results.get(name) is None:
+                    missed.append((frames, name, match))
+    finally:
+        capturer.close()
+        baseline.close()
+        matcher.close()
+
+    if not frames:
+        print("❌ 沒有可回放的影格")
+        sys.exit(1)
+
+    print(f"   影格: {frames}，模板: {len(matcher.templates)}，匹配: {found} 次")
+    print(
+        f"   預篩排除: {matcher.prefilter_rejects}/{matcher.prefilter_checks} "
+        f"({matcher.prefilter_rejection_rate:.1%})"
+    )
+    print(
+        f"   匹配耗時: {baseline_time / frames * 1000:.2f} ms/幀 -> "
+        f"{prefilter_time / frames * 1000:.2f} ms/幀"
+    )
+
+    if missed:
+        print(f"❌ 預篩漏掉 {len(missed)} 個匹配:")
+        for frame, name, (x, y, confidence) in missed[:20]:
+            print(f"   第 {frame} 幀 '{name}' at ({x}, {y}), confidence={confidence:.2f}")
+        sys.exit(1)
+    print("✅ 預篩沒有漏掉任何匹配")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+偵測模型匯出工具
+
+將 YOLO 模型（.pt）匯出為 ONNX，可選擇以記錄的畫面校正後量化為 int8，
+並以 CPU 量測推論速度。參數預設讀取 configs/config.yaml 的 vision.yolo。
+
+使用方式：
+    python tool_export_detector.py
+    python tool_export_detector.py --model runs/detect/train/weights/best.pt --img-size 416
+    python tool_export_detector.py --int8 --calibration data/screenshots
+"""
+
+import argparse
+import shutil
+import sys
+from pathlib import Path
+
+# 添加 src 到路徑
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from config import get_config
+from vision import YOLODetector, quantize_detector
+
+
+def parse_args(yolo_config):
+    parser = argparse.ArgumentParser(description="匯出 ONNX 偵測模型")
+    parser.add_argument("--model", default=yolo_config.get('model', "yolov8n.pt"), help=".pt 或 .onnx 模型")
+    parser.add_argument(
+        "--output",
+        default=yolo_config.get('onnx_model') or "data/models/yolov8n.onnx",
+        help="輸出的 ONNX 模型"
+    )
+    parser.add_argument("--img-size", type=int, default=yolo_config.get('img_size', 640), help="輸入邊長")
+    parser.add_argument("--int8", action="store_true", help="量化為 int8（輸出檔名加上 .int8）")
+    parser.add_argument("--calibration", default="data/screenshots", help="量化校正用的截圖目錄")
+    parser.add_argument("--calibration-count", type=int, default=64, help="最多使用的校正截圖數")
+    parser.add_argument("--batch-size", type=int, default=yolo_config.get('batch_size', 1), help="量測速度的批次大小")
+    parser.add_argument("--threads", type=int, default=yolo_config.get('cpu_threads'), help="ONNX Runtime 執行緒數")
+    return parser.parse_args()
+
+
+def export(model: str, output: Path, img_size: int) -> Path:
+    """匯出 ONNX（動態批次大小，方便一次推論多個影格）"""
+    if model.endswith('.onnx'):
+        if Path(model).resolve() != output.resolve():
+            shutil.copyfile(model, output)
+        return output
+
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        print("❌ 匯出 .pt 模型需要 ultralytics，請執行: pip install ultralytics")
+        sys.exit(1)
+
+    exported = YOLO(model).export(format="onnx", imgsz=img_size, dynamic=True, simplify=True)
+    shutil.move(exported, output)
+    return output
+
+
+def load_calibration(directory: str, count: int):
+    paths = sorted(
+        p for p in Path(directory).rglob("*")
+        if p.suffix.lower() in ('.png', '.jpg', '.jpeg')
+    )[:count]
+    images = [cv2.imread(str(p)) for p in paths]
+    return [image for image in images if image is not None]
+
+
+def main():
+    try:
+        yolo_config = get_config().get('vision.yolo') or {}
+    except Exception:
+        yolo_config = {}
+    args = parse_args(yolo_config)
+
+    print("=" * 60)
+    print("🧠 偵測模型匯出工具")
+    print("=" * 60)
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    model_path = export(args.model, output, args.img_size)
+    print(f"✅ ONNX 模型: {model_path} ({model_path.stat().st_size / 1e6:.1f} MB)")
+
+    calibration = load_calibration(args.calibration, args.calibration_count) if Path(args.calibration).is_dir() else []
+    if args.int8:
+        int8_path = output.with_suffix(".int8.onnx")
+        if calibration:
+            print(f"   靜態量化（校正截圖 {len(calibration)} 張）...")
+        else:
+            print("   沒有校正截圖，只量化權重...")
+        quantize_detector(str(model_path), str(int8_path), calibration, img_size=args.img_size)
+        print(f"✅ int8 模型: {int8_path} ({int8_path.stat().st_size / 1e6:.1f} MB)")
+        model_path = int8_path
+
+    # 量測 CPU 推論速度（沒有截圖時使用空白畫面）
+    kwargs = dict(img_size=args.img_size, batch_size=args.batch_size, threads=args.threads)
+    try:
+        detector = YOLODetector(str(model_path), **kwargs)
+    except ValueError:
+        # 模型沒有類別名稱中繼資料時使用設定檔的類別
+        detector = YOLODetector(str(model_path), class_names=get_config().get('vision.classes'), **kwargs)
+    frames = calibration[:args.batch_size] or [np.zeros((720, 1280, 3), dtype=np.uint8)]
+    frames = (frames * args.batch_size)[:args.batch_size]
+    detector.detect_batch(frames)  # 暖機
+    detector.frames, detector.inference_time = 0, 0.0
+    for _ in range(10):
+        detector.detect_batch(frames)
+    stats = detector.get_stats()
+    print(f"   CPU 推論: {stats['inference_ms']:.1f} ms/幀 ({stats['fps']:.1f} fps, batch={detector.batch_size})")
+
+
+if __name__ == "__main__":
+    main()